@@ -193,7 +193,7 @@ class Command(BaseCommand):
                     user=demo_user,
                     name=goal['name'],
                     target_amount=goal['target_amount'],
-                    current_amount=Decimal(str(random.randint(0, int(goal['target_amount']/2)))),
+                    current_amount=Decimal('0'),  # Contributions below fill in the balance
                     start_date=start_date,  # Add start_date
                     target_date=target_date,
                     description=f"Saving for {goal['name'].lower()}",
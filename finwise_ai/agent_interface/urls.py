@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'agent_interface'
+
+urlpatterns = [
+    path('process-prompt/', views.process_prompt, name='process_prompt'),
+]
@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from credit.models import CreditHistory
 import json
 
 # Import necessary functions from other modules (placeholders for now)
@@ -18,7 +19,7 @@ def agent_home(request):
 
 @csrf_exempt  # Use CSRF protection appropriately in production
 @login_required
-def process_prompt(request):
+async def process_prompt(request):
     """API endpoint to process user prompts via the AI agent."""
     if request.method == "POST":
         try:
@@ -32,7 +33,7 @@ def process_prompt(request):
             action, params = parse_prompt(prompt)
             
             # Execute the action based on the parsed result
-            response_data = execute_action(request.user, action, params)
+            response_data = await execute_action(await request.auser(), action, params)
             
             return JsonResponse(response_data)
             
@@ -90,29 +91,29 @@ def parse_prompt(prompt):
         # Default or fallback action
         return "unknown_action", {"original_prompt": prompt}
 
-def execute_action(user, action, params):
+async def execute_action(user, action, params):
     """Executes the determined action by calling the appropriate module function."""
     
     # Placeholder implementations - Replace with actual function calls
     if action == "analyze_expenses":
         # result = analyze_expenses(user, params.get("time_frame"))
-        result = {"message": f"Analyzing expenses for {params.get("time_frame", "the default period")}...", "data": {"total_spent": 1500, "top_category": "Groceries"}}
+        result = {"message": f"Analyzing expenses for {params.get('time_frame', 'the default period')}...", "data": {"total_spent": 1500, "top_category": "Groceries"}}
         
     elif action == "check_loan_eligibility":
         # result = check_loan_eligibility(user, params.get("loan_type"), params.get("amount"))
-        result = {"message": f"Checking eligibility for a {params.get("loan_type", "generic")} loan...", "data": {"eligible": True, "max_amount": 10000}}
+        result = {"message": f"Checking eligibility for a {params.get('loan_type', 'generic')} loan...", "data": {"eligible": True, "max_amount": 10000}}
         
     elif action == "create_savings_plan":
         # result = create_savings_plan(user, params.get("target_amount"), params.get("time_frame"))
-        result = {"message": f"Creating savings plan for {params.get("target_amount", 0)} in {params.get("time_frame", "N/A")}...", "data": {"monthly_savings": 833.33}}
+        result = {"message": f"Creating savings plan for {params.get('target_amount', 0)} in {params.get('time_frame', 'N/A')}...", "data": {"monthly_savings": 833.33}}
         
     elif action == "simulate_investment":
         # result = simulate_investment(user, params.get("strategy"))
-        result = {"message": f"Simulating investment with {params.get("strategy", "default")} strategy...", "data": {"projected_value": 12000}}
+        result = {"message": f"Simulating investment with {params.get('strategy', 'default')} strategy...", "data": {"projected_value": 12000}}
         
     elif action == "get_credit_score":
         # Placeholder: Get score from credit module
-        latest_credit = CreditHistory.objects.filter(user=user).order_by("-date").first()
+        latest_credit = await CreditHistory.objects.filter(user=user).order_by("-date").afirst()
         score = latest_credit.score if latest_credit else "Not Available"
         result = {"message": "Fetching your latest credit score...", "data": {"credit_score": score}}
         
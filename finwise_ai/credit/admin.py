@@ -18,6 +18,7 @@ class CreditFactorAdmin(admin.ModelAdmin):
 @admin.register(CreditHistory)
 class CreditHistoryAdmin(admin.ModelAdmin):
     list_display = ['user', 'score', 'date', 'report_source', 'created_at']
+    list_select_related = ['user']
     list_filter = ['score', 'date', 'report_source']
     search_fields = ['user__email', 'report_source', 'notes']
     date_hierarchy = 'date'
@@ -37,6 +38,7 @@ class CreditHistoryAdmin(admin.ModelAdmin):
 @admin.register(CreditFactorScore)
 class CreditFactorScoreAdmin(admin.ModelAdmin):
     list_display = ['credit_history', 'factor', 'score']
+    list_select_related = ['credit_history', 'factor']
     list_filter = ['factor', 'score']
     search_fields = ['credit_history__user__email', 'factor__name', 'notes']
     raw_id_fields = ['credit_history']
@@ -56,6 +58,7 @@ class CreditFactorScoreAdmin(admin.ModelAdmin):
 @admin.register(CreditEstimation)
 class CreditEstimationAdmin(admin.ModelAdmin):
     list_display = ['user', 'estimated_score', 'confidence_level', 'credit_utilization_percentage', 'created_at']
+    list_select_related = ['user']
     list_filter = ['estimated_score', 'confidence_level', 'created_at']
     search_fields = ['user__email']
     date_hierarchy = 'created_at'
@@ -97,6 +100,7 @@ class CreditEstimationAdmin(admin.ModelAdmin):
 @admin.register(ImprovementSuggestion)
 class ImprovementSuggestionAdmin(admin.ModelAdmin):
     list_display = ['title', 'credit_estimation', 'impact', 'potential_points_gain', 'timeframe_months']
+    list_select_related = ['credit_estimation']
     list_filter = ['impact', 'potential_points_gain', 'timeframe_months']
     search_fields = ['title', 'description', 'credit_estimation__user__email']
     raw_id_fields = ['credit_estimation']
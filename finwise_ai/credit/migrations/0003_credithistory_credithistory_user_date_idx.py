@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0002_improvementsuggestion_implemented_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credithistory',
+            index=models.Index(fields=['user', 'date'], name='credithistory_user_date_idx'),
+        ),
+    ]
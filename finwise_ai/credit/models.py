@@ -33,6 +33,9 @@ class CreditHistory(models.Model):
         ordering = ['-date']
         verbose_name = "Credit History"
         verbose_name_plural = "Credit Histories"
+        indexes = [
+            models.Index(fields=['user', 'date'], name='credithistory_user_date_idx'),
+        ]
 
 
 class CreditFactorScore(models.Model):
@@ -268,16 +268,18 @@ def mark_suggestion_implemented(request, pk):
     return render(request, 'credit/suggestion_confirm_implement.html', context)
 
 @login_required
-def credit_score_chart(request):
+async def credit_score_chart(request):
     """API view for credit score chart data."""
+    user = await request.auser()
+    
     # Get user's credit history
     credit_history = CreditHistory.objects.filter(
-        user=request.user
+        user=user
     ).order_by('date')
     
     # Prepare chart data
     chart_data = []
-    for history in credit_history:
+    async for history in credit_history:
         chart_data.append({
             'date': history.date.strftime('%Y-%m-%d'),
             'score': history.score,
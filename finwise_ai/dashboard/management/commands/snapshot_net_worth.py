@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from dashboard.utils import snapshot_active_users
+
+class Command(BaseCommand):
+    help = 'Stores a net worth snapshot for every active user (run_worker queues this daily; run it by hand or from cron with JOBS_EAGER)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Snapshot date as YYYY-MM-DD (defaults to today)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of users snapshotted per batch')
+    
+    def handle(self, *args, **options):
+        snapshot_date = timezone.now().date()
+        
+        if options['date']:
+            try:
+                snapshot_date = parse_date(options['date'])
+            except ValueError:
+                snapshot_date = None
+            if snapshot_date is None:
+                raise CommandError(f"Invalid date: {options['date']}")
+        
+        total = snapshot_active_users(
+            snapshot_date,
+            options['batch_size'],
+            progress=lambda done, user_count: self.stdout.write(f'Snapshotted {done}/{user_count} users')
+        )
+        
+        self.stdout.write(self.style.SUCCESS(f'Stored {total} net worth snapshots for {snapshot_date}'))
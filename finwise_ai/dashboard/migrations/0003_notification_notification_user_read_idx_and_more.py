@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0003_credithistory_credithistory_user_date_idx'),
+        ('dashboard', '0002_networthsnapshot'),
+        ('expenses', '0004_expense_expense_user_date_idx_and_more'),
+        ('goals', '0002_goalcontribution_contribution_goal_date_idx'),
+        ('investments', '0002_investment_investment_active_idx_and_more'),
+        ('loans', '0003_loan_loan_active_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'created_at'], name='notification_unread_idx'),
+        ),
+    ]
@@ -90,6 +90,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+            models.Index(fields=['user', 'created_at'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
 
 
 class FinancialInsight(models.Model):
@@ -119,3 +123,27 @@ class FinancialInsight(models.Model):
     
     class Meta:
         ordering = ['-importance_score', '-created_at']
+
+
+class NetWorthSnapshot(models.Model):
+    """Model for a user's net worth on a given day.
+    
+    Written in bulk once a day by the ``snapshot_net_worth`` task, which
+    ``run_worker`` queues, or by the management command of the same name.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='net_worth_snapshots')
+    date = models.DateField()
+    total_assets = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_liabilities = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    net_worth = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.user.email} {self.date} - {self.net_worth}"
+    
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_net_worth_snapshot'),
+        ]
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from expenses.models import Expense, ExpenseCategory, RecurringExpense
+from loans.models import Loan
+from investments.models import Investment
+from goals.models import SavingsGoal
+from credit.models import CreditHistory
+from .cache import bump_data_version
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+@receiver(post_save, sender=Investment)
+@receiver(post_delete, sender=Investment)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=SavingsGoal)
+@receiver(post_save, sender=CreditHistory)
+@receiver(post_delete, sender=CreditHistory)
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    """Bump the owner's data version once the write is committed."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+@receiver(post_save, sender=RecurringExpense)
+@receiver(post_delete, sender=RecurringExpense)
+def invalidate_occurrence_owner(sender, instance, **kwargs):
+    """Bump the version of the user whose recurring occurrence changed."""
+    user_id = instance.parent_expense.user_id
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+def category_user_ids(category_id):
+    """Ids of the users with expenses in a category (categories are shared by every user)."""
+    return list(Expense.objects.filter(category_id=category_id).values_list('user_id', flat=True).distinct())
+
+def bump_data_versions(user_ids):
+    """Bump the version of several users once the write is committed."""
+    def bump():
+        for user_id in user_ids:
+            bump_data_version(user_id)
+    
+    transaction.on_commit(bump)
+
+@receiver(post_save, sender=ExpenseCategory)
+def invalidate_category_users(sender, instance, created, **kwargs):
+    """A renamed category changes the breakdown of everyone who uses it."""
+    if not created:
+        bump_data_versions(category_user_ids(instance.pk))
+
+@receiver(pre_delete, sender=ExpenseCategory)
+def remember_category_users(sender, instance, **kwargs):
+    """Note who uses the category before its expenses are uncategorized."""
+    instance._dashboard_user_ids = category_user_ids(instance.pk)
+
+@receiver(post_delete, sender=ExpenseCategory)
+def invalidate_deleted_category_users(sender, instance, **kwargs):
+    """Bump their versions once the category is gone."""
+    bump_data_versions(getattr(instance, '_dashboard_user_ids', []))
@@ -0,0 +1,8 @@
+from django.utils.dateparse import parse_date
+from jobs.queue import daily_task
+from .utils import snapshot_active_users
+
+@daily_task
+def snapshot_net_worth(day):
+    """Store the day's net worth snapshot of every active user (rerunning it refreshes them)."""
+    snapshot_active_users(parse_date(day))
@@ -0,0 +1,151 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from expenses.models import Expense, ExpenseCategory, RecurringExpense
+from investments.models import Investment
+from jobs.models import Job
+from jobs.queue import enqueue_daily_tasks, claim_jobs, run_job
+from .models import NetWorthSnapshot
+from .utils import take_net_worth_snapshots, get_net_worth_history
+
+class DashboardCacheInvalidationTests(TestCase):
+    """Writes that change a cached dashboard API response must invalidate it."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='dashboard-cache@example.com', password='password')
+        self.client.force_login(self.user)
+        self.category = ExpenseCategory.objects.create(name='Rent')
+        
+        # A daily rule whose first occurrence is the first day of this month
+        self.month_start = timezone.now().date().replace(day=1)
+        self.expense = Expense.objects.create(
+            user=self.user, category=self.category, amount=Decimal('10.00'), description='Parking',
+            date=self.month_start - timedelta(days=1), recurrence='daily', recurrence_end_date=self.month_start
+        )
+        self.url = reverse('dashboard:api_expense_breakdown')
+    
+    def get_breakdown(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, **headers)
+    
+    def test_occurrence_edit_changes_breakdown(self):
+        response = self.get_breakdown()
+        self.assertEqual(response.json()['expense_breakdown'][0]['amount'], 10.0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            RecurringExpense.objects.create(
+                parent_expense=self.expense, amount=Decimal('25.00'), date=self.month_start,
+                occurrence_date=self.month_start, is_modified=True
+            )
+        
+        response = self.get_breakdown(response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['expense_breakdown'][0]['amount'], 25.0)
+    
+    def test_category_rename_changes_breakdown(self):
+        response = self.get_breakdown()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Housing'
+            self.category.save()
+        
+        response = self.get_breakdown(response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['expense_breakdown'][0]['category'], 'Housing')
+
+
+class VersionedApiTests(TestCase):
+    """Conditional GETs against the cached dashboard API endpoints."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='dashboard-api@example.com', password='password')
+        self.client.force_login(self.user)
+        self.category = ExpenseCategory.objects.create(name='Groceries')
+        self.urls = [reverse('dashboard:api_expense_breakdown'), reverse('dashboard:api_weekly_spending')]
+    
+    def add_expense(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(
+                user=self.user, category=self.category, amount=Decimal(amount), description='Market',
+                date=timezone.now().date()
+            )
+    
+    def test_same_etag_is_not_modified(self):
+        self.add_expense('20.00')
+        
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                
+                for _ in range(2):
+                    cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                    self.assertEqual(cached.status_code, 304)
+                    self.assertEqual(cached['ETag'], response['ETag'])
+                    self.assertEqual(cached.content, b'')
+    
+    def test_write_gives_new_etag(self):
+        self.add_expense('20.00')
+        responses = [self.client.get(url) for url in self.urls]
+        
+        self.add_expense('15.00')
+        
+        for url, response in zip(self.urls, responses):
+            with self.subTest(url=url):
+                fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(fresh.status_code, 200)
+                self.assertNotEqual(fresh['ETag'], response['ETag'])
+        
+        breakdown = self.client.get(self.urls[0]).json()['expense_breakdown']
+        self.assertEqual(breakdown[0]['amount'], 35.0)
+
+
+class NetWorthSnapshotTests(TestCase):
+    """Daily net worth snapshots and the monthly history built from them."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='net-worth@example.com', password='password')
+        self.investment = Investment.objects.create(
+            user=self.user, name='Index fund', purchase_price=Decimal('100.00'), quantity=Decimal('10')
+        )
+    
+    def snapshot(self, snapshot_date, net_worth):
+        NetWorthSnapshot.objects.create(user=self.user, date=snapshot_date, total_assets=net_worth, net_worth=net_worth)
+    
+    def test_snapshot_is_refreshed_on_the_same_day(self):
+        take_net_worth_snapshots([self.user.pk], date(2025, 3, 1))
+        self.investment.current_price = Decimal('120.00')
+        self.investment.save()
+        take_net_worth_snapshots([self.user.pk], date(2025, 3, 1))
+        
+        snapshots = list(NetWorthSnapshot.objects.filter(user=self.user).values_list('date', 'total_assets', 'net_worth'))
+        self.assertEqual(snapshots, [(date(2025, 3, 1), Decimal('1200.00'), Decimal('1200.00'))])
+    
+    def test_history_keeps_last_snapshot_of_each_month(self):
+        self.snapshot(date(2025, 1, 5), Decimal('100.00'))
+        self.snapshot(date(2025, 1, 31), Decimal('150.00'))
+        self.snapshot(date(2025, 2, 10), Decimal('200.00'))
+        self.snapshot(date(2025, 3, 2), Decimal('300.00'))
+        
+        history = get_net_worth_history(self.user, date(2025, 1, 1), date(2025, 2, 28))
+        self.assertEqual([(row['date'], row['net_worth']) for row in history], [
+            (date(2025, 1, 31), Decimal('150.00')),
+            (date(2025, 2, 10), Decimal('200.00')),
+        ])
+    
+    @override_settings(JOBS_EAGER=False)
+    def test_worker_queues_snapshot_once_a_day(self):
+        enqueue_daily_tasks(date(2025, 3, 1))
+        enqueue_daily_tasks(date(2025, 3, 1))
+        
+        job = Job.objects.get(task='dashboard.tasks.snapshot_net_worth')
+        self.assertEqual(job.payload, {'day': '2025-03-01'})
+        
+        self.assertTrue(run_job(claim_jobs('worker-1', 1)[0], 'worker-1'))
+        self.assertTrue(NetWorthSnapshot.objects.filter(user=self.user, date=date(2025, 3, 1)).exists())
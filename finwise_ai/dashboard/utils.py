@@ -0,0 +1,307 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Sum, Q, DecimalField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from datetime import timedelta
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from decimal import Decimal
+from accounts.models import UserProfile
+from expenses.models import Expense
+from expenses.utils import get_recurring_occurrences
+from loans.models import Loan
+from investments.models import Investment
+from investments.valuation import AMOUNT_FIELD, MARKET_VALUE, portfolio_valuation
+from credit.models import CreditHistory
+from .models import NetWorthSnapshot
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+def get_month_starts(today):
+    """Return the first day of the current and the previous month."""
+    current_month_start = today.replace(day=1)
+    last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+    return current_month_start, last_month_start
+
+def get_week_ranges(today, weeks=4):
+    """Return (label, start, end) for the last completed weeks, oldest first."""
+    week_ranges = []
+    
+    for i in range(weeks, 0, -1):
+        week_end = today - timedelta(days=today.weekday() + 1 + (7 * (i - 1)))
+        week_start = week_end - timedelta(days=6)
+        week_ranges.append((f'Week {weeks + 1 - i}', week_start, week_end))
+    
+    return week_ranges
+
+def get_week_dates(week_ranges):
+    """Map each weekly bucket to its first and last day."""
+    return {
+        f'week_{index}': (week_start, week_end)
+        for index, (label, week_start, week_end) in enumerate(week_ranges)
+    }
+
+def get_week_conditions(week_ranges):
+    """Build one filter condition per weekly bucket."""
+    return {
+        key: Q(date__gte=week_start, date__lte=week_end)
+        for key, (week_start, week_end) in get_week_dates(week_ranges).items()
+    }
+
+def add_recurring_totals(user, totals, bucket_dates):
+    """Add the user's recurring expense occurrences to bucket totals.
+    
+    Occurrences are not stored, so they are expanded over the buckets'
+    dates (first and last day of each, inclusive) and summed here.
+    """
+    since = min(start for start, end in bucket_dates.values())
+    until = max(end for start, end in bucket_dates.values())
+    
+    for occurrence in get_recurring_occurrences([user.pk], since, until):
+        for key, (start, end) in bucket_dates.items():
+            if start <= occurrence.date <= end:
+                totals[key] += occurrence.amount
+    
+    return totals
+
+def format_weekly_spending(week_ranges, totals):
+    """Turn weekly bucket totals into the rows used by the dashboard charts."""
+    return [{
+        'week': label,
+        'start_date': week_start.strftime('%m/%d'),
+        'end_date': week_end.strftime('%m/%d'),
+        'amount': totals[f'week_{index}']
+    } for index, (label, week_start, week_end) in enumerate(week_ranges)]
+
+def get_expense_summary(user, today):
+    """Get month totals and weekly buckets for a user in a single aggregate query, recurring occurrences included."""
+    current_month_start, last_month_start = get_month_starts(today)
+    week_ranges = get_week_ranges(today)
+    
+    bucket_dates = {
+        'current_month': (current_month_start, today),
+        'last_month': (last_month_start, current_month_start - timedelta(days=1)),
+    }
+    bucket_dates.update(get_week_dates(week_ranges))
+    
+    # One conditional SUM per bucket, all evaluated in the same table scan
+    totals = Expense.objects.filter(
+        user=user,
+        date__gte=min(last_month_start, week_ranges[0][1]),
+        date__lte=today
+    ).aggregate(**{
+        key: Coalesce(Sum('amount', filter=Q(date__gte=start, date__lte=end)), ZERO)
+        for key, (start, end) in bucket_dates.items()
+    })
+    add_recurring_totals(user, totals, bucket_dates)
+    
+    return {
+        'current_month_total': totals['current_month'],
+        'last_month_total': totals['last_month'],
+        'weekly_spending': format_weekly_spending(week_ranges, totals),
+    }
+
+def weekly_spending_query(user, week_ranges):
+    """Return the expenses covering the weekly buckets and the sums that total them."""
+    expenses = Expense.objects.filter(
+        user=user,
+        date__gte=week_ranges[0][1],
+        date__lte=week_ranges[-1][2]
+    )
+    sums = {
+        key: Coalesce(Sum('amount', filter=condition), ZERO)
+        for key, condition in get_week_conditions(week_ranges).items()
+    }
+    return expenses, sums
+
+def get_weekly_spending(user, today):
+    """Get spending for the last four completed weeks in a single aggregate query, recurring occurrences included."""
+    week_ranges = get_week_ranges(today)
+    expenses, sums = weekly_spending_query(user, week_ranges)
+    totals = add_recurring_totals(user, expenses.aggregate(**sums), get_week_dates(week_ranges))
+    return format_weekly_spending(week_ranges, totals)
+
+async def aget_weekly_spending(user, today):
+    """Async version of get_weekly_spending."""
+    week_ranges = get_week_ranges(today)
+    expenses, sums = weekly_spending_query(user, week_ranges)
+    totals = await sync_to_async(add_recurring_totals)(user, await expenses.aaggregate(**sums), get_week_dates(week_ranges))
+    return format_weekly_spending(week_ranges, totals)
+
+def expense_breakdown_query(user, start_date, end_date):
+    """Per-category spending between two dates, largest first."""
+    return (
+        Expense.objects
+        .filter(user=user, date__gte=start_date, date__lte=end_date)
+        .values('category_id', 'category__name')
+        .annotate(amount=Sum('amount'))
+        .order_by('-amount')
+    )
+
+def add_recurring_breakdown(user, rows, start_date, end_date):
+    """Add the user's recurring expense occurrences to per-category rows, largest first."""
+    rows = {row['category_id']: dict(row) for row in rows}
+    
+    for occurrence in get_recurring_occurrences([user.pk], start_date, end_date):
+        category = occurrence.parent_expense.category
+        row = rows.setdefault(category.pk if category else None, {
+            'category_id': category.pk if category else None,
+            'category__name': category.name if category else None,
+            'amount': Decimal('0'),
+        })
+        row['amount'] += occurrence.amount
+    
+    return sorted(rows.values(), key=lambda row: row['amount'], reverse=True)
+
+def format_expense_breakdown(rows, total=None):
+    """Turn per-category sums into the rows used by the dashboard charts."""
+    # Uncategorized spending counts towards the total but gets no slice of its own
+    if total is None:
+        total = sum((row['amount'] for row in rows), Decimal('0'))
+    
+    return [{
+        'category': row['category__name'],
+        'amount': row['amount'],
+        'percentage': (row['amount'] / total * 100) if total > 0 else 0
+    } for row in rows if row['category_id'] is not None and row['amount'] > 0]
+
+def get_expense_breakdown(user, start_date, end_date, total=None):
+    """Get per-category spending between two dates with one grouped query."""
+    rows = add_recurring_breakdown(user, expense_breakdown_query(user, start_date, end_date), start_date, end_date)
+    return format_expense_breakdown(rows, total)
+
+async def aget_expense_breakdown(user, start_date, end_date, total=None):
+    """Async version of get_expense_breakdown."""
+    rows = [row async for row in expense_breakdown_query(user, start_date, end_date)]
+    rows = await sync_to_async(add_recurring_breakdown)(user, rows, start_date, end_date)
+    return format_expense_breakdown(rows, total)
+
+def get_loan_balance(user):
+    """Get the outstanding balance of a user's active loans."""
+    return Loan.objects.filter(
+        user=user,
+        status='active'
+    ).aggregate(
+        total=Coalesce(Sum(Coalesce('remaining_balance', 'amount')), ZERO)
+    )['total']
+
+def get_investment_totals(user):
+    """Get the current value and cost basis of a user's active investments."""
+    valuation = portfolio_valuation(user)
+    return {'value': valuation['value'], 'cost': valuation['cost']}
+
+def get_dashboard_data(user, today=None):
+    """Collect every figure shown on the dashboard home page.
+    
+    The number of queries is fixed: it does not depend on how many
+    categories exist or how many expenses the user has recorded.
+    """
+    today = today or timezone.now().date()
+    current_month_start, last_month_start = get_month_starts(today)
+    
+    expense_summary = get_expense_summary(user, today)
+    expense_breakdown = get_expense_breakdown(
+        user,
+        current_month_start,
+        today,
+        total=expense_summary['current_month_total']
+    )
+    
+    monthly_income = UserProfile.objects.filter(user=user).values_list('monthly_income', flat=True).first() or 0
+    
+    investment_totals = get_investment_totals(user)
+    
+    credit_score = CreditHistory.objects.filter(user=user).order_by('-date').values_list('score', flat=True).first()
+    
+    return {
+        'current_month_total': expense_summary['current_month_total'],
+        'last_month_total': expense_summary['last_month_total'],
+        'weekly_spending': expense_summary['weekly_spending'],
+        'expense_breakdown': expense_breakdown,
+        'monthly_income': monthly_income,
+        'total_loan_balance': get_loan_balance(user),
+        'total_investment_value': investment_totals['value'],
+        'total_investment_cost': investment_totals['cost'],
+        'credit_score': credit_score,
+    }
+
+def get_net_worth_totals(user_ids):
+    """Get assets and liabilities for many users with one grouped query per table."""
+    totals = {user_id: {'assets': Decimal('0'), 'liabilities': Decimal('0')} for user_id in user_ids}
+    
+    investment_rows = Investment.objects.filter(
+        user_id__in=user_ids,
+        status='active',
+        is_simulation=False
+    ).values('user_id').annotate(
+        value=Sum(MARKET_VALUE, output_field=AMOUNT_FIELD)
+    ).order_by()
+    
+    for row in investment_rows:
+        totals[row['user_id']]['assets'] = row['value'] or Decimal('0')
+    
+    loan_rows = Loan.objects.filter(
+        user_id__in=user_ids,
+        status='active'
+    ).values('user_id').annotate(
+        balance=Sum(Coalesce('remaining_balance', 'amount'))
+    ).order_by()
+    
+    for row in loan_rows:
+        totals[row['user_id']]['liabilities'] = row['balance'] or Decimal('0')
+    
+    return totals
+
+def take_net_worth_snapshots(user_ids, snapshot_date):
+    """Store (or refresh) the net worth snapshot of many users for one day."""
+    cents = Decimal('0.01')
+    snapshots = []
+    
+    for user_id, totals in get_net_worth_totals(user_ids).items():
+        assets = Decimal(totals['assets']).quantize(cents)
+        liabilities = Decimal(totals['liabilities']).quantize(cents)
+        snapshots.append(NetWorthSnapshot(
+            user_id=user_id,
+            date=snapshot_date,
+            total_assets=assets,
+            total_liabilities=liabilities,
+            net_worth=assets - liabilities
+        ))
+    
+    NetWorthSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['total_assets', 'total_liabilities', 'net_worth']
+    )
+    
+    return len(snapshots)
+
+def snapshot_active_users(snapshot_date, batch_size=1000, progress=None):
+    """Snapshot every active user a batch at a time; returns the number of snapshots stored.
+    
+    ``progress``, if given, is called with (users done, users in total) after each batch.
+    """
+    user_ids = list(get_user_model().objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+    done = 0
+    
+    for start in range(0, len(user_ids), batch_size):
+        done += take_net_worth_snapshots(user_ids[start:start + batch_size], snapshot_date)
+        if progress:
+            progress(done, len(user_ids))
+    
+    return done
+
+def get_net_worth_history(user, start_date, end_date):
+    """Get the last stored snapshot of each month between two dates, oldest first."""
+    snapshots = NetWorthSnapshot.objects.filter(
+        user=user,
+        date__gte=start_date,
+        date__lte=end_date
+    ).values('date', 'total_assets', 'total_liabilities', 'net_worth').order_by('date')
+    
+    monthly = OrderedDict()
+    for snapshot in snapshots:
+        monthly[(snapshot['date'].year, snapshot['date'].month)] = snapshot
+    
+    return list(monthly.values())
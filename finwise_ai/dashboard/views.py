@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
@@ -11,34 +12,19 @@ from accounts.models import UserProfile
 from expenses.models import Expense, ExpenseCategory
 from loans.models import Loan
 from goals.models import SavingsGoal
-from investments.models import Investment
 from credit.models import CreditHistory
+from expenses.utils import rollup_queryset
+from .cache import versioned_api
+from .utils import get_dashboard_data, aget_expense_breakdown, aget_weekly_spending, get_investment_totals, get_loan_balance, get_net_worth_history, get_net_worth_totals
 
 @login_required
 def dashboard_home(request):
     """Main dashboard view showing overview of all financial data."""
-    # Get current date and date ranges
-    today = timezone.now().date()
-    current_month_start = today.replace(day=1)
-    last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+    # Get every figure for this page from a fixed set of grouped aggregates
+    data = get_dashboard_data(request.user)
     
-    # Get user's expenses for current month
-    current_month_expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=current_month_start,
-        date__lte=today
-    )
-    
-    # Get user's expenses for last month
-    last_month_expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=last_month_start,
-        date__lt=current_month_start
-    )
-    
-    # Calculate total expenses for current and last month
-    current_month_total = sum(expense.amount for expense in current_month_expenses)
-    last_month_total = sum(expense.amount for expense in last_month_expenses)
+    current_month_total = data['current_month_total']
+    last_month_total = data['last_month_total']
     
     # Calculate month-over-month change
     if last_month_total > 0:
@@ -46,32 +32,11 @@ def dashboard_home(request):
     else:
         mom_change = 0
     
-    # Get expense breakdown by category for current month
-    categories = ExpenseCategory.objects.all()
-    expense_breakdown = []
-    
-    for category in categories:
-        category_expenses = current_month_expenses.filter(category=category)
-        category_total = sum(expense.amount for expense in category_expenses)
-        
-        if category_total > 0:
-            expense_breakdown.append({
-                'category': category.name,
-                'amount': category_total,
-                'percentage': (category_total / current_month_total * 100) if current_month_total > 0 else 0
-            })
-    
-    # Sort expense breakdown by amount (descending)
-    expense_breakdown = sorted(expense_breakdown, key=lambda x: x['amount'], reverse=True)
-    
-    # Get user's income
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-        monthly_income = user_profile.monthly_income
-    except UserProfile.DoesNotExist:
-        monthly_income = 0
+    # Expense breakdown by category for current month, sorted by amount (descending)
+    expense_breakdown = data['expense_breakdown']
     
     # Calculate savings rate
+    monthly_income = data['monthly_income']
     if monthly_income and monthly_income > 0:
         savings_rate = ((monthly_income - current_month_total) / monthly_income) * 100
     else:
@@ -83,8 +48,6 @@ def dashboard_home(request):
         status='active'
     )
     
-    total_loan_balance = sum(loan.remaining_balance or loan.amount for loan in active_loans)
-    
     # Get savings goals
     savings_goals = SavingsGoal.objects.filter(
         user=request.user,
@@ -93,50 +56,17 @@ def dashboard_home(request):
     
     # Progress percentage is calculated automatically via property
     
-    # Get investment portfolio
-    investments = Investment.objects.filter(
-        user=request.user,
-        status='active',
-        is_simulation=False
-    )
-    
-    total_investment_value = sum(inv.current_value for inv in investments)
-    total_investment_cost = sum(inv.purchase_price * inv.quantity for inv in investments)
-    
     # Calculate investment return
+    total_investment_value = data['total_investment_value']
+    total_investment_cost = data['total_investment_cost']
+    
     if total_investment_cost > 0:
         investment_return = ((total_investment_value - total_investment_cost) / total_investment_cost) * 100
     else:
         investment_return = 0
     
-    # Get latest credit score
-    latest_credit = CreditHistory.objects.filter(
-        user=request.user
-    ).order_by('-date').first()
-    
-    credit_score = latest_credit.score if latest_credit else None
-    
-    # Get weekly spending trend (last 4 weeks)
-    weekly_spending = []
-    
-    for i in range(4, 0, -1):
-        week_end = today - timedelta(days=today.weekday() + 1 + (7 * (i - 1)))
-        week_start = week_end - timedelta(days=6)
-        
-        week_expenses = Expense.objects.filter(
-            user=request.user,
-            date__gte=week_start,
-            date__lte=week_end
-        )
-        
-        week_total = sum(expense.amount for expense in week_expenses)
-        
-        weekly_spending.append({
-            'week': f'Week {5-i}',
-            'start_date': week_start.strftime('%m/%d'),
-            'end_date': week_end.strftime('%m/%d'),
-            'amount': week_total
-        })
+    # Weekly spending trend (last 4 weeks)
+    weekly_spending = data['weekly_spending']
     
     # Prepare context for template
     context = {
@@ -147,11 +77,11 @@ def dashboard_home(request):
         'monthly_income': monthly_income,
         'savings_rate': savings_rate,
         'active_loans': active_loans,
-        'total_loan_balance': total_loan_balance,
+        'total_loan_balance': data['total_loan_balance'],
         'savings_goals': savings_goals,
         'total_investment_value': total_investment_value,
         'investment_return': investment_return,
-        'credit_score': credit_score,
+        'credit_score': data['credit_score'],
         'weekly_spending': weekly_spending,
         'expense_breakdown_json': json.dumps([{
             'category': item['category'],
@@ -176,13 +106,14 @@ def financial_summary(request):
         user_profile = None
     
     # Calculate net worth
-    assets = calculate_total_assets(request.user)
-    liabilities = calculate_total_liabilities(request.user)
+    totals = get_net_worth_totals([request.user.pk])[request.user.pk]
+    assets = totals['assets']
+    liabilities = totals['liabilities']
     net_worth = assets - liabilities
     
     # Calculate debt-to-income ratio
     monthly_debt_payments = calculate_monthly_debt_payments(request.user)
-    monthly_income = user_profile.monthly_income if user_profile else 0
+    monthly_income = (user_profile.monthly_income if user_profile else None) or 0
     
     if monthly_income > 0:
         debt_to_income = (monthly_debt_payments / monthly_income) * 100
@@ -191,7 +122,7 @@ def financial_summary(request):
     
     # Calculate emergency fund coverage
     monthly_expenses = calculate_average_monthly_expenses(request.user)
-    emergency_fund = user_profile.emergency_fund if user_profile else 0
+    emergency_fund = 0  # Not tracked on the profile yet
     
     if monthly_expenses > 0:
         emergency_fund_months = emergency_fund / monthly_expenses
@@ -235,29 +166,27 @@ def expense_trends(request):
     if start_date.month > today.month:
         start_date = start_date.replace(year=today.year - 1)
     
-    # Get expenses in date range
-    expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=start_date,
-        date__lte=end_date
-    )
-    
-    # Group expenses by month and category
+    # Group monthly rollups by month and category
     monthly_expenses = {}
     categories = ExpenseCategory.objects.all()
     
-    for expense in expenses:
-        month_key = expense.date.strftime('%Y-%m')
+    rollups = rollup_queryset(request.user, start_date, end_date).values(
+        'year', 'month', 'category__name'
+    ).annotate(amount=Sum('total_amount')).order_by('year', 'month')
+    
+    for row in rollups:
+        month_key = (row['year'], row['month'])
         
         if month_key not in monthly_expenses:
             monthly_expenses[month_key] = {
-                'month': expense.date.strftime('%b %Y'),
+                'month': datetime(row['year'], row['month'], 1).strftime('%b %Y'),
                 'total': 0,
                 'categories': {category.name: 0 for category in categories}
             }
         
-        monthly_expenses[month_key]['total'] += expense.amount
-        monthly_expenses[month_key]['categories'][expense.category.name] += expense.amount
+        monthly_expenses[month_key]['total'] += row['amount']
+        if row['category__name'] is not None:
+            monthly_expenses[month_key]['categories'][row['category__name']] += row['amount']
     
     # Convert to list and sort by month
     monthly_data = list(monthly_expenses.values())
@@ -308,13 +237,6 @@ def income_vs_expenses(request):
     user_profile = UserProfile.objects.get(user=request.user)
     monthly_income = user_profile.monthly_income
     
-    # Get expenses in date range
-    expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=start_date,
-        date__lte=end_date
-    )
-    
     # Group expenses by month
     monthly_data = {}
     
@@ -337,12 +259,16 @@ def income_vs_expenses(request):
         else:
             current_date = current_date.replace(month=current_date.month + 1)
     
-    # Add expenses to monthly data
-    for expense in expenses:
-        month_key = expense.date.strftime('%Y-%m')
+    # Add monthly expense totals from the rollups
+    rollups = rollup_queryset(request.user, start_date, end_date).values(
+        'year', 'month'
+    ).annotate(amount=Sum('total_amount'))
+    
+    for row in rollups:
+        month_key = f"{row['year']}-{row['month']:02d}"
         
         if month_key in monthly_data:
-            monthly_data[month_key]['expenses'] += expense.amount
+            monthly_data[month_key]['expenses'] += row['amount']
             monthly_data[month_key]['savings'] = monthly_data[month_key]['income'] - monthly_data[month_key]['expenses']
     
     # Convert to list and sort by month
@@ -378,39 +304,23 @@ def income_vs_expenses(request):
 def net_worth_tracker(request):
     """View for tracking net worth over time."""
     # Calculate current net worth
-    assets = calculate_total_assets(request.user)
-    liabilities = calculate_total_liabilities(request.user)
+    assets = get_investment_totals(request.user)['value']
+    liabilities = get_loan_balance(request.user)
     net_worth = assets - liabilities
     
-    # Get historical net worth data (if available)
-    # In a real app, this would come from a NetWorthHistory model
-    # For this demo, we'll generate some sample data
-    
-    # Generate monthly data for the last 12 months
+    # Get stored history for the last 12 months (one point per month)
     today = timezone.now().date()
+    start_date = today.replace(day=1, year=today.year - 1)
     
-    net_worth_history = []
-    current_net_worth = net_worth
-    
-    for i in range(12, 0, -1):
-        month_date = today.replace(day=1)
-        if month_date.month <= i:
-            month_date = month_date.replace(year=month_date.year - 1, month=12 - (i - month_date.month))
-        else:
-            month_date = month_date.replace(month=month_date.month - i)
-        
-        # Simulate some random fluctuation in past net worth
-        random_factor = 1 + (np.random.random() * 0.05 - 0.025)  # +/- 2.5%
-        historical_net_worth = current_net_worth * random_factor * (0.97 ** i)  # Assume 3% monthly growth
-        
-        net_worth_history.append({
-            'date': month_date,
-            'assets': historical_net_worth * 0.7,  # Assume 70% assets, 30% liabilities
-            'liabilities': historical_net_worth * 0.3 * -1,  # Negative for liabilities
-            'net_worth': historical_net_worth
-        })
+    net_worth_history = [{
+        'date': snapshot['date'].replace(day=1),
+        'assets': snapshot['total_assets'],
+        'liabilities': snapshot['total_liabilities'] * -1,  # Negative for liabilities
+        'net_worth': snapshot['net_worth']
+    } for snapshot in get_net_worth_history(request.user, start_date, today)]
     
-    # Add current month
+    # The current month always shows live figures
+    net_worth_history = [item for item in net_worth_history if item['date'] != today.replace(day=1)]
     net_worth_history.append({
         'date': today.replace(day=1),
         'assets': assets,
@@ -518,19 +428,20 @@ def budget_performance(request):
     total_budget = monthly_income * 0.5
     budget_per_category = total_budget / len(categories)
     
-    # Get expenses for current month
-    current_month_expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=current_month_start,
-        date__lte=current_month_end
+    # Get current month totals per category from the rollups
+    category_totals = dict(
+        rollup_queryset(request.user, current_month_start, current_month_end)
+        .filter(category__isnull=False)
+        .values('category_id')
+        .annotate(amount=Sum('total_amount'))
+        .values_list('category_id', 'amount')
     )
     
     # Calculate budget performance
     budget_performance = []
     
     for category in categories:
-        category_expenses = current_month_expenses.filter(category=category)
-        category_total = sum(expense.amount for expense in category_expenses)
+        category_total = category_totals.get(category.id, 0)
         
         budget_performance.append({
             'category': category.name,
@@ -559,124 +470,57 @@ def budget_performance(request):
     return render(request, 'dashboard/budget_performance.html', context)
 
 @login_required
-def dashboard_api_expense_breakdown(request):
+@versioned_api('expense-breakdown')
+async def dashboard_api_expense_breakdown(request):
     """API endpoint for expense breakdown data."""
+    user = await request.auser()
+    
     # Get current month
     today = timezone.now().date()
     current_month_start = today.replace(day=1)
     
-    # Get user's expenses for current month
-    current_month_expenses = Expense.objects.filter(
-        user=request.user,
-        date__gte=current_month_start,
-        date__lte=today
-    )
-    
-    # Calculate total expenses
-    current_month_total = sum(expense.amount for expense in current_month_expenses)
-    
-    # Get expense breakdown by category
-    categories = ExpenseCategory.objects.all()
-    expense_breakdown = []
-    
-    for category in categories:
-        category_expenses = current_month_expenses.filter(category=category)
-        category_total = sum(expense.amount for expense in category_expenses)
-        
-        if category_total > 0:
-            expense_breakdown.append({
-                'category': category.name,
-                'amount': float(category_total),
-                'percentage': float((category_total / current_month_total * 100) if current_month_total > 0 else 0)
-            })
-    
-    # Sort by amount (descending)
-    expense_breakdown = sorted(expense_breakdown, key=lambda x: x['amount'], reverse=True)
+    # Get expense breakdown by category, sorted by amount (descending)
+    expense_breakdown = [{
+        'category': item['category'],
+        'amount': float(item['amount']),
+        'percentage': float(item['percentage'])
+    } for item in await aget_expense_breakdown(user, current_month_start, today)]
     
     return JsonResponse({'expense_breakdown': expense_breakdown})
 
 @login_required
-def dashboard_api_weekly_spending(request):
+@versioned_api('weekly-spending')
+async def dashboard_api_weekly_spending(request):
     """API endpoint for weekly spending trend data."""
+    user = await request.auser()
+    
     # Get current date
     today = timezone.now().date()
     
     # Get weekly spending trend (last 4 weeks)
-    weekly_spending = []
+    weekly_spending = await aget_weekly_spending(user, today)
     
-    for i in range(4, 0, -1):
-        week_end = today - timedelta(days=today.weekday() + 1 + (7 * (i - 1)))
-        week_start = week_end - timedelta(days=6)
-        
-        week_expenses = Expense.objects.filter(
-            user=request.user,
-            date__gte=week_start,
-            date__lte=week_end
-        )
-        
-        week_total = sum(expense.amount for expense in week_expenses)
-        
-        weekly_spending.append({
-            'week': f'Week {5-i}',
-            'start_date': week_start.strftime('%m/%d'),
-            'end_date': week_end.strftime('%m/%d'),
-            'amount': float(week_total)
-        })
+    for item in weekly_spending:
+        item['amount'] = float(item['amount'])
     
     return JsonResponse({'weekly_spending': weekly_spending})
 
 # Helper functions
 
 def calculate_total_assets(user):
-    """Calculate total assets for a user."""
-    # Get user profile
-    user_profile = UserProfile.objects.get(user=user)
-    
-    # Cash assets
-    cash_assets = user_profile.cash_balance + user_profile.emergency_fund
-    
-    # Investment assets
-    investments = Investment.objects.filter(
-        user=user,
-        status='active',
-        is_simulation=False
-    )
-    investment_assets = sum(inv.current_value for inv in investments)
-    
-    # Other assets (property, vehicles, etc.)
-    other_assets = user_profile.other_assets_value
-    
-    return cash_assets + investment_assets + other_assets
+    """Calculate total assets for a user: active investments at market value (the profile holds no cash or other assets)."""
+    return get_net_worth_totals([user.pk])[user.pk]['assets']
 
 def calculate_total_liabilities(user):
-    """Calculate total liabilities for a user."""
-    # Get loans
-    loans = Loan.objects.filter(
-        user=user,
-        status='active'
-    )
-    loan_liabilities = sum(loan.remaining_balance for loan in loans)
-    
-    # Get user profile for other liabilities
-    user_profile = UserProfile.objects.get(user=user)
-    other_liabilities = user_profile.other_liabilities_value
-    
-    return loan_liabilities + other_liabilities
+    """Calculate total liabilities for a user: the outstanding balance of active loans."""
+    return get_net_worth_totals([user.pk])[user.pk]['liabilities']
 
 def calculate_monthly_debt_payments(user):
     """Calculate total monthly debt payments for a user."""
-    # Get loans
-    loans = Loan.objects.filter(
+    return Loan.objects.filter(
         user=user,
         status='active'
-    )
-    loan_payments = sum(loan.monthly_payment for loan in loans)
-    
-    # Get user profile for other debt payments
-    user_profile = UserProfile.objects.get(user=user)
-    other_debt_payments = user_profile.other_monthly_debt_payments
-    
-    return loan_payments + other_debt_payments
+    ).aggregate(total=Sum('monthly_payment'))['total'] or 0
 
 def calculate_average_monthly_expenses(user):
     """Calculate average monthly expenses for a user (last 3 months)."""
@@ -700,7 +544,7 @@ def calculate_savings_rate(user):
     """Calculate savings rate for a user (last 3 months)."""
     # Get user profile
     user_profile = UserProfile.objects.get(user=user)
-    monthly_income = user_profile.monthly_income
+    monthly_income = user_profile.monthly_income or 0
     
     # Get current date
     today = timezone.now().date()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ExpenseCategory, Expense, RecurringExpense, AnomalyDetection
+from .models import ExpenseCategory, Expense, RecurringExpense, AnomalyDetection, ExpenseMonthlyRollup, ExpenseCategoryStats
 
 
 @admin.register(ExpenseCategory)
@@ -13,6 +13,7 @@ class ExpenseCategoryAdmin(admin.ModelAdmin):
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
     list_display = ['description', 'user', 'category', 'amount', 'date', 'recurrence', 'is_flagged']
+    list_select_related = ['user', 'category']
     list_filter = ['category', 'recurrence', 'is_flagged', 'date']
     search_fields = ['description', 'user__email', 'notes']
     list_editable = ['is_flagged']
@@ -37,7 +38,7 @@ class ExpenseAdmin(admin.ModelAdmin):
 
 @admin.register(RecurringExpense)
 class RecurringExpenseAdmin(admin.ModelAdmin):
-    list_display = ['parent_expense', 'amount', 'date', 'is_paid', 'is_modified']
+    list_display = ['parent_expense', 'amount', 'date', 'occurrence_date', 'is_paid', 'is_modified']
     list_filter = ['is_paid', 'is_modified', 'date']
     search_fields = ['parent_expense__description']
     list_editable = ['is_paid', 'is_modified']
@@ -48,6 +49,7 @@ class RecurringExpenseAdmin(admin.ModelAdmin):
 @admin.register(AnomalyDetection)
 class AnomalyDetectionAdmin(admin.ModelAdmin):
     list_display = ['user', 'expense', 'anomaly_type', 'confidence_score', 'is_reviewed', 'is_false_positive']
+    list_select_related = ['user', 'expense']
     list_filter = ['anomaly_type', 'is_reviewed', 'is_false_positive', 'created_at']
     search_fields = ['user__email', 'expense__description', 'description']
     list_editable = ['is_reviewed', 'is_false_positive']
@@ -61,4 +63,22 @@ class AnomalyDetectionAdmin(admin.ModelAdmin):
         ('Review', {
             'fields': ('is_reviewed', 'is_false_positive', 'description'),
         }),
-    ) 
\ No newline at end of file
+    ) 
+
+@admin.register(ExpenseMonthlyRollup)
+class ExpenseMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'year', 'month', 'category', 'total_amount', 'expense_count', 'min_amount', 'max_amount']
+    list_select_related = ['user', 'category']
+    list_filter = ['year', 'month', 'category']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['updated_at']
+
+@admin.register(ExpenseCategoryStats)
+class ExpenseCategoryStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'category', 'count', 'mean', 'm2', 'updated_at']
+    list_select_related = ['user', 'category']
+    list_filter = ['category']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['updated_at']
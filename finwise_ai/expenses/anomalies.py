@@ -0,0 +1,301 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Greatest
+from datetime import timedelta
+from .models import Expense, ExpenseCategoryStats, AnomalyDetection
+import pandas as pd
+import numpy as np
+
+# Other expenses a category needs before an amount can be called unusual
+MIN_HISTORY = 5
+
+# Standard deviations above the category mean that make an expense a spike
+SPIKE_THRESHOLD = 2.0
+
+# Robust z-score (0.6745 * deviation / MAD) above which an expense is an outlier
+OUTLIER_THRESHOLD = 3.5
+
+# The same amount and description charged again within this many days is a duplicate
+DUPLICATE_WINDOW_DAYS = 3
+
+# Description of each kind of anomaly, filled in with the reference value and the amount
+DESCRIPTIONS = {
+    'spike': "This expense is significantly higher than your usual spending in this category. Average: {reference:.2f}, This expense: {amount:.2f}",
+    'outlier': "This expense is far above the typical amount in this category. Median: {reference:.2f}, This expense: {amount:.2f}",
+    'duplicate': "This looks like a duplicate charge: the same amount and description were charged on {reference}.",
+}
+
+def add_to_stats(user_id, category_id, amount):
+    """Count one expense in its category statistics (Welford update), creating the row if needed."""
+    value = Value(float(amount), output_field=FloatField())
+    count = Cast('count', FloatField())
+    
+    # Every F() refers to the old values, so M2 uses (x - mean)^2 * n / (n + 1)
+    updated = ExpenseCategoryStats.objects.filter(user_id=user_id, category_id=category_id).update(
+        count=F('count') + 1,
+        mean=F('mean') + (value - F('mean')) / (count + 1),
+        m2=F('m2') + (value - F('mean')) * (value - F('mean')) * count / (count + 1)
+    )
+    
+    if not updated:
+        try:
+            with transaction.atomic():
+                ExpenseCategoryStats.objects.create(user_id=user_id, category_id=category_id, count=1, mean=float(amount), m2=0)
+        except IntegrityError:
+            # Another request created the row first
+            add_to_stats(user_id, category_id, amount)
+
+def remove_from_stats(user_id, category_id, amount):
+    """Take one expense out of its category statistics (reverse Welford update)."""
+    value = Value(float(amount), output_field=FloatField())
+    count = Cast('count', FloatField())
+    stats = ExpenseCategoryStats.objects.filter(user_id=user_id, category_id=category_id)
+    
+    # M2 loses (x - mean)^2 * n / (n - 1); rounding may not take it below zero
+    updated = stats.filter(count__gt=1).update(
+        count=F('count') - 1,
+        mean=(F('mean') * count - value) / (count - 1),
+        m2=Greatest(F('m2') - (value - F('mean')) * (value - F('mean')) * count / (count - 1), Value(0.0))
+    )
+    
+    if not updated:
+        stats.delete()
+
+def merge_stats(user_id, category_id, count, mean, m2):
+    """Fold the moments of another group of expenses into a category's statistics (parallel Welford)."""
+    other_count = Value(float(count), output_field=FloatField())
+    other_mean = Value(float(mean), output_field=FloatField())
+    total = Cast('count', FloatField()) + other_count
+    delta = other_mean - F('mean')
+    
+    # Every F() refers to the old values: M2 gains the other M2 and delta^2 * n_a * n_b / n
+    updated = ExpenseCategoryStats.objects.filter(user_id=user_id, category_id=category_id).update(
+        count=F('count') + count,
+        mean=F('mean') + delta * other_count / total,
+        m2=F('m2') + Value(float(m2), output_field=FloatField()) + delta * delta * Cast('count', FloatField()) * other_count / total
+    )
+    
+    if not updated:
+        try:
+            with transaction.atomic():
+                ExpenseCategoryStats.objects.create(user_id=user_id, category_id=category_id, count=count, mean=mean, m2=m2)
+        except IntegrityError:
+            # Another request created the row first
+            merge_stats(user_id, category_id, count, mean, m2)
+
+def merge_category_stats(category_id):
+    """Move a category's statistics into the uncategorized ones, as its expenses are about to be."""
+    rows = ExpenseCategoryStats.objects.filter(category_id=category_id).values_list('user_id', 'count', 'mean', 'm2')
+    
+    for user_id, count, mean, m2 in rows:
+        merge_stats(user_id, None, count, mean, m2)
+
+def score_expense(expense):
+    """Check a newly saved expense for anomalies and flag it if any are found.
+    
+    Costs two indexed queries however long the user's history is: the
+    spike check reads the category statistics (which already include the
+    expense, so it is left out again) and the duplicate check looks for
+    the same charge a few days either side.
+    
+    Returns the created anomalies.
+    """
+    amount = float(expense.amount)
+    anomalies = []
+    
+    stats = ExpenseCategoryStats.objects.filter(user_id=expense.user_id, category_id=expense.category_id).first()
+    if stats:
+        count, mean, std = stats.without(amount)
+        if count >= MIN_HISTORY and std > 0 and amount > mean + SPIKE_THRESHOLD * std:
+            anomalies.append(build_anomaly(expense.user_id, expense.pk, 'spike', (amount - mean) / (3 * std), mean, amount))
+    
+    window = timedelta(days=DUPLICATE_WINDOW_DAYS)
+    duplicate_date = Expense.objects.filter(
+        user_id=expense.user_id,
+        date__gte=expense.date - window,
+        date__lte=expense.date + window,
+        amount=expense.amount,
+        description__iexact=expense.description
+    ).exclude(pk=expense.pk).order_by('-date').values_list('date', flat=True).first()
+    
+    if duplicate_date:
+        days = abs((expense.date - duplicate_date).days)
+        anomalies.append(build_anomaly(expense.user_id, expense.pk, 'duplicate', duplicate_confidence(days), duplicate_date, amount))
+    
+    if anomalies:
+        AnomalyDetection.objects.bulk_create(anomalies)
+        Expense.objects.filter(pk=expense.pk).update(is_flagged=True)
+        expense.is_flagged = True
+    
+    return anomalies
+
+def load_expenses(user_ids):
+    """Load the expenses of some users into a DataFrame for the batch detectors."""
+    rows = Expense.objects.filter(user_id__in=user_ids).order_by().values_list(
+        'id', 'user_id', 'category_id', 'amount', 'description', 'date'
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['id', 'user_id', 'category_id', 'amount', 'description', 'date'])
+    
+    frame['amount'] = frame['amount'].astype(float)
+    frame['date'] = pd.to_datetime(frame['date'])
+    
+    # Uncategorized expenses are grouped together, as they are in the statistics
+    frame['category_key'] = frame['category_id'].fillna(-1).astype(int)
+    return frame
+
+def category_moments(frame):
+    """Per-expense count, mean and M2 of all the expenses in its user's category."""
+    groups = frame.groupby(['user_id', 'category_key'])['amount']
+    count = groups.transform('size')
+    mean = groups.transform('mean')
+    m2 = ((frame['amount'] - mean) ** 2).groupby([frame['user_id'], frame['category_key']]).transform('sum')
+    return count, mean, m2
+
+def find_spikes(frame):
+    """Expenses more than SPIKE_THRESHOLD standard deviations above the rest of their category."""
+    amount = frame['amount']
+    count, mean, m2 = category_moments(frame)
+    
+    # Leave each expense out of its own reference, exactly as score_expense does
+    others = count - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        other_mean = (count * mean - amount) / others
+        other_std = np.sqrt(((m2 - (amount - mean) * (amount - other_mean)) / others).clip(lower=0))
+    
+    found = (others >= MIN_HISTORY) & (other_std > 0) & (amount > other_mean + SPIKE_THRESHOLD * other_std)
+    return anomaly_frame(frame[found], 'spike', (amount - other_mean)[found] / (3 * other_std[found]), other_mean[found])
+
+def find_outliers(frame):
+    """Expenses far above their category median, scaled by the median absolute deviation.
+    
+    Unlike the mean and standard deviation, neither is pulled up by the
+    outliers themselves, so a few huge charges cannot hide each other.
+    """
+    amount = frame['amount']
+    keys = [frame['user_id'], frame['category_key']]
+    groups = amount.groupby(keys)
+    median = groups.transform('median')
+    mad = (amount - median).abs().groupby(keys).transform('median')
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        robust_score = 0.6745 * (amount - median) / mad
+    
+    found = (groups.transform('size') > MIN_HISTORY) & (mad > 0) & (robust_score > OUTLIER_THRESHOLD)
+    return anomaly_frame(frame[found], 'outlier', robust_score[found] / (2 * OUTLIER_THRESHOLD), median[found])
+
+def find_duplicates(frame):
+    """Expenses repeating the amount and description of an earlier one within DUPLICATE_WINDOW_DAYS."""
+    ordered = frame.assign(description_key=frame['description'].str.lower()).sort_values(
+        ['user_id', 'amount', 'description_key', 'date', 'id']
+    )
+    previous_date = ordered.groupby(['user_id', 'amount', 'description_key'])['date'].shift()
+    days = (ordered['date'] - previous_date).dt.days
+    
+    found = days <= DUPLICATE_WINDOW_DAYS
+    return anomaly_frame(
+        ordered[found],
+        'duplicate',
+        duplicate_confidence(days[found]),
+        previous_date[found].dt.date
+    )
+
+def duplicate_confidence(days):
+    """Same-day repeats are almost certainly duplicates, less so as the gap grows."""
+    return 1 - days / (DUPLICATE_WINDOW_DAYS + 1)
+
+def anomaly_frame(rows, anomaly_type, confidence, reference):
+    """Collect what the detectors found in one frame with a common layout."""
+    return pd.DataFrame({
+        'expense_id': rows['id'],
+        'user_id': rows['user_id'],
+        'anomaly_type': anomaly_type,
+        'confidence': confidence.clip(upper=1.0),
+        'reference': reference,
+        'amount': rows['amount'],
+    })
+
+def find_anomalies(frame):
+    """Run every batch detector over a frame of expenses."""
+    return pd.concat([find_spikes(frame), find_outliers(frame), find_duplicates(frame)], ignore_index=True)
+
+def build_anomaly(user_id, expense_id, anomaly_type, confidence, reference, amount):
+    """Build an unsaved anomaly record with the description for its type."""
+    return AnomalyDetection(
+        user_id=user_id,
+        expense_id=expense_id,
+        anomaly_type=anomaly_type,
+        confidence_score=min(1.0, float(confidence)),
+        description=DESCRIPTIONS[anomaly_type].format(reference=reference, amount=amount)
+    )
+
+def save_anomalies(user_ids, found, batch_size=1000):
+    """Store the anomalies found for some users and flag their expenses.
+    
+    An expense is never reported twice for the same kind of anomaly, so
+    reviewed anomalies and false positives are not brought back.
+    
+    Returns the number of anomalies created.
+    """
+    existing = set(AnomalyDetection.objects.filter(user_id__in=user_ids).values_list('expense_id', 'anomaly_type'))
+    anomalies = [
+        build_anomaly(int(row.user_id), int(row.expense_id), row.anomaly_type, row.confidence, row.reference, row.amount)
+        for row in found.itertuples(index=False)
+        if (row.expense_id, row.anomaly_type) not in existing
+    ]
+    flagged_ids = sorted({anomaly.expense_id for anomaly in anomalies})
+    
+    with transaction.atomic():
+        AnomalyDetection.objects.bulk_create(anomalies, batch_size=batch_size)
+        for start in range(0, len(flagged_ids), batch_size):
+            Expense.objects.filter(pk__in=flagged_ids[start:start + batch_size], is_flagged=False).update(is_flagged=True)
+    
+    return len(anomalies)
+
+def rebuild_stats(user_ids, frame=None, batch_size=1000):
+    """Rebuild the category statistics of some users from their expenses.
+    
+    Returns the number of statistics rows written.
+    """
+    user_ids = list(user_ids)
+    if frame is None:
+        frame = load_expenses(user_ids)
+    
+    count, mean, m2 = category_moments(frame)
+    moments = pd.DataFrame({
+        'user_id': frame['user_id'],
+        'category_key': frame['category_key'],
+        'size': count,
+        'mean': mean,
+        'm2': m2,
+    }).drop_duplicates(['user_id', 'category_key'])
+    
+    stats = [
+        ExpenseCategoryStats(
+            user_id=int(row.user_id),
+            category_id=None if row.category_key == -1 else int(row.category_key),
+            count=int(row.size),
+            mean=float(row.mean),
+            m2=float(row.m2)
+        )
+        for row in moments.itertuples(index=False)
+    ]
+    
+    with transaction.atomic():
+        ExpenseCategoryStats.objects.filter(user_id__in=user_ids).delete()
+        ExpenseCategoryStats.objects.bulk_create(stats, batch_size=batch_size)
+    
+    return len(stats)
+
+def detect_anomalies(user_ids, batch_size=1000):
+    """Rebuild the statistics of some users and score all of their expenses in one pass.
+    
+    Returns (anomalies created, statistics rows written).
+    """
+    user_ids = list(user_ids)
+    frame = load_expenses(user_ids)
+    stats_count = rebuild_stats(user_ids, frame, batch_size)
+    
+    if frame.empty:
+        return 0, stats_count
+    
+    return save_anomalies(user_ids, find_anomalies(frame), batch_size), stats_count
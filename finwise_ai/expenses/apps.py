@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ExpensesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'expenses'
+    
+    def ready(self):
+        # Register the handlers that keep rollups right when a category is deleted
+        from . import signals  # noqa: F401
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from expenses.anomalies import detect_anomalies
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Rebuilds the expense category statistics and scans every expense for anomalies'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only scan the expenses of the user with this email')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of users scanned per pass')
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        
+        if options['user']:
+            users = users.filter(email=options['user'])
+            if not users.exists():
+                raise CommandError(f"User not found: {options['user']}")
+        
+        user_ids = list(users.values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        total_anomalies = total_stats = 0
+        
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            anomalies, stats = detect_anomalies(batch)
+            total_anomalies += anomalies
+            total_stats += stats
+            self.stdout.write(f'Scanned {start + len(batch)}/{len(user_ids)} users, {anomalies} new anomalies')
+        
+        self.stdout.write(self.style.SUCCESS(f'Found {total_anomalies} new anomalies and rebuilt {total_stats} statistics rows'))
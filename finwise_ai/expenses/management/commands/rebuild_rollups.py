@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from expenses.utils import rebuild_rollups
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly expense rollups from the expense tables'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild rollups for the user with this email')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of users rebuilt per transaction')
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        
+        if options['user']:
+            users = users.filter(email=options['user'])
+            if not users.exists():
+                raise CommandError(f"User not found: {options['user']}")
+        
+        user_ids = list(users.values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        total_rows = 0
+        
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            total_rows += rebuild_rollups(batch)
+            self.stdout.write(f'Rebuilt rollups for {start + len(batch)}/{len(user_ids)} users')
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total_rows} rollup rows'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+def keep_overrides_only(apps, schema_editor):
+    """Drop materialized occurrences that were never modified or paid."""
+    RecurringExpense = apps.get_model('expenses', 'RecurringExpense')
+    RecurringExpense.objects.filter(is_modified=False, is_paid=False).delete()
+    
+    # Keep a single override per parent and date before adding the constraint
+    seen = set()
+    duplicates = []
+    for pk, parent_id, date in RecurringExpense.objects.order_by('parent_expense_id', 'date', '-is_modified', '-pk').values_list('pk', 'parent_expense_id', 'date'):
+        if (parent_id, date) in seen:
+            duplicates.append(pk)
+        seen.add((parent_id, date))
+    RecurringExpense.objects.filter(pk__in=duplicates).delete()
+    
+    RecurringExpense.objects.update(occurrence_date=models.F('date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_expensemonthlyrollup'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='recurringexpense',
+            name='occurrence_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(keep_overrides_only, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='recurringexpense',
+            constraint=models.UniqueConstraint(fields=('parent_expense', 'occurrence_date'), name='unique_recurring_occurrence'),
+        ),
+    ]
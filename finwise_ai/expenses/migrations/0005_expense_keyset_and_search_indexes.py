@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def add_trigram_index(apps, schema_editor):
+    """Index descriptions for substring search on PostgreSQL (SQLite has no trigram indexes)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # description__icontains compiles to UPPER("description"::text) LIKE UPPER(...),
+    # so the index is built on that exact expression
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS expense_description_trgm_idx ON expenses_expense '
+        'USING gin ((UPPER("description"::text)) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS expense_description_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_expense_expense_user_date_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'date', 'id'], name='expense_user_date_idx'),
+        ),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
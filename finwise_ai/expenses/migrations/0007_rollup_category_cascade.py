@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:39
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_uncategorized_rollups(apps, schema_editor):
+    """Fold duplicate uncategorized rollups of the same month into one row before adding the constraint."""
+    ExpenseMonthlyRollup = apps.get_model('expenses', 'ExpenseMonthlyRollup')
+    kept = {}
+    duplicates = []
+    
+    for rollup in ExpenseMonthlyRollup.objects.filter(category__isnull=True).order_by('pk'):
+        key = (rollup.user_id, rollup.year, rollup.month)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = rollup
+            continue
+        
+        first.total_amount += rollup.total_amount
+        first.expense_count += rollup.expense_count
+        first.min_amount = min([amount for amount in (first.min_amount, rollup.min_amount) if amount is not None], default=None)
+        first.max_amount = max([amount for amount in (first.max_amount, rollup.max_amount) if amount is not None], default=None)
+        first.merged = True
+        duplicates.append(rollup.pk)
+    
+    for rollup in kept.values():
+        if getattr(rollup, 'merged', False):
+            rollup.save(update_fields=['total_amount', 'expense_count', 'min_amount', 'max_amount'])
+    ExpenseMonthlyRollup.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expensecategorystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expensemonthlyrollup',
+            name='unique_expense_rollup',
+        ),
+        migrations.AlterField(
+            model_name='expensemonthlyrollup',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='expenses.expensecategory'),
+        ),
+        migrations.RunPython(merge_uncategorized_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='expensemonthlyrollup',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('year'), models.F('month'), django.db.models.functions.comparison.Coalesce('category', models.Value(0)), name='unique_expense_rollup'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:42
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_uncategorized_stats(apps, schema_editor):
+    """Fold duplicate uncategorized statistics of a user into one row (parallel Welford) before adding the constraint."""
+    ExpenseCategoryStats = apps.get_model('expenses', 'ExpenseCategoryStats')
+    kept = {}
+    duplicates = []
+    
+    for stats in ExpenseCategoryStats.objects.filter(category__isnull=True).order_by('pk'):
+        first = kept.get(stats.user_id)
+        if first is None:
+            kept[stats.user_id] = stats
+            continue
+        
+        total = first.count + stats.count
+        delta = stats.mean - first.mean
+        if total:
+            first.m2 += stats.m2 + delta * delta * first.count * stats.count / total
+            first.mean += delta * stats.count / total
+        first.count = total
+        first.merged = True
+        duplicates.append(stats.pk)
+    
+    for stats in kept.values():
+        if getattr(stats, 'merged', False):
+            stats.save(update_fields=['count', 'mean', 'm2'])
+    ExpenseCategoryStats.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0007_rollup_category_cascade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expensecategorystats',
+            name='unique_expense_category_stats',
+        ),
+        migrations.RunPython(merge_uncategorized_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='expensecategorystats',
+            constraint=models.UniqueConstraint(models.F('user'), django.db.models.functions.comparison.Coalesce('category', models.Value(0)), name='unique_expense_category_stats'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from accounts.models import User
 
 class ExpenseCategory(models.Model):
@@ -43,24 +44,150 @@ class Expense(models.Model):
     def __str__(self):
         return f"{self.description} - {self.amount}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values so rollups can be adjusted on save."""
+        instance = super().from_db(db, field_names, values)
+        instance._rollup_state = instance.get_rollup_state()
+        return instance
+    
+    ROLLUP_FIELDS = ('user_id', 'category_id', 'date', 'amount', 'recurrence', 'recurrence_end_date')
+    
+    def get_rollup_state(self):
+        """Return the fields that decide which monthly rollups this expense counts towards."""
+        if not all(name in self.__dict__ for name in self.ROLLUP_FIELDS):
+            return None
+        return tuple(getattr(self, name) for name in self.ROLLUP_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep the monthly rollups and category statistics up to date."""
+        from .utils import add_to_rollup, remove_from_rollup, refresh_rollups, same_month, rule_dates
+        from .anomalies import add_to_stats, remove_from_stats
+        
+        previous = getattr(self, '_rollup_state', None)
+        if previous is None and self.pk:
+            previous = Expense.objects.filter(pk=self.pk).values_list(*self.ROLLUP_FIELDS).first()
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = self.get_rollup_state()
+            
+            if previous != current:
+                previous_dates = rule_dates(previous[2], *previous[4:]) if previous else []
+                current_dates = rule_dates(current[2], *current[4:])
+                
+                if len(previous_dates) > 1 or len(current_dates) > 1 or (previous and previous[:2] != current[:2]):
+                    # Occurrences and overrides follow the parent, recompute every month they touch
+                    override_dates = list(self.recurring_instances.values_list('date', flat=True))
+                    if previous and previous[0] != current[0]:
+                        refresh_rollups(previous[0], previous_dates + override_dates)
+                        previous_dates = []
+                    refresh_rollups(self.user_id, previous_dates + current_dates + override_dates)
+                else:
+                    refreshed = previous and remove_from_rollup(*previous[:4])
+                    if not (refreshed and same_month(previous[2], current[2])):
+                        add_to_rollup(*current[:4])
+                
+                # The category statistics only depend on the user, category and amount
+                if not previous or (previous[:2], previous[3]) != (current[:2], current[3]):
+                    if previous:
+                        remove_from_stats(previous[0], previous[1], previous[3])
+                    add_to_stats(current[0], current[1], current[3])
+        
+        self._rollup_state = current
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to remove this expense and its occurrences from the rollups and statistics."""
+        from .utils import refresh_rollups, rule_dates
+        from .anomalies import remove_from_stats
+        
+        dates = rule_dates(self.date, self.recurrence, self.recurrence_end_date)
+        dates += list(self.recurring_instances.values_list('date', flat=True))
+        
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            refresh_rollups(self.user_id, dates)
+            remove_from_stats(self.user_id, self.category_id, self.amount)
+        
+        return result
+    
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # (user, date, id) also serves the keyset-paginated expense list; on
+            # PostgreSQL migration 0005 adds a trigram index for description search
+            models.Index(fields=['user', 'date', 'id'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'date'], condition=models.Q(is_flagged=True), name='expense_flagged_idx'),
+        ]
 
 
 class RecurringExpense(models.Model):
-    """Model for tracking recurring expense instances."""
+    """Model for recurring expense occurrences that differ from their rule.
+    
+    Occurrences are expanded on the fly from the parent expense (see
+    ``expenses.utils.get_recurring_occurrences``); a row is only stored once an
+    occurrence is modified or marked as paid, and it replaces the generated
+    occurrence for its ``occurrence_date``.
+    """
     
     parent_expense = models.ForeignKey(Expense, on_delete=models.CASCADE, related_name='recurring_instances')
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateField()
+    occurrence_date = models.DateField(null=True, blank=True)  # Date generated by the recurrence rule
     is_paid = models.BooleanField(default=False)
     is_modified = models.BooleanField(default=False)  # If user modified this instance
     
     def __str__(self):
         return f"{self.parent_expense.description} - {self.date}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values so rollups can be adjusted on save."""
+        instance = super().from_db(db, field_names, values)
+        if 'date' in instance.__dict__ and 'amount' in instance.__dict__:
+            instance._rollup_state = (instance.date, instance.amount)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep the monthly rollups up to date."""
+        from .utils import add_to_rollup, remove_from_rollup, refresh_rollups, same_month
+        
+        if self.occurrence_date is None:
+            self.occurrence_date = self.date
+        
+        previous = getattr(self, '_rollup_state', None)
+        parent = self.parent_expense
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            if previous is None:
+                # A new override replaces a generated occurrence
+                refresh_rollups(parent.user_id, [self.date, self.occurrence_date])
+            elif previous != (self.date, self.amount):
+                refreshed = remove_from_rollup(parent.user_id, parent.category_id, *previous)
+                if not (refreshed and same_month(previous[0], self.date)):
+                    add_to_rollup(parent.user_id, parent.category_id, self.date, self.amount)
+        
+        self._rollup_state = (self.date, self.amount)
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to put the generated occurrence back in the rollups."""
+        from .utils import refresh_rollups
+        
+        parent = self.parent_expense
+        
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            refresh_rollups(parent.user_id, [self.date, self.occurrence_date])
+        
+        return result
+    
     class Meta:
         ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['parent_expense', 'occurrence_date'], name='unique_recurring_occurrence'),
+        ]
 
 
 class AnomalyDetection(models.Model):
@@ -81,3 +208,75 @@ class AnomalyDetection(models.Model):
     class Meta:
         verbose_name = "Anomaly Detection"
         verbose_name_plural = "Anomaly Detections"
+
+
+class ExpenseMonthlyRollup(models.Model):
+    """Model for per-user monthly expense totals by category.
+    
+    Maintained incrementally whenever an expense or a recurring instance is
+    saved or deleted, and recounted when a category is deleted (see
+    ``expenses.signals``). Use the ``rebuild_rollups`` command to backfill.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_rollups')
+    category = models.ForeignKey(ExpenseCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    year = models.IntegerField()
+    month = models.IntegerField()
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+    min_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.email} {self.year}-{self.month:02d} - {self.total_amount}"
+    
+    class Meta:
+        verbose_name = "Expense Monthly Rollup"
+        verbose_name_plural = "Expense Monthly Rollups"
+        ordering = ['year', 'month']
+        constraints = [
+            # NULLs never collide in a unique index, so uncategorized rows are keyed on category 0
+            models.UniqueConstraint('user', 'year', 'month', Coalesce('category', models.Value(0)), name='unique_expense_rollup'),
+        ]
+
+
+class ExpenseCategoryStats(models.Model):
+    """Model for running amount statistics of a user's expenses in one category.
+    
+    Holds the count, mean and sum of squared deviations (Welford's M2) so a
+    new expense can be scored without reading the category's history.
+    Maintained incrementally whenever an expense is saved or deleted, and
+    merged into the uncategorized row when a category is deleted (see
+    ``expenses.signals``); the ``detect_anomalies`` command rebuilds it
+    from the expense table.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_stats')
+    category = models.ForeignKey(ExpenseCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='stats')
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.email} {self.category} - {self.count} expenses"
+    
+    def without(self, amount):
+        """Return (count, mean, standard deviation) of the other expenses, leaving one amount out."""
+        amount = float(amount)
+        count = self.count - 1
+        if count <= 0:
+            return 0, 0.0, 0.0
+        
+        mean = (self.count * self.mean - amount) / count
+        m2 = max(self.m2 - (amount - self.mean) * (amount - mean), 0.0)
+        return count, mean, (m2 / count) ** 0.5
+    
+    class Meta:
+        verbose_name = "Expense Category Stats"
+        verbose_name_plural = "Expense Category Stats"
+        constraints = [
+            # Keyed on category 0 for uncategorized rows, as NULLs never collide in a unique index
+            models.UniqueConstraint('user', Coalesce('category', models.Value(0)), name='unique_expense_category_stats'),
+        ]
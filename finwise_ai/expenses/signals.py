@@ -0,0 +1,21 @@
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+from .models import ExpenseCategory
+from .utils import category_rollup_months, refresh_rollups
+from .anomalies import merge_category_stats
+
+@receiver(pre_delete, sender=ExpenseCategory)
+def remember_category_rollups(sender, instance, **kwargs):
+    """Note the months the category's rollups cover before they are deleted with it."""
+    instance._rollup_months = category_rollup_months(instance.pk)
+
+@receiver(post_delete, sender=ExpenseCategory)
+def recount_category_rollups(sender, instance, **kwargs):
+    """Recount those months, now that the category's expenses are uncategorized."""
+    for user_id, dates in getattr(instance, '_rollup_months', {}).items():
+        refresh_rollups(user_id, dates)
+
+@receiver(pre_delete, sender=ExpenseCategory)
+def merge_deleted_category_stats(sender, instance, **kwargs):
+    """Fold the category's statistics into the uncategorized ones before they are deleted with it."""
+    merge_category_stats(instance.pk)
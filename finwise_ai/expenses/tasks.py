@@ -0,0 +1,11 @@
+from jobs.queue import task
+from .models import Expense
+from .anomalies import score_expense
+
+@task
+def score_new_expense(expense_id):
+    """Check a new expense for anomalies, unless it is gone or was already checked."""
+    expense = Expense.objects.filter(pk=expense_id).first()
+    
+    if expense is not None and not expense.anomalies.exists():
+        score_expense(expense)
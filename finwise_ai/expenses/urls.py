@@ -6,6 +6,7 @@ app_name = 'expenses'
 urlpatterns = [
     path('', views.expense_home, name='expense_home'),
     path('list/', views.expense_list, name='expense_list'),
+    path('api/list/', views.expense_list_api, name='expense_list_api'),
     path('create/', views.expense_create, name='expense_create'),
     path('<int:pk>/edit/', views.expense_edit, name='expense_edit'),
     path('<int:pk>/delete/', views.expense_delete, name='expense_delete'),
@@ -18,7 +19,8 @@ urlpatterns = [
     
     # Recurring expenses
     path('recurring/', views.recurring_expenses, name='recurring_expenses'),
-    path('recurring/<int:pk>/edit/', views.recurring_expense_edit, name='recurring_expense_edit'),
+    path('recurring/<int:expense_id>/<str:occurrence_date>/edit/', views.recurring_expense_edit, name='recurring_expense_edit'),
+    path('recurring/<int:expense_id>/<str:occurrence_date>/mark-paid/', views.recurring_expense_mark_paid, name='recurring_expense_mark_paid'),
     
     # Anomaly detection
     path('anomalies/', views.anomaly_detection, name='anomaly_detection'),
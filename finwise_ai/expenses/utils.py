@@ -0,0 +1,486 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, Min, Max, Q, F, Value, DecimalField
+from django.db.models.functions import ExtractYear, ExtractMonth, ExtractWeekDay, TruncMonth, Least, Greatest
+from datetime import date, timedelta
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
+from .models import Expense, RecurringExpense, ExpenseMonthlyRollup
+
+AMOUNT_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+# Step between occurrences and the longest it can take in days
+RECURRENCE_STEPS = {
+    'daily': (timedelta(days=1), 1),
+    'weekly': (timedelta(weeks=1), 7),
+    'monthly': (relativedelta(months=1), 31),
+    'yearly': (relativedelta(years=1), 366),
+}
+
+def to_decimal(amount):
+    """Convert an amount to a Decimal rounded to cents."""
+    return Decimal(str(amount)).quantize(Decimal('0.01'))
+
+def month_bounds(year, month):
+    """Return the first day of a month and the first day of the following month."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def same_month(first, second):
+    """Check whether two dates fall in the same calendar month."""
+    return (first.year, first.month) == (second.year, second.month)
+
+def rollup_queryset(user, start_date=None, end_date=None):
+    """Get a user's rollup rows, optionally limited to the months between two dates."""
+    rollups = ExpenseMonthlyRollup.objects.filter(user=user)
+    
+    if start_date:
+        rollups = rollups.filter(Q(year__gt=start_date.year) | Q(year=start_date.year, month__gte=start_date.month))
+    if end_date:
+        rollups = rollups.filter(Q(year__lt=end_date.year) | Q(year=end_date.year, month__lte=end_date.month))
+    
+    return rollups
+
+def add_to_rollup(user_id, category_id, expense_date, amount):
+    """Count one expense in its monthly rollup, creating the row if needed."""
+    amount = to_decimal(amount)
+    rollups = ExpenseMonthlyRollup.objects.filter(
+        user_id=user_id,
+        category_id=category_id,
+        year=expense_date.year,
+        month=expense_date.month
+    )
+    
+    if not rollups.exists():
+        try:
+            with transaction.atomic():
+                ExpenseMonthlyRollup.objects.create(
+                    user_id=user_id,
+                    category_id=category_id,
+                    year=expense_date.year,
+                    month=expense_date.month,
+                    total_amount=amount,
+                    expense_count=1,
+                    min_amount=amount,
+                    max_amount=amount
+                )
+            return
+        except IntegrityError:
+            # Another request created the row first, fall through to the update
+            pass
+    
+    value = Value(amount, output_field=AMOUNT_FIELD)
+    rollups.update(
+        total_amount=F('total_amount') + value,
+        expense_count=F('expense_count') + 1,
+        min_amount=Least('min_amount', value),
+        max_amount=Greatest('max_amount', value)
+    )
+
+def remove_from_rollup(user_id, category_id, expense_date, amount):
+    """Take one expense out of its monthly rollup.
+    
+    Returns True when the whole month had to be recomputed from the
+    expense tables, in which case the month already reflects any change
+    saved in the current transaction.
+    """
+    amount = to_decimal(amount)
+    rollup = ExpenseMonthlyRollup.objects.filter(
+        user_id=user_id,
+        category_id=category_id,
+        year=expense_date.year,
+        month=expense_date.month
+    ).first()
+    
+    if rollup is None:
+        return False
+    
+    # Removing the smallest or largest amount means min/max must be recomputed
+    if rollup.expense_count <= 1 or amount <= rollup.min_amount or amount >= rollup.max_amount:
+        refresh_rollups(user_id, [expense_date])
+        return True
+    
+    ExpenseMonthlyRollup.objects.filter(pk=rollup.pk).update(
+        total_amount=F('total_amount') - Value(amount, output_field=AMOUNT_FIELD),
+        expense_count=F('expense_count') - 1
+    )
+    return False
+
+def occurrence_dates(start_date, recurrence, recurrence_end_date, since=None, until=None):
+    """Yield the dates a recurrence rule generates after its first date.
+    
+    The k-th date is computed as start_date + k steps instead of by repeated
+    addition, so a monthly rule on the 31st doesn't drift to the 28th after
+    February. The walk starts just before ``since``, so only the dates in
+    the requested window are generated.
+    """
+    if recurrence not in RECURRENCE_STEPS or recurrence_end_date is None:
+        return
+    
+    step, max_days = RECURRENCE_STEPS[recurrence]
+    last_date = recurrence_end_date if until is None else min(until, recurrence_end_date)
+    
+    k = 1
+    if since and since > start_date:
+        k = max(1, (since - start_date).days // max_days)
+    
+    while True:
+        current = start_date + step * k
+        if current > last_date:
+            return
+        if since is None or current >= since:
+            yield current
+        k += 1
+
+def rule_dates(start_date, recurrence='none', recurrence_end_date=None):
+    """Get every date an expense counts on: its own date and its generated occurrences."""
+    return [start_date, *occurrence_dates(start_date, recurrence, recurrence_end_date)]
+
+def get_recurring_occurrences(user_ids, since=None, until=None):
+    """Expand the recurring expenses of some users between two dates (inclusive).
+    
+    Stored RecurringExpense rows are overrides (modified or paid occurrences)
+    and replace the generated occurrence for their ``occurrence_date``; every
+    other occurrence is returned as an unsaved RecurringExpense instance.
+    """
+    parents = Expense.objects.filter(
+        user_id__in=user_ids,
+        recurrence__in=RECURRENCE_STEPS,
+        recurrence_end_date__isnull=False
+    ).select_related('category')
+    overrides = RecurringExpense.objects.filter(
+        parent_expense__user_id__in=user_ids
+    ).select_related('parent_expense__category')
+    
+    date_window = Q()
+    occurrence_window = Q()
+    if since:
+        parents = parents.filter(recurrence_end_date__gte=since)
+        date_window &= Q(date__gte=since)
+        occurrence_window &= Q(occurrence_date__gte=since)
+    if until:
+        parents = parents.filter(date__lt=until)
+        date_window &= Q(date__lte=until)
+        occurrence_window &= Q(occurrence_date__lte=until)
+    
+    occurrences = []
+    overridden = set()
+    for override in overrides.filter(date_window | occurrence_window):
+        overridden.add((override.parent_expense_id, override.occurrence_date))
+        if (since is None or override.date >= since) and (until is None or override.date <= until):
+            occurrences.append(override)
+    
+    for parent in parents:
+        for occurrence_date in occurrence_dates(parent.date, parent.recurrence, parent.recurrence_end_date, since, until):
+            if (parent.pk, occurrence_date) not in overridden:
+                occurrences.append(RecurringExpense(
+                    parent_expense=parent,
+                    amount=parent.amount,
+                    date=occurrence_date,
+                    occurrence_date=occurrence_date
+                ))
+    
+    occurrences.sort(key=lambda occurrence: (occurrence.date, occurrence.parent_expense_id))
+    return occurrences
+
+def get_occurrence(expense, occurrence_date):
+    """Get the stored override or a generated occurrence of an expense on a date, if any."""
+    override = expense.recurring_instances.filter(occurrence_date=occurrence_date).first()
+    if override:
+        return override
+    
+    if occurrence_date in occurrence_dates(expense.date, expense.recurrence, expense.recurrence_end_date, occurrence_date, occurrence_date):
+        return RecurringExpense(
+            parent_expense=expense,
+            amount=expense.amount,
+            date=occurrence_date,
+            occurrence_date=occurrence_date
+        )
+    
+    return None
+
+def aggregate_rollups(user_ids, months=None):
+    """Compute rollup rows from the expenses and recurring occurrences of some users.
+    
+    Returns a dict keyed by (user_id, year, month, category_id) with the
+    total, count, min and max of the expenses in that month. ``months``
+    limits the result to a set of (year, month) pairs.
+    """
+    expense_filter = Q(user_id__in=user_ids)
+    since = until = None
+    
+    if months is not None:
+        if not months:
+            return {}
+        month_filter = Q()
+        for year, month in months:
+            start, end = month_bounds(year, month)
+            month_filter |= Q(date__gte=start, date__lt=end)
+        expense_filter &= month_filter
+        since = month_bounds(*min(months))[0]
+        until = month_bounds(*max(months))[1] - timedelta(days=1)
+    
+    expense_rows = Expense.objects.filter(expense_filter).annotate(
+        rollup_year=ExtractYear('date'),
+        rollup_month=ExtractMonth('date')
+    ).values('user_id', 'rollup_year', 'rollup_month', 'category_id').annotate(
+        total=Sum('amount'),
+        count=Count('id'),
+        minimum=Min('amount'),
+        maximum=Max('amount')
+    ).order_by()
+    
+    rows = [
+        ((row['user_id'], row['rollup_year'], row['rollup_month'], row['category_id']),
+         to_decimal(row['total']), row['count'], row['minimum'], row['maximum'])
+        for row in expense_rows
+    ]
+    
+    for occurrence in get_recurring_occurrences(user_ids, since, until):
+        if months is not None and (occurrence.date.year, occurrence.date.month) not in months:
+            continue
+        parent = occurrence.parent_expense
+        amount = to_decimal(occurrence.amount)
+        rows.append(((parent.user_id, occurrence.date.year, occurrence.date.month, parent.category_id), amount, 1, amount, amount))
+    
+    buckets = {}
+    for key, total, count, minimum, maximum in rows:
+        bucket = buckets.get(key)
+        
+        if bucket is None:
+            buckets[key] = {
+                'total': total,
+                'count': count,
+                'minimum': minimum,
+                'maximum': maximum,
+            }
+        else:
+            bucket['total'] += total
+            bucket['count'] += count
+            bucket['minimum'] = min(bucket['minimum'], minimum)
+            bucket['maximum'] = max(bucket['maximum'], maximum)
+    
+    return buckets
+
+def build_rollup_objects(buckets):
+    """Turn aggregated buckets into unsaved rollup instances."""
+    return [
+        ExpenseMonthlyRollup(
+            user_id=user_id,
+            category_id=category_id,
+            year=year,
+            month=month,
+            total_amount=bucket['total'],
+            expense_count=bucket['count'],
+            min_amount=bucket['minimum'],
+            max_amount=bucket['maximum']
+        )
+        for (user_id, year, month, category_id), bucket in buckets.items()
+    ]
+
+def refresh_rollups(user_id, dates):
+    """Recompute a user's rollups for every month touched by the given dates."""
+    months = {(value.year, value.month) for value in dates}
+    if not months:
+        return
+    
+    rollup_filter = Q()
+    for year, month in months:
+        rollup_filter |= Q(year=year, month=month)
+    
+    buckets = aggregate_rollups([user_id], months)
+    
+    with transaction.atomic():
+        ExpenseMonthlyRollup.objects.filter(rollup_filter, user_id=user_id).delete()
+        ExpenseMonthlyRollup.objects.bulk_create(build_rollup_objects(buckets))
+
+def category_rollup_months(category_id):
+    """Get the months each user has a rollup for in a category, as {user id: [first days]}."""
+    months = {}
+    rows = ExpenseMonthlyRollup.objects.filter(category_id=category_id).values_list('user_id', 'year', 'month')
+    
+    for user_id, year, month in rows:
+        months.setdefault(user_id, []).append(date(year, month, 1))
+    
+    return months
+
+def rebuild_rollups(user_ids, batch_size=1000):
+    """Rebuild every rollup row for the given users from scratch."""
+    user_ids = list(user_ids)
+    buckets = aggregate_rollups(user_ids)
+    
+    with transaction.atomic():
+        ExpenseMonthlyRollup.objects.filter(user_id__in=user_ids).delete()
+        ExpenseMonthlyRollup.objects.bulk_create(build_rollup_objects(buckets), batch_size=batch_size)
+    
+    return len(buckets)
+
+def get_expense_analytics(user, since=None, until=None):
+    """Compute the figures for the analytics page.
+    
+    Whole months of the window are read from the monthly rollups, which
+    already count recurring occurrences. The rollups cannot split a month,
+    so the partial months at either edge of the window are grouped from the
+    raw expenses and occurrences, and so is the weekday breakdown, which the
+    rollups do not keep.
+    """
+    first_full, last_full = since, until
+    
+    if since and since.day != 1:
+        first_full = month_bounds(since.year, since.month)[1]
+    if until and (until + timedelta(days=1)).day != 1:
+        last_full = until.replace(day=1) - timedelta(days=1)
+    
+    if first_full and last_full and first_full > last_full:
+        full_months = False
+        edges = [(since, until)]
+    else:
+        full_months = True
+        edges = []
+        if since != first_full:
+            edges.append((since, first_full - timedelta(days=1)))
+        if until != last_full:
+            edges.append((last_full + timedelta(days=1), until))
+    
+    window_filter = Q(user=user)
+    if since:
+        window_filter &= Q(date__gte=since)
+    if until:
+        window_filter &= Q(date__lte=until)
+    
+    occurrences = get_recurring_occurrences([user.pk], since, until)
+    rows = []
+    
+    if full_months:
+        rollup_rows = rollup_queryset(user, first_full, last_full).values('year', 'month', 'category__name').annotate(
+            amount=Sum('total_amount'),
+            count=Sum('expense_count')
+        ).order_by()
+        rows.extend(
+            (date(row['year'], row['month'], 1), row['category__name'], to_decimal(row['amount']), row['count'])
+            for row in rollup_rows
+        )
+    
+    if edges:
+        edge_filter = Q()
+        for start, end in edges:
+            edge_filter |= Q(date__gte=start, date__lte=end)
+        
+        edge_rows = Expense.objects.filter(window_filter & edge_filter).annotate(
+            period=TruncMonth('date'),
+            category_name=F('category__name')
+        ).values('period', 'category_name').annotate(
+            amount=Sum('amount'),
+            count=Count('id')
+        ).order_by()
+        rows.extend(
+            (row['period'], row['category_name'], to_decimal(row['amount']), row['count'])
+            for row in edge_rows
+        )
+        
+        for occurrence in occurrences:
+            if any(start <= occurrence.date <= end for start, end in edges):
+                category = occurrence.parent_expense.category
+                rows.append((
+                    occurrence.date.replace(day=1),
+                    category.name if category else None,
+                    to_decimal(occurrence.amount),
+                    1
+                ))
+    
+    monthly_totals = {}
+    category_totals = {}
+    total_expenses = Decimal('0')
+    num_transactions = 0
+    
+    for period, category_name, amount, count in rows:
+        category_name = category_name or 'Uncategorized'
+        
+        monthly_totals[period] = monthly_totals.get(period, 0) + amount
+        category_totals[category_name] = category_totals.get(category_name, 0) + amount
+        total_expenses += amount
+        num_transactions += count
+    
+    weekday_rows = Expense.objects.filter(window_filter).annotate(
+        week_day=ExtractWeekDay('date')
+    ).values('week_day').annotate(amount=Sum('amount')).order_by()
+    day_totals = {row['week_day']: to_decimal(row['amount']) for row in weekday_rows}
+    
+    for occurrence in occurrences:
+        week_day = occurrence.date.isoweekday() % 7 + 1
+        day_totals[week_day] = day_totals.get(week_day, 0) + to_decimal(occurrence.amount)
+    
+    # ExtractWeekDay numbers days from 1 (Sunday) to 7 (Saturday)
+    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    day_of_week = [{
+        'day_of_week': day_name,
+        'amount': float(day_totals[(index + 1) % 7 + 1])
+    } for index, day_name in enumerate(day_names) if (index + 1) % 7 + 1 in day_totals]
+    
+    return {
+        'monthly_trend': [{
+            'date': period.strftime('%b %Y'),
+            'amount': float(amount)
+        } for period, amount in sorted(monthly_totals.items())],
+        'category_breakdown': [{
+            'category__name': category_name,
+            'amount': float(amount)
+        } for category_name, amount in sorted(category_totals.items(), key=lambda item: item[1], reverse=True)],
+        'day_of_week': day_of_week,
+        'total_expenses': float(total_expenses),
+        'num_transactions': num_transactions,
+    }
+
+def encode_cursor(expense):
+    """Encode the (date, id) position of an expense in the expense list."""
+    return f'{expense.date.isoformat()}.{expense.pk}'
+
+def decode_cursor(cursor):
+    """Decode a cursor made by encode_cursor; returns None if it is malformed."""
+    try:
+        cursor_date, cursor_id = cursor.split('.')
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except (AttributeError, ValueError):
+        return None
+
+def keyset_page(expenses, page_size, after=None, before=None):
+    """Get one page of expenses, newest first, seeking from a cursor.
+    
+    Pages are read with WHERE (date, id) < (cursor date, cursor id) ... LIMIT
+    instead of an OFFSET, so every page costs the same and is served by the
+    (user, date, id) index. Returns (expenses, next cursor, previous cursor).
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+    
+    if before:
+        # Read the newer rows oldest first, then put them back in list order
+        before_date, before_id = before
+        rows = list(expenses.filter(
+            Q(date__gt=before_date) | Q(date=before_date, id__gt=before_id)
+        ).order_by('date', 'id')[:page_size + 1])
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after:
+            after_date, after_id = after
+            expenses = expenses.filter(Q(date__lt=after_date) | Q(date=after_date, id__lt=after_id))
+        rows = list(expenses.order_by('-date', '-id')[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after is not None
+    
+    next_cursor = encode_cursor(rows[-1]) if rows and has_next else None
+    previous_cursor = encode_cursor(rows[0]) if rows and has_previous else None
+    
+    return rows, next_cursor, previous_cursor
+
+def capped_count(queryset, cap):
+    """Count the rows of a queryset, but stop counting after ``cap``.
+    
+    Returns (count, is_capped). Counting a LIMITed subquery keeps the cost
+    bounded however many rows match the filters.
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
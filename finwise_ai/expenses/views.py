@@ -1,39 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.db.models import Sum, Avg
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 from .models import Expense, ExpenseCategory, RecurringExpense, AnomalyDetection
 from .forms import ExpenseForm, ExpenseCategoryForm, ExpenseFilterForm, RecurringExpenseForm
+from .utils import get_expense_analytics, get_recurring_occurrences, get_occurrence, keyset_page, capped_count
+from .tasks import score_new_expense
+from jobs.queue import enqueue
 import json
 import pandas as pd
 import numpy as np
 
+# Expenses per page of the expense list, and the most a client may ask for
+EXPENSE_PAGE_SIZE = 50
+EXPENSE_MAX_PAGE_SIZE = 200
+
+# Matching expenses are counted up to this number, then shown as "1000+"
+EXPENSE_COUNT_CAP = 1000
+
 @login_required
 def expense_home(request):
     """View for the expenses dashboard."""
     # Get filter parameters
     form = ExpenseFilterForm(request.GET, user=request.user)
     
-    # Base queryset
-    expenses = Expense.objects.filter(user=request.user)
-    
-    # Apply filters if form is valid
-    if form.is_valid():
-        if form.cleaned_data.get('start_date'):
-            expenses = expenses.filter(date__gte=form.cleaned_data['start_date'])
-        if form.cleaned_data.get('end_date'):
-            expenses = expenses.filter(date__lte=form.cleaned_data['end_date'])
-        if form.cleaned_data.get('category'):
-            expenses = expenses.filter(category=form.cleaned_data['category'])
-        if form.cleaned_data.get('min_amount'):
-            expenses = expenses.filter(amount__gte=form.cleaned_data['min_amount'])
-        if form.cleaned_data.get('max_amount'):
-            expenses = expenses.filter(amount__lte=form.cleaned_data['max_amount'])
-        if form.cleaned_data.get('description'):
-            expenses = expenses.filter(description__icontains=form.cleaned_data['description'])
+    # Base queryset, filtered if the form is valid
+    expenses = filter_expenses(Expense.objects.filter(user=request.user), form)
     
     # Get expense categories for the pie chart
     categories = ExpenseCategory.objects.all()
@@ -100,35 +96,51 @@ def expense_home(request):
 
 @login_required
 def expense_list(request):
-    """View for listing all expenses."""
-    # Get filter parameters
+    """View for listing expenses, one page at a time."""
     form = ExpenseFilterForm(request.GET, user=request.user)
+    page = get_expense_page(request, form)
     
-    # Base queryset
-    expenses = Expense.objects.filter(user=request.user)
-    
-    # Apply filters if form is valid
-    if form.is_valid():
-        if form.cleaned_data.get('start_date'):
-            expenses = expenses.filter(date__gte=form.cleaned_data['start_date'])
-        if form.cleaned_data.get('end_date'):
-            expenses = expenses.filter(date__lte=form.cleaned_data['end_date'])
-        if form.cleaned_data.get('category'):
-            expenses = expenses.filter(category=form.cleaned_data['category'])
-        if form.cleaned_data.get('min_amount'):
-            expenses = expenses.filter(amount__gte=form.cleaned_data['min_amount'])
-        if form.cleaned_data.get('max_amount'):
-            expenses = expenses.filter(amount__lte=form.cleaned_data['max_amount'])
-        if form.cleaned_data.get('description'):
-            expenses = expenses.filter(description__icontains=form.cleaned_data['description'])
+    # Filters to carry over to the newer/older page links
+    filters = request.GET.copy()
+    for key in ['after', 'before']:
+        filters.pop(key, None)
     
     context = {
-        'expenses': expenses.order_by('-date'),
+        'expenses': page['expenses'],
         'filter_form': form,
+        'total_count': page['count'],
+        'count_is_capped': page['count_is_capped'],
+        'next_cursor': page['next'],
+        'previous_cursor': page['previous'],
+        'filter_query': filters.urlencode(),
     }
     
     return render(request, 'expenses/expense_list.html', context)
 
+@login_required
+def expense_list_api(request):
+    """API endpoint returning one page of expenses as JSON, for infinite scroll."""
+    form = ExpenseFilterForm(request.GET, user=request.user)
+    
+    # The count is only needed once, with the first page
+    page = get_expense_page(request, form, with_count=not (request.GET.get('after') or request.GET.get('before')))
+    
+    return JsonResponse({
+        'results': [{
+            'id': expense.id,
+            'date': expense.date.isoformat(),
+            'description': expense.description,
+            'category': expense.category.name if expense.category else None,
+            'amount': float(expense.amount),
+            'recurrence': expense.recurrence,
+            'is_flagged': expense.is_flagged,
+        } for expense in page['expenses']],
+        'count': page['count'],
+        'count_is_capped': page['count_is_capped'],
+        'next': page['next'],
+        'previous': page['previous'],
+    })
+
 @login_required
 def expense_create(request):
     """View for creating a new expense."""
@@ -139,12 +151,8 @@ def expense_create(request):
             expense.user = request.user
             expense.save()
             
-            # Handle recurring expenses
-            if expense.recurrence != 'none' and expense.recurrence_end_date:
-                create_recurring_expenses(expense)
-            
-            # Check for anomalies
-            detect_anomalies(expense)
+            # Check for anomalies in the background
+            enqueue(score_new_expense, {'expense_id': expense.pk}, key=f'score_new_expense:{expense.pk}')
             
             messages.success(request, 'Expense created successfully!')
             return redirect('expenses:expense_list')
@@ -169,10 +177,6 @@ def expense_edit(request, pk):
         if form.is_valid():
             expense = form.save()
             
-            # Update recurring expenses if needed
-            if expense.recurrence != 'none':
-                update_recurring_expenses(expense)
-            
             messages.success(request, 'Expense updated successfully!')
             return redirect('expenses:expense_list')
     else:
@@ -193,10 +197,7 @@ def expense_delete(request, pk):
     expense = get_object_or_404(Expense, pk=pk, user=request.user)
     
     if request.method == 'POST':
-        # Delete recurring instances if this is a recurring expense
-        if expense.recurrence != 'none':
-            RecurringExpense.objects.filter(parent_expense=expense).delete()
-        
+        # Recurring instances are removed along with the expense (and its rollups)
         expense.delete()
         messages.success(request, 'Expense deleted successfully!')
         return redirect('expenses:expense_list')
@@ -277,22 +278,28 @@ def category_delete(request, pk):
 
 @login_required
 def recurring_expenses(request):
-    """View for managing recurring expenses."""
-    recurring = RecurringExpense.objects.filter(
-        parent_expense__user=request.user,
-        date__gte=timezone.now().date()
-    ).order_by('date')
+    """View for managing upcoming recurring expenses."""
+    today = timezone.now().date()
+    
+    try:
+        days = max(1, min(int(request.GET.get('days', 90)), 3660))
+    except ValueError:
+        days = 90
+    
+    # Occurrences are expanded for the window only, nothing is written
+    recurring = get_recurring_occurrences([request.user.pk], today, today + timedelta(days=days))
     
     context = {
         'recurring_expenses': recurring,
+        'days': days,
     }
     
     return render(request, 'expenses/recurring_expenses.html', context)
 
 @login_required
-def recurring_expense_edit(request, pk):
-    """View for editing a recurring expense instance."""
-    recurring = get_object_or_404(RecurringExpense, pk=pk, parent_expense__user=request.user)
+def recurring_expense_edit(request, expense_id, occurrence_date):
+    """View for editing one occurrence of a recurring expense."""
+    recurring = get_recurring_occurrence_or_404(request.user, expense_id, occurrence_date)
     
     if request.method == 'POST':
         form = RecurringExpenseForm(request.POST, instance=recurring)
@@ -312,13 +319,26 @@ def recurring_expense_edit(request, pk):
     
     return render(request, 'expenses/recurring_expense_form.html', context)
 
+@login_required
+def recurring_expense_mark_paid(request, expense_id, occurrence_date):
+    """View for marking one occurrence of a recurring expense as paid."""
+    recurring = get_recurring_occurrence_or_404(request.user, expense_id, occurrence_date)
+    
+    if request.method == 'POST':
+        recurring.is_paid = True
+        recurring.save()
+        
+        return JsonResponse({'status': 'success'})
+    
+    return JsonResponse({'status': 'error', 'message': 'Invalid request method'})
+
 @login_required
 def anomaly_detection(request):
     """View for displaying expense anomalies."""
     anomalies = AnomalyDetection.objects.filter(
         user=request.user,
         is_reviewed=False
-    ).order_by('-created_at')
+    ).select_related('expense__category').order_by('-created_at')
     
     context = {
         'anomalies': anomalies,
@@ -359,147 +379,102 @@ def expense_analytics(request):
         context = {'no_data': True}
         return render(request, 'expenses/expense_analytics.html', context)
     
-    # Monthly trend analysis - Use Python date formatting instead of SQL
-    from collections import defaultdict
-    monthly_totals = defaultdict(float)
-    
-    for expense in expenses:
-        month_key = expense.date.strftime('%Y-%m')
-        monthly_totals[month_key] += float(expense.amount)
-    
-    # Sort by month and prepare data
-    monthly_data = []
-    for month in sorted(monthly_totals.keys()):
-        month_display = datetime.strptime(month, '%Y-%m').strftime('%b %Y')
-        monthly_data.append({
-            'date': month_display,
-            'amount': monthly_totals[month]
-        })
-    
-    # Category breakdown
-    category_totals = defaultdict(float)
-    for expense in expenses:
-        category_name = expense.category.name if expense.category else 'Uncategorized'
-        category_totals[category_name] += float(expense.amount)
-    
-    category_data = []
-    for category, total in sorted(category_totals.items(), key=lambda x: x[1], reverse=True):
-        category_data.append({
-            'category__name': category,
-            'amount': total
-        })
+    # Optional ?since=/?until= window (YYYY-MM-DD)
+    since = parse_date_param(request.GET.get('since'))
+    until = parse_date_param(request.GET.get('until'))
     
-    # Day of week analysis
-    day_totals = defaultdict(float)
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    
-    for expense in expenses:
-        day_name = day_names[expense.date.weekday()]
-        day_totals[day_name] += float(expense.amount)
-    
-    day_data = []
-    for day in day_names:
-        if day in day_totals:
-            day_data.append({
-                'day_of_week': day,
-                'amount': day_totals[day]
-            })
+    analytics = get_expense_analytics(request.user, since=since, until=until)
     
     # Largest expenses
-    largest_expenses = expenses.order_by('-amount')[:10]
+    largest_expenses = expenses
+    if since:
+        largest_expenses = largest_expenses.filter(date__gte=since)
+    if until:
+        largest_expenses = largest_expenses.filter(date__lte=until)
+    largest_expenses = largest_expenses.order_by('-amount')[:10]
     
     # Prepare data for Chart.js
-    monthly_trend_json = json.dumps(monthly_data)
-    category_breakdown_json = json.dumps(category_data)
+    monthly_trend_json = json.dumps(analytics['monthly_trend'])
+    category_breakdown_json = json.dumps(analytics['category_breakdown'])
     
     # Calculate totals
-    total_expenses = sum(float(expense.amount) for expense in expenses)
-    num_transactions = expenses.count()
-    avg_monthly = total_expenses / len(monthly_data) if monthly_data else 0
+    total_expenses = analytics['total_expenses']
+    num_transactions = analytics['num_transactions']
+    avg_monthly = total_expenses / len(analytics['monthly_trend']) if analytics['monthly_trend'] else 0
     
     context = {
         'monthly_trend': monthly_trend_json,
         'category_breakdown': category_breakdown_json,
-        'day_of_week': day_data,
+        'day_of_week': analytics['day_of_week'],
         'largest_expenses': largest_expenses,
         'total_expenses': total_expenses,
         'avg_monthly': avg_monthly,
         'num_transactions': num_transactions,
+        'since': since,
+        'until': until,
     }
     
     return render(request, 'expenses/expense_analytics.html', context)
 
 # Helper functions
 
-def create_recurring_expenses(expense):
-    """Create recurring expense instances based on the recurrence pattern."""
-    from dateutil.relativedelta import relativedelta
-    
-    start_date = expense.date
-    end_date = expense.recurrence_end_date
-    
-    current_date = start_date
-    
-    while current_date <= end_date:
-        if current_date > start_date:  # Skip the first one (it's the original expense)
-            RecurringExpense.objects.create(
-                parent_expense=expense,
-                amount=expense.amount,
-                date=current_date,
-                is_paid=False
-            )
-        
-        # Calculate next date based on recurrence pattern
-        if expense.recurrence == 'daily':
-            current_date += timedelta(days=1)
-        elif expense.recurrence == 'weekly':
-            current_date += timedelta(weeks=1)
-        elif expense.recurrence == 'monthly':
-            current_date += relativedelta(months=1)
-        elif expense.recurrence == 'yearly':
-            current_date += relativedelta(years=1)
-
-def update_recurring_expenses(expense):
-    """Update recurring expense instances after the parent expense is modified."""
-    # Delete future recurring instances that haven't been modified
-    RecurringExpense.objects.filter(
-        parent_expense=expense,
-        date__gt=timezone.now().date(),
-        is_modified=False
-    ).delete()
-    
-    # Create new recurring instances
-    if expense.recurrence != 'none' and expense.recurrence_end_date:
-        create_recurring_expenses(expense)
+def filter_expenses(expenses, form):
+    """Apply the expense filter form to a queryset, if the form is valid."""
+    if form.is_valid():
+        if form.cleaned_data.get('start_date'):
+            expenses = expenses.filter(date__gte=form.cleaned_data['start_date'])
+        if form.cleaned_data.get('end_date'):
+            expenses = expenses.filter(date__lte=form.cleaned_data['end_date'])
+        if form.cleaned_data.get('category'):
+            expenses = expenses.filter(category=form.cleaned_data['category'])
+        if form.cleaned_data.get('min_amount'):
+            expenses = expenses.filter(amount__gte=form.cleaned_data['min_amount'])
+        if form.cleaned_data.get('max_amount'):
+            expenses = expenses.filter(amount__lte=form.cleaned_data['max_amount'])
+        if form.cleaned_data.get('description'):
+            # Served by a trigram index on PostgreSQL; on SQLite it scans the user's rows
+            expenses = expenses.filter(description__icontains=form.cleaned_data['description'])
+    
+    return expenses
 
-def detect_anomalies(expense):
-    """Detect anomalies in expenses using simple statistical methods."""
-    # Get user's expenses in the same category from the last 6 months
-    six_months_ago = timezone.now().date() - timedelta(days=180)
-    category_expenses = Expense.objects.filter(
-        user=expense.user,
-        category=expense.category,
-        date__gte=six_months_ago,
-        date__lt=expense.date  # Exclude the current expense
+def get_expense_page(request, form, with_count=True):
+    """Get the filtered page of expenses asked for by the after/before cursors."""
+    expenses = filter_expenses(Expense.objects.filter(user=request.user).select_related('category'), form)
+    
+    try:
+        page_size = min(int(request.GET.get('page_size', EXPENSE_PAGE_SIZE)), EXPENSE_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = EXPENSE_PAGE_SIZE
+    
+    rows, next_cursor, previous_cursor = keyset_page(
+        expenses,
+        max(page_size, 1),
+        after=request.GET.get('after'),
+        before=request.GET.get('before')
     )
+    count, count_is_capped = capped_count(expenses, EXPENSE_COUNT_CAP) if with_count else (None, False)
+    
+    return {
+        'expenses': rows,
+        'next': next_cursor,
+        'previous': previous_cursor,
+        'count': count,
+        'count_is_capped': count_is_capped,
+    }
+
+def parse_date_param(value):
+    """Parse an optional YYYY-MM-DD query parameter, ignoring invalid values."""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+def get_recurring_occurrence_or_404(user, expense_id, occurrence_date):
+    """Get a stored or generated occurrence of one of the user's expenses, or raise Http404."""
+    expense = get_object_or_404(Expense, pk=expense_id, user=user)
+    occurrence = get_occurrence(expense, parse_date_param(occurrence_date))
     
-    if category_expenses.count() >= 5:  # Need enough data for meaningful analysis
-        # Calculate mean and standard deviation
-        amounts = [e.amount for e in category_expenses]
-        mean = np.mean(amounts)
-        std_dev = np.std(amounts)
-        
-        # Check if current expense is an outlier (> 2 standard deviations from mean)
-        if expense.amount > mean + (2 * std_dev):
-            # Create anomaly detection record
-            AnomalyDetection.objects.create(
-                user=expense.user,
-                expense=expense,
-                anomaly_type='spike',
-                confidence_score=min(1.0, (expense.amount - mean) / (3 * std_dev)),
-                description=f"This expense is significantly higher than your usual spending in this category. Average: {mean:.2f}, This expense: {expense.amount:.2f}"
-            )
-            
-            # Flag the expense
-            expense.is_flagged = True
-            expense.save()
+    if occurrence is None:
+        raise Http404("No such occurrence")
+    
+    return occurrence
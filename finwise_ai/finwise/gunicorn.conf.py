@@ -0,0 +1,26 @@
+"""
+Gunicorn config for finwise_ai, used by the Procfile.
+
+SERVER_INTERFACE picks how requests are served:
+
+* ``wsgi`` (default): sync workers running ``finwise.wsgi``. Each request,
+  however light, holds a worker (thread) until it is answered.
+* ``asgi``: uvicorn workers running ``finwise.asgi``. The async views (the
+  dashboard, credit and goal chart APIs and the agent prompt API) wait on
+  the database without holding a thread, so one worker serves many polls at
+  once; sync views are run in a thread pool.
+
+Gunicorn itself reads WEB_CONCURRENCY (worker processes) and
+GUNICORN_CMD_ARGS (e.g. "--threads 4" for the sync workers).
+"""
+
+import os
+
+if os.getenv('SERVER_INTERFACE', 'wsgi') == 'asgi':
+    wsgi_app = 'finwise.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'finwise.wsgi:application'
+
+# Log to stderr, where the platform collects it
+errorlog = '-'
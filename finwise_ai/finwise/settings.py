@@ -57,6 +57,8 @@ INSTALLED_APPS = [
     'credit',
     'dashboard',
     'agent_interface',
+    'perf',
+    'jobs',
 ]
 
 # Set the custom user model
@@ -64,7 +66,8 @@ AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'finwise.middleware.StaticFilesMiddleware',
+    'perf.middleware.PerfMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -96,12 +99,35 @@ WSGI_APPLICATION = 'finwise.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# How gunicorn runs the project (see finwise/gunicorn.conf.py): 'wsgi' with sync
+# workers, or 'asgi' with uvicorn workers that serve the async views concurrently
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi')
+
 # Use SQLite for development, PostgreSQL for production
 if 'DATABASE_URL' in os.environ:
     # Production database configuration (Heroku)
+    # DB_POOL=True hands out connections from a psycopg 3 pool in each process
+    # (PostgreSQL only, needs psycopg[pool]); otherwise each connection is kept
+    # open for DB_CONN_MAX_AGE seconds (0 reconnects on every request). Under
+    # ASGI every request queries from a thread of its own, so connections are
+    # not kept by default there and DB_POOL is the way to reuse them.
+    # Health checks make sure a reused connection is still alive.
+    DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            os.environ.get('DATABASE_URL'),
+            conn_max_age=0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 0 if SERVER_INTERFACE == 'asgi' else 60)),
+            conn_health_checks=os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        )
     }
+    
+    if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        # The pool is per process: size it for the threads of one gunicorn worker
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
 else:
     # Development database configuration
     DATABASES = {
@@ -111,6 +137,81 @@ else:
         }
     }
 
+# Cache
+# Every process must share one cache, or a write handled by one process leaves
+# the others serving stale dashboard responses. Deployments (DATABASE_URL set)
+# default to the database backend, whose table the Procfile's release step
+# creates; local development keeps a local memory cache. CACHE_BACKEND and
+# CACHE_LOCATION pick another, e.g. FileBasedCache with a shared directory.
+if 'DATABASE_URL' in os.environ:
+    DEFAULT_CACHE_BACKEND, DEFAULT_CACHE_LOCATION = 'django.core.cache.backends.db.DatabaseCache', 'finwise_cache'
+else:
+    DEFAULT_CACHE_BACKEND, DEFAULT_CACHE_LOCATION = 'django.core.cache.backends.locmem.LocMemCache', 'finwise-cache'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', DEFAULT_CACHE_BACKEND),
+        'LOCATION': os.getenv('CACHE_LOCATION', DEFAULT_CACHE_LOCATION),
+    }
+}
+
+# Seconds a cached dashboard API response is kept (entries are versioned per user)
+DASHBOARD_API_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_API_CACHE_TIMEOUT', 86400))
+
+# Request performance instrumentation (see perf.middleware); off unless PERF_ENABLED=True
+PERF_ENABLED = os.getenv('PERF_ENABLED', 'False') == 'True'
+# Slowest SQL statements kept per request
+PERF_SLOW_QUERY_COUNT = int(os.getenv('PERF_SLOW_QUERY_COUNT', 5))
+# Requests per view the /_perf/ percentiles are computed over
+PERF_WINDOW = int(os.getenv('PERF_WINDOW', 1000))
+# Share of requests (0-1) also written to PERF_SINK, a .csv or SQLite file path
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', 0))
+PERF_SINK = os.getenv('PERF_SINK', str(BASE_DIR / 'perf_samples.sqlite3'))
+
+# Background jobs (see jobs.queue), run by `manage.py run_worker` (the Procfile's
+# worker process); with JOBS_EAGER=True they run in the web process after the
+# request's transaction commits, e.g. on a deployment without a worker. Defaults
+# to DEBUG, so a plain `runserver` needs no worker. The worker also queues the
+# daily tasks (jobs.queue.daily_task), e.g. the net worth snapshot; without one,
+# run `manage.py snapshot_net_worth` from cron
+JOBS_EAGER = os.getenv('JOBS_EAGER', str(DEBUG)) == 'True'
+# Attempts before a failing job is given up, and the delay before the first retry (doubled each time)
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', 30))
+# Seconds a claimed job stays hidden from other workers before it is run again
+JOBS_VISIBILITY_TIMEOUT = int(os.getenv('JOBS_VISIBILITY_TIMEOUT', 300))
+# Days finished jobs (and their idempotency keys) are kept
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', 7))
+
+# Seconds a loan simulation can be viewed and saved after it is run (it is
+# only written to the database when saved), and days saved simulations (loans
+# and their eligibility records) are kept before `manage.py purge_simulations`
+# deletes them
+LOAN_SIMULATION_MAX_AGE = int(os.getenv('LOAN_SIMULATION_MAX_AGE', 3600))
+LOAN_SIMULATION_RETENTION_DAYS = int(os.getenv('LOAN_SIMULATION_RETENTION_DAYS', 90))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'perf': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'jobs': {
+            'handlers': ['console'],
+            'level': os.getenv('JOBS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
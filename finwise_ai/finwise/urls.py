@@ -30,6 +30,9 @@ urlpatterns = [
     path('investments/', include('investments.urls')),
     path('credit/', include('credit.urls')),
     
-    # Add agent interface when ready
-    # path('agent/', include('agent_interface.urls')),
+    # Staff-only request timings (populated when PERF_ENABLED)
+    path('_perf/', include('perf.urls')),
+    
+    # Agent prompt API (the assistant page has no template yet)
+    path('agent/', include('agent_interface.urls')),
 ]
@@ -5,6 +5,7 @@ from .models import SavingsGoal, GoalContribution, GoalMilestone
 @admin.register(SavingsGoal)
 class SavingsGoalAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'target_amount', 'current_amount', 'progress_percentage', 'status', 'priority', 'target_date']
+    list_select_related = ['user']
     list_filter = ['status', 'priority', 'target_date', 'created_at']
     search_fields = ['name', 'user__email', 'description']
     list_editable = ['status', 'priority']
@@ -37,6 +38,7 @@ class SavingsGoalAdmin(admin.ModelAdmin):
 @admin.register(GoalContribution)
 class GoalContributionAdmin(admin.ModelAdmin):
     list_display = ['goal', 'amount', 'date', 'created_at']
+    list_select_related = ['goal']
     list_filter = ['date', 'created_at']
     search_fields = ['goal__name', 'notes']
     date_hierarchy = 'date'
@@ -56,6 +58,7 @@ class GoalContributionAdmin(admin.ModelAdmin):
 @admin.register(GoalMilestone)
 class GoalMilestoneAdmin(admin.ModelAdmin):
     list_display = ['name', 'goal', 'target_amount', 'target_date', 'is_reached', 'reached_date']
+    list_select_related = ['goal']
     list_filter = ['is_reached', 'target_date', 'reached_date']
     search_fields = ['name', 'goal__name']
     list_editable = ['is_reached', 'reached_date']
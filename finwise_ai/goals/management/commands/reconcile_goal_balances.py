@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from goals.models import SavingsGoal
+from goals.utils import get_goal_balance_mismatches, check_milestones
+
+class Command(BaseCommand):
+    help = 'Checks every savings goal balance against the sum of its contributions and fixes drift'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report mismatched goals')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of goals fixed per query')
+    
+    def handle(self, *args, **options):
+        mismatches = get_goal_balance_mismatches()
+        
+        for goal, contributed in mismatches:
+            self.stdout.write(f'Goal {goal.pk} ({goal.name}): stored {goal.current_amount}, contributions {contributed}')
+        
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All goal balances match their contributions'))
+            return
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(mismatches)} goal balances are out of sync'))
+            return
+        
+        with transaction.atomic():
+            goals = []
+            for goal, contributed in mismatches:
+                goal.current_amount = contributed
+                goals.append(goal)
+            SavingsGoal.objects.bulk_update(goals, ['current_amount'], batch_size=options['batch_size'])
+            
+            for goal in goals:
+                check_milestones(goal.pk)
+        
+        self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatches)} goal balances'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goalcontribution',
+            index=models.Index(fields=['goal', 'date'], name='contribution_goal_date_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from accounts.models import User
 
 class SavingsGoal(models.Model):
@@ -72,23 +72,50 @@ class GoalContribution(models.Model):
     def __str__(self):
         return f"Contribution to {self.goal.name} - {self.amount}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded goal and amount so the balance can be adjusted on save."""
+        instance = super().from_db(db, field_names, values)
+        if 'goal_id' in instance.__dict__ and 'amount' in instance.__dict__:
+            instance._balance_state = (instance.goal_id, instance.amount)
+        return instance
+    
     def save(self, *args, **kwargs):
-        """Override save to update the goal's current amount."""
-        super().save(*args, **kwargs)
+        """Override save to move the goal's current amount by this contribution."""
+        from .utils import adjust_goal_balance
+        
+        previous = getattr(self, '_balance_state', None)
+        current = (self.goal_id, self.amount)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            if previous != current:
+                if previous:
+                    adjust_goal_balance(previous[0], -previous[1])
+                adjust_goal_balance(self.goal_id, self.amount)
+        
+        self._balance_state = current
+        self.goal.refresh_from_db(fields=['current_amount', 'status'])
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to take this contribution out of the goal's current amount."""
+        from .utils import adjust_goal_balance
         
-        # Update the goal's current amount
-        self.goal.current_amount = sum(
-            contribution.amount for contribution in self.goal.contributions.all()
-        )
+        goal_id, amount = getattr(self, '_balance_state', (self.goal_id, self.amount))
         
-        # Check if goal is completed
-        if self.goal.current_amount >= self.goal.target_amount:
-            self.goal.status = 'completed'
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            adjust_goal_balance(goal_id, -amount)
         
-        self.goal.save()
+        self.goal.refresh_from_db(fields=['current_amount', 'status'])
+        return result
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['goal', 'date'], name='contribution_goal_date_idx'),
+        ]
 
 
 class GoalMilestone(models.Model):
@@ -0,0 +1,49 @@
+from django.db.models import Sum, F, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from decimal import Decimal
+from .models import SavingsGoal, GoalMilestone
+
+AMOUNT_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+def adjust_goal_balance(goal_id, delta):
+    """Add delta to a goal's balance in the database, then mark what it has reached.
+    
+    The balance is moved with an F() expression so concurrent contributions
+    can't overwrite each other. Call it inside a transaction.
+    """
+    SavingsGoal.objects.filter(pk=goal_id).update(
+        current_amount=F('current_amount') + Value(delta, output_field=AMOUNT_FIELD)
+    )
+    
+    # Check if goal is completed
+    SavingsGoal.objects.filter(
+        pk=goal_id,
+        current_amount__gte=F('target_amount')
+    ).exclude(status='completed').update(status='completed')
+    
+    check_milestones(goal_id)
+
+def check_milestones(goal_id, today=None):
+    """Mark every milestone the goal's balance has passed as reached with one UPDATE."""
+    return GoalMilestone.objects.filter(
+        goal_id=goal_id,
+        is_reached=False,
+        target_amount__lte=F('goal__current_amount')
+    ).update(
+        is_reached=True,
+        reached_date=today or timezone.now().date()
+    )
+
+def get_goal_balance_mismatches(goals=None):
+    """Find goals whose stored balance differs from the sum of their contributions.
+    
+    Returns (goal, contributed total) pairs, computed with one grouped query.
+    """
+    goals = SavingsGoal.objects.all() if goals is None else goals
+    
+    goals = goals.annotate(
+        contributed=Coalesce(Sum('contributions__amount'), Value(Decimal('0'), output_field=AMOUNT_FIELD))
+    ).exclude(current_amount=F('contributed')).order_by('pk')
+    
+    return [(goal, goal.contributed) for goal in goals]
@@ -1,4 +1,4 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
@@ -169,7 +169,9 @@ def goal_edit(request, pk):
     if request.method == 'POST':
         form = SavingsGoalForm(request.POST, instance=goal)
         if form.is_valid():
-            form.save()
+            # Leave current_amount alone, contributions keep it up to date
+            goal = form.save(commit=False)
+            goal.save(update_fields=[*SavingsGoalForm._meta.fields, 'updated_at'])
             messages.success(request, 'Savings goal updated successfully!')
             return redirect('goals:goal_detail', pk=goal.pk)
     else:
@@ -213,21 +215,13 @@ def contribution_add(request, goal_id):
         if form.is_valid():
             contribution = form.save(commit=False)
             contribution.goal = goal
-            contribution.save()
             
-            # Update goal's current amount
-            goal.current_amount += contribution.amount
+            # Saving moves the goal's balance and marks reached milestones in one transaction
+            contribution.save()
             
-            # Check if goal is completed
             if goal.current_amount >= goal.target_amount:
-                goal.status = 'completed'
                 messages.success(request, 'Congratulations! You have reached your savings goal!')
             
-            goal.save()
-            
-            # Check if any milestones are reached
-            check_milestones(goal)
-            
             messages.success(request, 'Contribution added successfully!')
             return redirect('goals:goal_detail', pk=goal.pk)
     else:
@@ -247,10 +241,7 @@ def contribution_delete(request, pk):
     goal = contribution.goal
     
     if request.method == 'POST':
-        # Update goal's current amount
-        goal.current_amount -= contribution.amount
-        goal.save()
-        
+        # Deleting takes the amount back out of the goal's balance
         contribution.delete()
         messages.success(request, 'Contribution deleted successfully!')
         return redirect('goals:goal_detail', pk=goal.pk)
@@ -400,9 +391,10 @@ def savings_plan(request):
     return render(request, 'goals/savings_plan_form.html', context)
 
 @login_required
-def goal_progress_chart(request, pk):
+async def goal_progress_chart(request, pk):
     """API view for goal progress chart data."""
-    goal = get_object_or_404(SavingsGoal, pk=pk, user=request.user)
+    user = await request.auser()
+    goal = await aget_object_or_404(SavingsGoal, pk=pk, user=user)
     
     # Get contributions
     contributions = GoalContribution.objects.filter(goal=goal).order_by('date')
@@ -411,7 +403,7 @@ def goal_progress_chart(request, pk):
     contribution_history = []
     running_total = 0
     
-    for contrib in contributions:
+    async for contrib in contributions:
         running_total += contrib.amount
         contribution_history.append({
             'date': contrib.date.strftime('%Y-%m-%d'),
@@ -456,19 +448,6 @@ def goal_progress_chart(request, pk):
 
 # Helper functions
 
-def check_milestones(goal):
-    """Check if any milestones are reached for a goal."""
-    milestones = GoalMilestone.objects.filter(
-        goal=goal,
-        is_reached=False,
-        target_amount__lte=goal.current_amount
-    )
-    
-    for milestone in milestones:
-        milestone.is_reached = True
-        milestone.reached_date = timezone.now().date()
-        milestone.save()
-
 def generate_savings_plan(current_savings, target_amount, months_remaining, disposable_income, risk_tolerance):
     """Generate a savings plan based on user inputs."""
     amount_needed = target_amount - current_savings
@@ -22,6 +22,7 @@ class InvestmentTypeAdmin(admin.ModelAdmin):
 @admin.register(Investment)
 class InvestmentAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'investment_type', 'symbol', 'quantity', 'purchase_price', 'current_price', 'profit_loss_percentage', 'status']
+    list_select_related = ['user', 'investment_type']
     list_filter = ['status', 'investment_type', 'is_simulation', 'purchase_date']
     search_fields = ['name', 'symbol', 'user__email', 'notes']
     list_editable = ['current_price', 'status']
@@ -55,6 +56,7 @@ class InvestmentAdmin(admin.ModelAdmin):
 @admin.register(InvestmentTransaction)
 class InvestmentTransactionAdmin(admin.ModelAdmin):
     list_display = ['investment', 'transaction_type', 'date', 'price', 'quantity', 'fees']
+    list_select_related = ['investment']
     list_filter = ['transaction_type', 'date']
     search_fields = ['investment__name', 'investment__symbol', 'notes']
     date_hierarchy = 'date'
@@ -77,6 +79,7 @@ class InvestmentTransactionAdmin(admin.ModelAdmin):
 @admin.register(InvestmentSimulation)
 class InvestmentSimulationAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'investment_type', 'strategy', 'initial_amount', 'duration_years', 'expected_return', 'created_at']
+    list_select_related = ['user', 'investment_type']
     list_filter = ['strategy', 'investment_type', 'created_at']
     search_fields = ['name', 'user__email']
     date_hierarchy = 'created_at'
@@ -94,11 +97,18 @@ class InvestmentSimulationAdmin(admin.ModelAdmin):
             'fields': ('expected_return', 'volatility', 'inflation_rate')
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        # The stored result was run with the old parameters
+        if change and form.changed_data:
+            obj.result_data = None
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(SimulationResult)
 class SimulationResultAdmin(admin.ModelAdmin):
     list_display = ['simulation', 'year', 'month', 'investment_value', 'cumulative_investment', 'profit_loss']
+    list_select_related = ['simulation']
     list_filter = ['simulation', 'year']
     search_fields = ['simulation__name']
     raw_id_fields = ['simulation']
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(condition=models.Q(('is_simulation', False), ('status', 'active')), fields=['user', 'created_at'], name='investment_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investmenttransaction',
+            index=models.Index(fields=['investment', 'date'], name='invtransaction_inv_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0002_investment_investment_active_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investmentsimulation',
+            name='mean_final_value',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='investmentsimulation',
+            name='probability_of_loss',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='investmentsimulation',
+            name='result_data',
+            field=models.BinaryField(null=True),
+        ),
+    ]
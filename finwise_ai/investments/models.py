@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import User
+from .utils import pack_simulation_result, unpack_simulation_result
 
 class InvestmentType(models.Model):
     """Model for investment types."""
@@ -79,6 +80,9 @@ class Investment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], condition=models.Q(status='active', is_simulation=False), name='investment_active_idx'),
+        ]
 
 
 class InvestmentTransaction(models.Model):
@@ -105,6 +109,9 @@ class InvestmentTransaction(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['investment', 'date'], name='invtransaction_inv_date_idx'),
+        ]
 
 
 class InvestmentSimulation(models.Model):
@@ -126,11 +133,28 @@ class InvestmentSimulation(models.Model):
     expected_return = models.DecimalField(max_digits=5, decimal_places=2)  # Annual percentage
     volatility = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # Standard deviation
     inflation_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # Annual percentage
+    # Result of the last run (see investments.utils.pack_simulation_result), null until run
+    result_data = models.BinaryField(null=True, editable=False)
+    mean_final_value = models.FloatField(null=True, editable=False)
+    probability_of_loss = models.FloatField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"{self.name} - {self.get_strategy_display()}"
     
+    @property
+    def result(self):
+        """The stored simulation result, or None if the simulation has not been run."""
+        if self.result_data is None:
+            return None
+        return unpack_simulation_result(self.result_data, self.mean_final_value, self.probability_of_loss)
+    
+    def store_result(self, result):
+        """Keep a simulation result in compact form (call save() to write it)."""
+        self.result_data = pack_simulation_result(result)
+        self.mean_final_value = result['mean_final_value']
+        self.probability_of_loss = result['probability_of_loss']
+    
     class Meta:
         ordering = ['-created_at']
 
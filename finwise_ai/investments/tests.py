@@ -0,0 +1,52 @@
+from decimal import Decimal
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from accounts.models import User
+from .models import InvestmentSimulation
+from .utils import PERCENTILES, simulate_strategy_paths
+from .views import get_simulation_result, run_investment_simulation
+
+class SimulateStrategyPathsTests(SimpleTestCase):
+    """The Monte Carlo engine must be reproducible from its seed."""
+    
+    def simulate(self, strategy, seed):
+        return simulate_strategy_paths(strategy, 1000, 100, 5, 7, 15, period_months=3, n_paths=500, seed=seed)
+    
+    def test_same_seed_gives_same_bands(self):
+        for strategy in ('lump_sum', 'dca', 'value_averaging'):
+            with self.subTest(strategy=strategy):
+                first, second = self.simulate(strategy, 42), self.simulate(strategy, 42)
+                
+                for percentile in PERCENTILES:
+                    np.testing.assert_array_equal(first['percentiles'][percentile], second['percentiles'][percentile])
+                np.testing.assert_array_equal(first['invested'], second['invested'])
+                self.assertEqual(first['mean_final_value'], second['mean_final_value'])
+                self.assertEqual(first['probability_of_loss'], second['probability_of_loss'])
+    
+    def test_different_seed_gives_different_bands(self):
+        first, second = self.simulate('dca', 1), self.simulate('dca', 2)
+        self.assertFalse(np.array_equal(first['percentiles'][50], second['percentiles'][50]))
+
+
+class SimulationStorageTests(TestCase):
+    """Simulation results stored as float32 bytes must load back unchanged."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='simulation@example.com', password='password')
+        self.simulation = InvestmentSimulation.objects.create(
+            user=self.user, name='Retirement', strategy='dca', initial_amount=Decimal('1000.00'),
+            periodic_amount=Decimal('200.00'), duration_years=10, expected_return=Decimal('7.00'), volatility=Decimal('15.00')
+        )
+    
+    def test_bands_survive_a_round_trip(self):
+        get_simulation_result(self.simulation)
+        expected = run_investment_simulation(self.simulation)
+        
+        stored = InvestmentSimulation.objects.get(pk=self.simulation.pk).result
+        self.assertEqual(stored['months'], 120)
+        
+        for percentile in PERCENTILES:
+            np.testing.assert_array_equal(stored['percentiles'][percentile], expected['percentiles'][percentile].astype(np.float32))
+        np.testing.assert_array_equal(stored['invested'], expected['invested'].astype(np.float32))
+        self.assertEqual(stored['mean_final_value'], expected['mean_final_value'])
+        self.assertEqual(stored['probability_of_loss'], expected['probability_of_loss'])
@@ -0,0 +1,151 @@
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_PATHS = 10000
+
+def simulate_strategy_paths(strategy, initial_amount, periodic_amount, duration_years, expected_return, volatility, period_months=1, n_paths=DEFAULT_PATHS, seed=None):
+    """Run a Monte Carlo simulation of an investment strategy.
+    
+    Monthly returns for every path are drawn in a single call as one
+    (months x paths) matrix and contributions are applied to all paths at
+    once, so 10,000 paths over 30 years take a fraction of a second.
+    Passing the same seed reproduces the same result.
+    
+    Strategies:
+        lump_sum: the initial amount is invested once, nothing is added.
+        dca: periodic_amount is added every period_months months.
+        value_averaging: every period_months months the contribution tops the
+            portfolio up to initial_amount + k * periodic_amount (never sells).
+    
+    Returns a dict with the percentile bands of the portfolio value for each
+    month, the (mean) amount invested by each month, the mean final value and
+    the probability of ending below the amount invested.
+    """
+    initial_amount = float(initial_amount)
+    periodic_amount = float(periodic_amount)
+    period_months = max(1, int(period_months))
+    n_months = int(duration_years * 12)
+    
+    # Convert annual figures to monthly
+    monthly_return = (1 + float(expected_return) / 100) ** (1 / 12) - 1
+    monthly_volatility = float(volatility) / 100 / np.sqrt(12)
+    
+    # One row per month so that per-month operations touch contiguous memory
+    rng = np.random.default_rng(seed)
+    growth = 1 + rng.normal(monthly_return, monthly_volatility, size=(n_months, n_paths))
+    
+    # A month can wipe out a position but never take it below zero
+    np.maximum(growth, 0, out=growth)
+    
+    # Contributions are made at the start of months 0, period_months, 2 * period_months, ...
+    contribution_months = np.arange(n_months) % period_months == 0
+    
+    values = np.empty((n_months + 1, n_paths))
+    values[0] = initial_amount
+    
+    if strategy == 'lump_sum':
+        np.cumprod(growth, axis=0, out=values[1:])
+        values[1:] *= initial_amount
+        invested = np.full(n_months + 1, initial_amount)
+        final_invested = initial_amount
+    
+    elif strategy == 'dca':
+        contributions = np.where(contribution_months, periodic_amount, 0.0)
+        for month in range(n_months):
+            np.multiply(values[month] + contributions[month], growth[month], out=values[month + 1])
+        invested = initial_amount + np.concatenate(([0.0], np.cumsum(contributions)))
+        final_invested = invested[-1]
+    
+    elif strategy == 'value_averaging':
+        total_invested = np.full(n_paths, initial_amount)
+        invested = np.empty(n_months + 1)
+        invested[0] = initial_amount
+        target = initial_amount
+        for month in range(n_months):
+            current = values[month]
+            if contribution_months[month]:
+                target += periodic_amount
+                contribution = np.maximum(target - current, 0)
+                total_invested += contribution
+                current = current + contribution
+            np.multiply(current, growth[month], out=values[month + 1])
+            invested[month + 1] = total_invested.mean()
+        final_invested = total_invested
+    
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    
+    final_values = values[-1]
+    mean_final_value = float(final_values.mean())
+    probability_of_loss = float(np.mean(final_values < final_invested))
+    
+    # Sorting each month's values is cheaper than np.percentile on the full matrix
+    values.sort(axis=1)
+    positions = np.array(PERCENTILES) / 100 * (n_paths - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.ceil(positions).astype(int)
+    weights = positions - lower
+    bands = values[:, lower] * (1 - weights) + values[:, upper] * weights
+    
+    return {
+        'months': n_months,
+        'n_paths': n_paths,
+        'seed': seed,
+        'percentiles': {percentile: bands[:, index] for index, percentile in enumerate(PERCENTILES)},
+        'invested': invested,
+        'mean_final_value': mean_final_value,
+        'probability_of_loss': probability_of_loss,
+    }
+
+def pack_simulation_result(result):
+    """Encode the invested amounts and percentile bands of a simulation result as float32 bytes.
+    
+    One row per series (invested, then each of PERCENTILES) and one column
+    per month, so a 30-year result takes under 9 kB however many paths
+    were run.
+    """
+    rows = [result['invested']] + [result['percentiles'][percentile] for percentile in PERCENTILES]
+    return np.asarray(rows, dtype=np.float32).tobytes()
+
+def unpack_simulation_result(data, mean_final_value, probability_of_loss):
+    """Decode pack_simulation_result bytes into a simulation result.
+    
+    The series are read-only views of ``data``, not copies.
+    """
+    rows = np.frombuffer(data, dtype=np.float32).reshape(len(PERCENTILES) + 1, -1)
+    
+    return {
+        'months': rows.shape[1] - 1,
+        'percentiles': {percentile: rows[index + 1] for index, percentile in enumerate(PERCENTILES)},
+        'invested': rows[0],
+        'mean_final_value': mean_final_value,
+        'probability_of_loss': probability_of_loss,
+    }
+
+def simulation_points(result):
+    """Turn a simulation result into one chart point per month.
+    
+    'value' is the median path; the other bands are exposed as p5 ... p95.
+    Amounts are rounded to cents.
+    """
+    bands = {percentile: np.round(band.astype(float), 2).tolist() for percentile, band in result['percentiles'].items()}
+    invested = np.round(np.asarray(result['invested'], dtype=float), 2).tolist()
+    
+    return [{
+        'period': month,
+        'value': bands[50][month],
+        'invested': invested[month],
+        **{f'p{percentile}': bands[percentile][month] for percentile in PERCENTILES},
+    } for month in range(result['months'] + 1)]
+
+def simulation_summary(result):
+    """Summarize the final distribution of a simulation result."""
+    bands = result['percentiles']
+    final_invested = float(result['invested'][-1])
+    
+    return {
+        'invested': final_invested,
+        'mean': result['mean_final_value'],
+        'probability_of_loss': result['probability_of_loss'] * 100,
+        **{f'p{percentile}': float(bands[percentile][-1]) for percentile in PERCENTILES},
+    }
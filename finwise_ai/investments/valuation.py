@@ -0,0 +1,70 @@
+from decimal import Decimal
+from django.db.models import Sum, Count, F, DecimalField
+from django.db.models.functions import Coalesce
+from .models import InvestmentType, Investment
+
+# Wide enough for price * quantity (2 + 6 decimal places) summed over many holdings
+AMOUNT_FIELD = DecimalField(max_digits=24, decimal_places=8)
+
+# Value of a holding at its last known price (the purchase price until one is recorded)
+MARKET_VALUE = Coalesce('current_price', 'purchase_price') * F('quantity')
+COST_BASIS = F('purchase_price') * F('quantity')
+
+# Category labels in display order; holdings without a type are shown last
+CATEGORY_LABELS = dict(InvestmentType.CATEGORY_CHOICES)
+UNCATEGORIZED_LABEL = 'Uncategorized'
+
+def active_investments(user):
+    """The user's real (not simulated) holdings that have not been sold."""
+    return Investment.objects.filter(user=user, status='active', is_simulation=False)
+
+def portfolio_valuation(user=None, investments=None):
+    """Value a portfolio with one query grouped by investment category.
+    
+    Values the user's active investments, or ``investments`` when given.
+    Returns the totals (value, cost, profit_loss, return_percentage,
+    holdings and the average risk level) and an 'allocation' list with the
+    value, cost, profit_loss and share of the portfolio of each category,
+    in CATEGORY_CHOICES order. Amounts are Decimals.
+    """
+    if investments is None:
+        investments = active_investments(user)
+    
+    rows = investments.values('investment_type__category').annotate(
+        value=Sum(MARKET_VALUE, output_field=AMOUNT_FIELD),
+        cost=Sum(COST_BASIS, output_field=AMOUNT_FIELD),
+        holdings=Count('pk'),
+        typed_holdings=Count('investment_type'),
+        risk=Sum('investment_type__risk_level'),
+    ).order_by()
+    
+    order = list(CATEGORY_LABELS)
+    rows = sorted(rows, key=lambda row: order.index(row['investment_type__category']) if row['investment_type__category'] in order else len(order))
+    
+    total_value = sum((row['value'] or Decimal('0') for row in rows), Decimal('0'))
+    total_cost = sum((row['cost'] or Decimal('0') for row in rows), Decimal('0'))
+    typed_holdings = sum(row['typed_holdings'] for row in rows)
+    
+    allocation = []
+    for row in rows:
+        value = row['value'] or Decimal('0')
+        cost = row['cost'] or Decimal('0')
+        allocation.append({
+            'category': row['investment_type__category'],
+            'label': CATEGORY_LABELS.get(row['investment_type__category'], UNCATEGORIZED_LABEL),
+            'value': value,
+            'cost': cost,
+            'profit_loss': value - cost,
+            'holdings': row['holdings'],
+            'percentage': (value / total_value * 100) if total_value > 0 else Decimal('0'),
+        })
+    
+    return {
+        'value': total_value,
+        'cost': total_cost,
+        'profit_loss': total_value - total_cost,
+        'return_percentage': ((total_value - total_cost) / total_cost * 100) if total_cost > 0 else Decimal('0'),
+        'holdings': sum(row['holdings'] for row in rows),
+        'avg_risk': sum(row['risk'] or 0 for row in rows) / typed_holdings if typed_holdings else 0,
+        'allocation': allocation,
+    }
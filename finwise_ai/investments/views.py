@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from .models import InvestmentType, Investment, InvestmentSimulation, InvestmentTransaction
 from .forms import InvestmentTypeForm, InvestmentForm, InvestmentTransactionForm, InvestmentSimulationForm
+from .utils import simulate_strategy_paths, simulation_points, simulation_summary
+from .valuation import portfolio_valuation
 import json
 import numpy as np
 import pandas as pd
@@ -19,7 +21,7 @@ def investments_home(request):
         user=request.user,
         status='active',
         is_simulation=False
-    ).order_by('-purchase_date')
+    ).select_related('investment_type').order_by('-purchase_date')
     
     # Get user's simulated investments
     simulated_investments = Investment.objects.filter(
@@ -27,28 +29,18 @@ def investments_home(request):
         is_simulation=True
     ).order_by('-created_at')[:5]
     
-    # Calculate total portfolio value
-    total_value = sum(inv.current_value for inv in active_investments)
-    total_cost = sum(inv.purchase_price * inv.quantity for inv in active_investments)
+    # Value the portfolio and its breakdown by category in one query
+    valuation = portfolio_valuation(request.user)
+    total_value = valuation['value']
+    total_cost = valuation['cost']
+    total_return = valuation['profit_loss']
+    total_return_percentage = valuation['return_percentage']
     
-    # Calculate total return
-    total_return = total_value - total_cost
-    total_return_percentage = (total_return / total_cost * 100) if total_cost > 0 else 0
-    
-    # Get portfolio breakdown by category
-    portfolio_breakdown = []
-    categories = InvestmentType.CATEGORY_CHOICES
-    
-    for category_code, category_name in categories:
-        category_investments = active_investments.filter(investment_type__category=category_code)
-        category_value = sum(inv.current_value for inv in category_investments)
-        
-        if category_value > 0:
-            portfolio_breakdown.append({
-                'category': category_name,
-                'value': category_value,
-                'percentage': (category_value / total_value * 100) if total_value > 0 else 0
-            })
+    portfolio_breakdown = [{
+        'category': category['label'],
+        'value': category['value'],
+        'percentage': category['percentage'],
+    } for category in valuation['allocation'] if category['value'] > 0]
     
     # Get recent transactions
     recent_transactions = InvestmentTransaction.objects.filter(
@@ -58,7 +50,7 @@ def investments_home(request):
     context = {
         'active_investments': active_investments,
         'simulated_investments': simulated_investments,
-        'investments_count': active_investments.count(),
+        'investments_count': valuation['holdings'],
         'total_portfolio_value': total_value,
         'total_returns': total_return,
         'return_percentage': total_return_percentage,
@@ -79,7 +71,7 @@ def investment_list(request):
     investments = Investment.objects.filter(
         user=request.user,
         is_simulation=False
-    ).order_by('-purchase_date')
+    ).select_related('investment_type').order_by('-purchase_date')
     
     context = {
         'investments': investments,
@@ -353,10 +345,10 @@ def investment_simulator(request):
             simulation.user = request.user
             simulation.save()
             
-            # Run the simulation
-            run_investment_simulation(simulation)
+            # Run it once now; the result page reads the stored result
+            get_simulation_result(simulation)
             
-            return redirect('investment_simulation_result', pk=simulation.pk)
+            return redirect('investments:investment_simulation_result', pk=simulation.pk)
     else:
         form = InvestmentSimulationForm()
     
@@ -371,12 +363,14 @@ def investment_simulation_result(request, pk):
     """View for displaying investment simulation results."""
     simulation = get_object_or_404(InvestmentSimulation, pk=pk, user=request.user)
     
-    # Get simulation data
-    simulation_data = json.loads(simulation.simulation_data)
+    # Stored when the simulation was created (run now for older simulations)
+    result = get_simulation_result(simulation)
+    simulation_data = simulation_points(result)
+    summary = simulation_summary(result)
     
-    # Calculate key metrics
-    final_value = simulation_data[-1]['value']
-    total_invested = simulation.initial_amount + (simulation.periodic_amount * (simulation.duration_years * 12 / simulation.period_months))
+    # Calculate key metrics from the median outcome
+    final_value = summary['p50']
+    total_invested = summary['invested']
     total_return = final_value - total_invested
     return_percentage = (total_return / total_invested * 100) if total_invested > 0 else 0
     annualized_return = ((final_value / total_invested) ** (1 / simulation.duration_years) - 1) * 100 if simulation.duration_years > 0 and total_invested > 0 else 0
@@ -384,11 +378,13 @@ def investment_simulation_result(request, pk):
     context = {
         'simulation': simulation,
         'simulation_data': json.dumps(simulation_data),
+        'summary': summary,
         'final_value': final_value,
         'total_invested': total_invested,
         'total_return': total_return,
         'return_percentage': return_percentage,
         'annualized_return': annualized_return,
+        'probability_of_loss': summary['probability_of_loss'],
     }
     
     return render(request, 'investments/investment_simulation_result.html', context)
@@ -405,43 +401,40 @@ def compare_strategies(request):
         expected_return = float(request.POST.get('expected_return', 7))
         volatility = float(request.POST.get('volatility', 15))
         
-        # Run simulations for different strategies
-        lump_sum_data = simulate_strategy(
-            'lump_sum',
-            initial_amount + (monthly_amount * duration_years * 12),
-            0,
-            duration_years,
-            expected_return,
-            volatility
-        )
+        # Optional seed so a comparison can be reproduced
+        seed = request.POST.get('seed', '')
+        seed = int(seed) if seed.isdigit() else int(np.random.SeedSequence().entropy % 2 ** 32)
         
-        dca_data = simulate_strategy(
-            'dca',
-            initial_amount,
-            monthly_amount,
-            duration_years,
-            expected_return,
-            volatility
-        )
+        # Run simulations for different strategies on the same random returns
+        results = {}
+        for strategy, initial, periodic in (
+            ('lump_sum', initial_amount + (monthly_amount * duration_years * 12), 0),
+            ('dca', initial_amount, monthly_amount),
+            ('value_averaging', initial_amount, monthly_amount),
+        ):
+            results[strategy] = simulate_strategy_paths(
+                strategy,
+                initial,
+                periodic,
+                duration_years,
+                expected_return,
+                volatility,
+                seed=seed
+            )
         
-        value_averaging_data = simulate_strategy(
-            'value_averaging',
-            initial_amount,
-            monthly_amount,
-            duration_years,
-            expected_return,
-            volatility
-        )
+        lump_sum_summary = simulation_summary(results['lump_sum'])
+        dca_summary = simulation_summary(results['dca'])
+        value_averaging_summary = simulation_summary(results['value_averaging'])
         
-        # Calculate final values
-        lump_sum_final = lump_sum_data[-1]['value']
-        dca_final = dca_data[-1]['value']
-        value_averaging_final = value_averaging_data[-1]['value']
+        # Final values are the median outcomes
+        lump_sum_final = lump_sum_summary['p50']
+        dca_final = dca_summary['p50']
+        value_averaging_final = value_averaging_summary['p50']
         
         # Calculate total invested
-        lump_sum_invested = initial_amount + (monthly_amount * duration_years * 12)
-        dca_invested = initial_amount + (monthly_amount * duration_years * 12)
-        value_averaging_invested = initial_amount + sum(point.get('contribution', 0) for point in value_averaging_data)
+        lump_sum_invested = lump_sum_summary['invested']
+        dca_invested = dca_summary['invested']
+        value_averaging_invested = value_averaging_summary['invested']
         
         context = {
             'investment_type': investment_type,
@@ -450,9 +443,18 @@ def compare_strategies(request):
             'duration_years': duration_years,
             'expected_return': expected_return,
             'volatility': volatility,
-            'lump_sum_data': json.dumps(lump_sum_data),
-            'dca_data': json.dumps(dca_data),
-            'value_averaging_data': json.dumps(value_averaging_data),
+            'seed': seed,
+            'lump_sum_data': json.dumps(simulation_points(results['lump_sum'])),
+            'dca_data': json.dumps(simulation_points(results['dca'])),
+            'value_averaging_data': json.dumps(simulation_points(results['value_averaging'])),
+            'lump_sum_summary': lump_sum_summary,
+            'dca_summary': dca_summary,
+            'value_averaging_summary': value_averaging_summary,
+            'strategy_summaries': [
+                ('Toplu Yatırım', lump_sum_summary),
+                ('Düzenli Yatırım (DCA)', dca_summary),
+                ('Değer Ortalaması', value_averaging_summary),
+            ],
             'lump_sum_final': lump_sum_final,
             'dca_final': dca_final,
             'value_averaging_final': value_averaging_final,
@@ -480,34 +482,27 @@ def portfolio_analysis(request):
         user=request.user,
         status='active',
         is_simulation=False
-    )
+    ).select_related('investment_type')
+    
+    # Value the portfolio and its allocation by category in one query
+    valuation = portfolio_valuation(request.user)
     
-    if not investments.exists():
+    if not valuation['holdings']:
         messages.info(request, 'You need to add investments to your portfolio before analyzing it.')
         return redirect('investments:investment_list')
     
-    # Calculate portfolio metrics
-    total_value = sum(inv.current_value for inv in investments)
-    total_cost = sum(inv.purchase_price * inv.quantity for inv in investments)
+    total_value = valuation['value']
+    total_cost = valuation['cost']
+    total_return = valuation['profit_loss']
+    return_percentage = valuation['return_percentage']
     
-    # Calculate allocation by category
-    allocation = {}
-    for inv in investments:
-        category = inv.investment_type.get_category_display()
-        if category not in allocation:
-            allocation[category] = 0
-        allocation[category] += inv.current_value
-    
-    # Convert to percentages
-    allocation_percentages = {k: (v / total_value * 100) for k, v in allocation.items()}
+    # Allocation by category, in amounts and percentages
+    allocation = {category['label']: category['value'] for category in valuation['allocation']}
+    allocation_percentages = {category['label']: category['percentage'] for category in valuation['allocation']}
     
     # Calculate risk metrics
     # (In a real app, this would use historical data and more sophisticated calculations)
-    avg_risk = sum(inv.investment_type.risk_level for inv in investments) / len(investments)
-    
-    # Calculate performance metrics
-    total_return = total_value - total_cost
-    return_percentage = (total_return / total_cost * 100) if total_cost > 0 else 0
+    avg_risk = valuation['avg_risk']
     
     context = {
         'investments': investments,
@@ -517,7 +512,7 @@ def portfolio_analysis(request):
         'return_percentage': return_percentage,
         'allocation': allocation,
         'allocation_percentages': allocation_percentages,
-        'allocation_json': json.dumps(allocation),
+        'allocation_json': json.dumps({label: float(value) for label, value in allocation.items()}),
         'avg_risk': avg_risk,
     }
     
@@ -526,92 +521,24 @@ def portfolio_analysis(request):
 # Helper functions
 
 def run_investment_simulation(simulation):
-    """Run an investment simulation and store the results."""
-    # Get simulation parameters
-    initial_amount = simulation.initial_amount
-    periodic_amount = simulation.periodic_amount
-    period_months = simulation.period_months
-    duration_years = simulation.duration_years
-    expected_return = simulation.expected_return
-    volatility = simulation.volatility
-    strategy = simulation.strategy
-    
-    # Run the appropriate simulation
-    simulation_data = simulate_strategy(
-        strategy,
-        initial_amount,
-        periodic_amount,
-        duration_years,
-        expected_return,
-        volatility,
-        period_months
+    """Run an investment simulation and return its percentile results (seeded by the simulation, so they are reproducible)."""
+    return simulate_strategy_paths(
+        simulation.strategy,
+        simulation.initial_amount,
+        simulation.periodic_amount,
+        simulation.duration_years,
+        simulation.expected_return,
+        simulation.volatility,
+        simulation.period_months,
+        seed=simulation.pk
     )
-    
-    # Store simulation results
-    simulation.simulation_data = json.dumps(simulation_data)
-    simulation.save()
 
-def simulate_strategy(strategy, initial_amount, periodic_amount, duration_years, expected_return, volatility, period_months=1):
-    """Simulate an investment strategy and return the results."""
-    # Convert annual return to monthly
-    monthly_return = (1 + expected_return / 100) ** (1/12) - 1
-    monthly_volatility = volatility / 100 / np.sqrt(12)
-    
-    # Calculate number of periods
-    num_periods = int(duration_years * 12 / period_months)
-    
-    # Initialize simulation data
-    simulation_data = []
-    current_value = initial_amount
-    total_invested = initial_amount
-    
-    # Run simulation
-    for period in range(num_periods + 1):
-        if period == 0:
-            # Initial state
-            simulation_data.append({
-                'period': period,
-                'value': current_value,
-                'invested': total_invested,
-                'return': 0
-            })
-            continue
-        
-        # Calculate return for this period
-        if strategy == 'lump_sum':
-            # Lump sum: all money invested at the beginning
-            contribution = 0 if period > 1 else 0  # No additional contributions
-            
-        elif strategy == 'dca':
-            # Dollar cost averaging: regular contributions
-            contribution = periodic_amount
-            
-        elif strategy == 'value_averaging':
-            # Value averaging: adjust contributions to reach target value
-            target_value = initial_amount + (period * periodic_amount)
-            contribution = max(0, target_value - current_value)
-        
-        # Add contribution
-        current_value += contribution
-        total_invested += contribution
-        
-        # Calculate return with randomness
-        period_return = np.random.normal(monthly_return, monthly_volatility) * current_value
-        current_value += period_return
-        
-        # Ensure value doesn't go negative
-        current_value = max(0, current_value)
-        
-        # Store data point
-        simulation_data.append({
-            'period': period,
-            'value': current_value,
-            'contribution': contribution,
-            'return': period_return,
-            'invested': total_invested
-        })
-    
-    return simulation_data
+def get_simulation_result(simulation):
+    """Return a simulation's stored result, running and storing it first if there is none."""
+    if simulation.result_data is None:
+        simulation.store_result(run_investment_simulation(simulation))
+        simulation.save(update_fields=['result_data', 'mean_final_value', 'probability_of_loss'])
+    return simulation.result
 
 def calculate_interest_rate(investment_type, credit_score, employment_years):
     """Calculate interest rate based on investment type, credit score, and employment history."""
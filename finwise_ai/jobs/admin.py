@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'idempotency_key', 'last_error']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['created_at', 'updated_at', 'finished_at']
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.queue import claim_jobs, enqueue_daily_tasks, fail_expired_jobs, purge_jobs
+from jobs.workers import init_process, execute
+
+# Seconds between sweeps for expired locks and old finished jobs (and queuing the daily tasks)
+MAINTENANCE_INTERVAL = 60
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs with a pool of threads or processes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='Run jobs in threads (I/O-bound tasks) or processes (CPU-bound tasks)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run at the same time')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--visibility-timeout', type=int, default=settings.JOBS_VISIBILITY_TIMEOUT, help='Seconds before a claimed job that has not finished is run again')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is ready instead of waiting for more')
+    
+    def handle(self, *args, **options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        concurrency = options['concurrency']
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        
+        if options['pool'] == 'process':
+            # Processes are started on demand while this one holds a connection,
+            # so they are spawned rather than forked to never share its socket
+            executor = ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context('spawn'), initializer=init_process)
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+        
+        self.stdout.write(f"Worker {worker_id} running {concurrency} jobs at a time in a {options['pool']} pool")
+        running = set()
+        next_maintenance = 0
+        counts = {True: 0, False: 0}
+        
+        with executor:
+            while not self.stopping:
+                if time.monotonic() >= next_maintenance:
+                    self.maintain()
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                
+                jobs = claim_jobs(worker_id, concurrency - len(running), options['visibility_timeout'])
+                running.update(executor.submit(execute, job.pk, worker_id) for job in jobs)
+                
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                
+                # Wait for a free slot, or poll again if the queue may have more work
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    counts[self.report(future)] += 1
+            
+            # Let the jobs in progress finish before exiting
+            for future in running:
+                counts[self.report(future)] += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped: {counts[True]} jobs done, {counts[False]} failed'))
+    
+    def stop(self, signum, frame):
+        self.stdout.write('Stopping after the running jobs finish')
+        self.stopping = True
+    
+    def maintain(self):
+        enqueue_daily_tasks(timezone.localdate())
+        expired = fail_expired_jobs()
+        purged = purge_jobs()
+        if expired or purged:
+            self.stdout.write(f'{expired} jobs timed out on their last attempt, {purged} finished jobs purged')
+    
+    def report(self, future):
+        try:
+            job_id, task, succeeded, seconds = future.result()
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f'Worker error: {error!r}'))
+            return False
+        
+        line = f"{task} #{job_id} {'done' if succeeded else 'failed'} in {seconds * 1000:.0f} ms"
+        self.stdout.write(line if succeeded else self.style.WARNING(line))
+        return succeeded
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    """Model for a unit of background work, run by ``manage.py run_worker``.
+    
+    A worker claims a job by setting it to running with ``locked_until`` a
+    visibility timeout ahead. If the worker dies, the lock expires and the
+    job is claimed again, so tasks must be safe to run more than once.
+    """
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=200)  # Registered name, see jobs.queue.task
+    payload = models.JSONField(default=dict)  # Keyword arguments for the task
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} - {self.status}"
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Queued jobs due to run, and running jobs whose lock has expired
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_status_locked_until_idx'),
+        ]
@@ -0,0 +1,169 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger('jobs')
+
+# Task functions by name, filled in by the @task decorator as each app's tasks.py is imported
+TASKS = {}
+# Names of the tasks run_worker queues once a day, see daily_task
+DAILY_TASKS = []
+
+def task(func):
+    """Register a function as a background task under '<module>.<name>'.
+    
+    Jobs are delivered at least once (a retry or an expired lock runs them
+    again), so a task must leave things the same when run twice.
+    """
+    TASKS[task_name(func)] = func
+    return func
+
+def daily_task(func):
+    """Register a task that ``run_worker`` queues once a day, with the date (YYYY-MM-DD) as ``day``."""
+    task(func)
+    DAILY_TASKS.append(task_name(func))
+    return func
+
+def task_name(func):
+    return f'{func.__module__}.{func.__name__}'
+
+def enqueue(func, payload=None, key=None, delay=None, max_attempts=None):
+    """Queue a registered task to run in a worker with ``payload`` as its keyword arguments.
+    
+    Called inside a transaction, the job only becomes visible to workers
+    once it commits. A job with the same idempotency ``key`` is only ever
+    queued once: later calls return the existing job.
+    
+    With JOBS_EAGER the task runs in the current process once the
+    transaction commits, and None is returned.
+    """
+    name = task_name(func)
+    payload = payload or {}
+    
+    if name not in TASKS:
+        raise LookupError(f'{name} is not a registered task')
+    
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: TASKS[name](**payload))
+        return None
+    
+    fields = {
+        'task': name,
+        'payload': payload,
+        'run_after': timezone.now() + (delay or timedelta()),
+        'max_attempts': max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    }
+    
+    if key is None:
+        return Job.objects.create(**fields)
+    
+    job, _ = Job.objects.get_or_create(idempotency_key=key, defaults=fields)
+    return job
+
+def enqueue_daily_tasks(day):
+    """Queue the run of every daily task for ``day``; the idempotency key keeps it to one per day."""
+    return [
+        enqueue(TASKS[name], {'day': day.isoformat()}, key=f'{name}:{day.isoformat()}')
+        for name in DAILY_TASKS
+    ]
+
+def ready_jobs(now):
+    """Filter for jobs a worker may claim: due queued jobs and running jobs whose lock expired."""
+    return (
+        Q(status='queued', run_after__lte=now) |
+        Q(status='running', locked_until__lt=now, attempts__lt=F('max_attempts'))
+    )
+
+def claim_jobs(worker_id, limit, visibility_timeout=None):
+    """Lock up to ``limit`` ready jobs for one worker and return them.
+    
+    PostgreSQL (and other databases with SKIP LOCKED) lets concurrent
+    workers each lock different rows in one statement. SQLite has no row
+    locks, so jobs are claimed one by one with an update that only
+    succeeds if the job is still ready; a worker that loses the race
+    simply moves on.
+    """
+    if limit <= 0:
+        return []
+    
+    now = timezone.now()
+    timeout = timedelta(seconds=visibility_timeout or settings.JOBS_VISIBILITY_TIMEOUT)
+    ready = Job.objects.filter(ready_jobs(now)).order_by('run_after', 'id')
+    lock = {
+        'status': 'running',
+        'locked_by': worker_id,
+        'locked_until': now + timeout,
+        'attempts': F('attempts') + 1,
+        'updated_at': now,
+    }
+    
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            claimed = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            Job.objects.filter(pk__in=claimed).update(**lock)
+    else:
+        claimed = [
+            pk for pk in ready.values_list('pk', flat=True)[:limit]
+            if Job.objects.filter(ready_jobs(now), pk=pk).update(**lock)
+        ]
+    
+    return list(Job.objects.filter(pk__in=claimed, locked_by=worker_id).order_by('run_after', 'id'))
+
+def run_job(job, worker_id):
+    """Run a claimed job and record the outcome; returns True if it succeeded."""
+    func = TASKS.get(job.task)
+    started = time.perf_counter()
+    
+    try:
+        if func is None:
+            raise LookupError(f'{job.task} is not a registered task')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s/%s\n%s', job.pk, job.task, job.attempts, job.max_attempts, error)
+        finish_job(job, worker_id, error)
+        return False
+    
+    logger.info('Job %s (%s) done in %.3fs', job.pk, job.task, time.perf_counter() - started)
+    finish_job(job, worker_id)
+    return True
+
+def finish_job(job, worker_id, error=None):
+    """Mark a job done, queue it for a retry with exponential backoff, or give up on it.
+    
+    Nothing is written if the lock expired and another worker has the job.
+    """
+    now = timezone.now()
+    
+    if error is None:
+        changes = {'status': 'done', 'finished_at': now, 'last_error': ''}
+    elif job.attempts < job.max_attempts:
+        delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        changes = {'status': 'queued', 'run_after': now + timedelta(seconds=delay), 'last_error': error}
+    else:
+        changes = {'status': 'failed', 'finished_at': now, 'last_error': error}
+    
+    Job.objects.filter(pk=job.pk, status='running', locked_by=worker_id).update(locked_until=None, updated_at=now, **changes)
+
+def fail_expired_jobs():
+    """Give up on running jobs whose lock expired after their last attempt; returns how many."""
+    now = timezone.now()
+    return Job.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed',
+        finished_at=now,
+        locked_until=None,
+        updated_at=now,
+        last_error='The worker did not finish the job before its visibility timeout'
+    )
+
+def purge_jobs(older_than=None):
+    """Delete finished jobs (and with them their idempotency keys) after JOBS_RETENTION_DAYS."""
+    cutoff = timezone.now() - (older_than or timedelta(days=settings.JOBS_RETENTION_DAYS))
+    deleted, _ = Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import task, enqueue, claim_jobs, run_job, fail_expired_jobs
+
+# Calls of the test tasks, in order
+calls = []
+
+@task
+def record_call(value):
+    calls.append(value)
+
+@task
+def always_fail():
+    raise RuntimeError('Task failed')
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=30)
+class JobQueueTests(TestCase):
+    """Claiming, retrying and reclaiming jobs from the database queue."""
+    
+    def setUp(self):
+        calls.clear()
+    
+    def test_enqueue_with_key_queues_once(self):
+        first = enqueue(record_call, {'value': 1}, key='record:1')
+        second = enqueue(record_call, {'value': 2}, key='record:1')
+        
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+    
+    def test_claimed_job_is_locked_for_its_worker(self):
+        job = enqueue(record_call, {'value': 1})
+        
+        claimed = claim_jobs('worker-1', 10)
+        self.assertEqual([claimed_job.pk for claimed_job in claimed], [job.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts, claimed[0].locked_by), ('running', 1, 'worker-1'))
+        self.assertEqual(claim_jobs('worker-2', 10), [])
+        
+        self.assertTrue(run_job(claimed[0], 'worker-1'))
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+    
+    def test_delayed_job_is_not_claimed_early(self):
+        enqueue(record_call, {'value': 1}, delay=timedelta(minutes=5))
+        
+        self.assertEqual(claim_jobs('worker-1', 10), [])
+    
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue(always_fail, max_attempts=2)
+        
+        with self.assertLogs('jobs', 'WARNING'):
+            self.assertFalse(run_job(claim_jobs('worker-1', 1)[0], 'worker-1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('Task failed', job.last_error)
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 30, delta=5)
+        
+        # The second and last attempt gives up on the job
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('jobs', 'WARNING'):
+            self.assertFalse(run_job(claim_jobs('worker-1', 1)[0], 'worker-1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+    
+    def test_expired_lock_is_reclaimed(self):
+        job = enqueue(record_call, {'value': 1})
+        stuck = claim_jobs('worker-1', 1)[0]
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        
+        reclaimed = claim_jobs('worker-2', 1)
+        self.assertEqual([(reclaimed_job.pk, reclaimed_job.attempts) for reclaimed_job in reclaimed], [(job.pk, 2)])
+        
+        # The first worker finishing late must not overwrite the new claim
+        run_job(stuck, 'worker-1')
+        self.assertEqual(Job.objects.get(pk=job.pk).locked_by, 'worker-2')
+        
+        run_job(reclaimed[0], 'worker-2')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+    
+    def test_expired_lock_after_last_attempt_fails_job(self):
+        job = enqueue(record_call, {'value': 1}, max_attempts=1)
+        claim_jobs('worker-1', 1)
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        
+        self.assertEqual(claim_jobs('worker-2', 1), [])
+        self.assertEqual(fail_expired_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'failed')
+    
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(enqueue(record_call, {'value': 1}))
+            self.assertEqual(calls, [])
+        
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
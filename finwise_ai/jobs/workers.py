@@ -0,0 +1,27 @@
+"""Entry points that run jobs in the threads or processes of ``run_worker``.
+
+Nothing Django-related is imported at module level, so spawned
+processes can unpickle these functions before Django is set up.
+"""
+
+def init_process():
+    """Set up Django in a freshly spawned worker process."""
+    import django
+    django.setup()
+
+def execute(job_id, worker_id):
+    """Run one claimed job; returns (job id, task name, succeeded, seconds)."""
+    import time
+    from django.db import close_old_connections
+    from jobs.models import Job
+    from jobs.queue import run_job
+    
+    started = time.perf_counter()
+    close_old_connections()
+    try:
+        job = Job.objects.get(pk=job_id)
+        succeeded = run_job(job, worker_id)
+    finally:
+        close_old_connections()
+    
+    return job_id, job.task, succeeded, time.perf_counter() - started
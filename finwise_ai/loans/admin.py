@@ -28,6 +28,7 @@ class LoanTypeAdmin(admin.ModelAdmin):
 @admin.register(Loan)
 class LoanAdmin(admin.ModelAdmin):
     list_display = ['user', 'loan_type', 'amount', 'interest_rate', 'term_months', 'monthly_payment', 'status', 'is_simulation']
+    list_select_related = ['user', 'loan_type']
     list_filter = ['status', 'is_simulation', 'loan_type', 'start_date']
     search_fields = ['user__email']
     list_editable = ['status']
@@ -54,6 +55,7 @@ class LoanAdmin(admin.ModelAdmin):
 @admin.register(LoanPayment)
 class LoanPaymentAdmin(admin.ModelAdmin):
     list_display = ['loan', 'payment_date', 'amount', 'principal_amount', 'interest_amount', 'remaining_balance', 'is_paid']
+    list_select_related = ['loan__loan_type']
     list_filter = ['is_paid', 'payment_date']
     search_fields = ['loan__user__email']
     list_editable = ['is_paid']
@@ -73,7 +75,8 @@ class LoanPaymentAdmin(admin.ModelAdmin):
 @admin.register(LoanEligibility)
 class LoanEligibilityAdmin(admin.ModelAdmin):
     list_display = ['user', 'loan_type', 'requested_amount', 'is_eligible', 'max_eligible_amount', 'offered_interest_rate', 'created_at']
-    list_filter = ['is_eligible', 'loan_type', 'created_at']
+    list_select_related = ['user', 'loan_type']
+    list_filter = ['is_eligible', 'is_simulation', 'loan_type', 'created_at']
     search_fields = ['user__email', 'reason']
     date_hierarchy = 'created_at'
     raw_id_fields = ['user']
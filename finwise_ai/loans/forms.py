@@ -1,4 +1,5 @@
 from django import forms
+from decimal import Decimal
 from .models import LoanType, Loan, LoanEligibility
 
 class LoanTypeForm(forms.ModelForm):
@@ -103,3 +104,32 @@ class LoanEligibilityForm(forms.ModelForm):
     employment_years = forms.DecimalField(
         widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'})
     )
+
+
+class AffordabilityForm(forms.Form):
+    """Form for the affordability matrix across all loan types."""
+    
+    monthly_income = forms.DecimalField(
+        min_value=Decimal('0.01'),
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    existing_monthly_debt = forms.DecimalField(
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    credit_score = forms.IntegerField(
+        min_value=300,
+        max_value=850,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': '300', 'max': '850'})
+    )
+    employment_years = forms.DecimalField(
+        min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.1'})
+    )
+    amount = forms.DecimalField(
+        required=False,
+        min_value=Decimal('0.01'),
+        help_text='Price every term for this amount instead of only finding the maximum',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from loans.simulation import purge_simulations
+
+class Command(BaseCommand):
+    help = 'Deletes old saved loan simulations (simulated loans and their eligibility records) in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.LOAN_SIMULATION_RETENTION_DAYS, help='Delete records created more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows deleted per transaction')
+    
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days must not be negative and --batch-size must be positive')
+        
+        loans, eligibilities = purge_simulations(timedelta(days=options['days']), options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(f"Deleted {loans} simulated loans and {eligibilities} simulated eligibility records older than {options['days']} days"))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loan_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'created_at'], name='loan_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanpayment',
+            index=models.Index(fields=['loan', 'payment_date', 'is_paid'], name='loanpayment_loan_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanpayment',
+            index=models.Index(condition=models.Q(('is_paid', False)), fields=['loan', 'payment_date'], name='loanpayment_unpaid_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+def mark_simulator_records(apps, schema_editor):
+    """Flag the eligibility records the loan simulator saved; only it wrote this reason."""
+    LoanEligibility = apps.get_model('loans', 'LoanEligibility')
+    LoanEligibility.objects.filter(reason__startswith='Debt-to-income ratio is ').update(is_simulation=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0003_loan_loan_active_idx_and_more'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='loaneligibility',
+            name='is_simulation',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_simulator_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+def remove_duplicate_payments(apps, schema_editor):
+    """Keep one payment per loan and date (a paid one when there is one) before adding the constraint."""
+    LoanPayment = apps.get_model('loans', 'LoanPayment')
+    seen = set()
+    duplicates = []
+    
+    for payment in LoanPayment.objects.order_by('loan_id', 'payment_date', '-is_paid', 'pk').iterator():
+        key = (payment.loan_id, payment.payment_date)
+        if key in seen:
+            duplicates.append(payment.pk)
+        seen.add(key)
+    
+    LoanPayment.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0004_loaneligibility_is_simulation'),
+    ]
+    
+    operations = [
+        migrations.RunPython(remove_duplicate_payments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='loanpayment',
+            constraint=models.UniqueConstraint(fields=('loan', 'payment_date'), name='unique_loan_payment_date'),
+        ),
+    ]
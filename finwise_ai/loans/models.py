@@ -50,6 +50,9 @@ class Loan(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], condition=models.Q(status='active'), name='loan_active_idx'),
+        ]
 
 
 class LoanPayment(models.Model):
@@ -68,6 +71,13 @@ class LoanPayment(models.Model):
     
     class Meta:
         ordering = ['payment_date']
+        indexes = [
+            models.Index(fields=['loan', 'payment_date', 'is_paid'], name='loanpayment_loan_date_idx'),
+            models.Index(fields=['loan', 'payment_date'], condition=models.Q(is_paid=False), name='loanpayment_unpaid_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['loan', 'payment_date'], name='unique_loan_payment_date'),
+        ]
 
 
 class LoanEligibility(models.Model):
@@ -81,6 +91,7 @@ class LoanEligibility(models.Model):
     max_eligible_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     offered_interest_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     reason = models.TextField(blank=True, null=True)
+    is_simulation = models.BooleanField(default=False)  # Saved from the loan simulator
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -0,0 +1,194 @@
+import math
+import numpy as np
+from functools import lru_cache
+
+# Percentage points added to the base rate, by minimum credit score (checked in order)
+CREDIT_SCORE_ADJUSTMENTS = [(800, -1.0), (750, -0.5), (700, 0.0), (650, 0.5), (600, 1.5)]
+# Added for credit scores below every band above
+LOW_CREDIT_SCORE_ADJUSTMENT = 3.0
+
+# Percentage points added to the base rate, by minimum years of employment (checked in order)
+EMPLOYMENT_ADJUSTMENTS = [(5, -0.25), (2, 0.0)]
+# Added for shorter employment histories
+SHORT_EMPLOYMENT_ADJUSTMENT = 0.25
+
+# Bounds of any offered annual rate (percent)
+MIN_RATE = 2.0
+MAX_RATE = 18.0
+
+# Eligibility rules: highest debt-to-income ratio (percent of monthly income),
+# lowest credit score and shortest employment history (years) accepted
+MAX_DTI_RATIO = 43
+MIN_CREDIT_SCORE = 620
+MIN_EMPLOYMENT_YEARS = 1
+
+# Terms offered by the affordability matrix are multiples of this many months
+TERM_STEP_MONTHS = 12
+
+# Factor tables kept in memory; each is a few kilobytes (rate steps x terms)
+FACTOR_TABLE_CACHE_SIZE = 64
+
+def band_adjustment(value, bands, default):
+    """Return the adjustment of the first band whose minimum ``value`` reaches."""
+    for minimum, adjustment in bands:
+        if value >= minimum:
+            return adjustment
+    return default
+
+def clamp_rate(rate):
+    """Keep a rate within MIN_RATE and MAX_RATE."""
+    return max(MIN_RATE, min(rate, MAX_RATE))
+
+def calculate_interest_rate(loan_type, credit_score, employment_years):
+    """Calculate interest rate based on loan type, credit score, and employment history."""
+    credit_adjustment = band_adjustment(credit_score, CREDIT_SCORE_ADJUSTMENTS, LOW_CREDIT_SCORE_ADJUSTMENT)
+    employment_adjustment = band_adjustment(employment_years, EMPLOYMENT_ADJUSTMENTS, SHORT_EMPLOYMENT_ADJUSTMENT)
+    return clamp_rate(float(loan_type.base_interest_rate) + credit_adjustment + employment_adjustment)
+
+def rate_steps(base_rate):
+    """Every rate calculate_interest_rate can offer on a base rate, lowest first."""
+    credit = [adjustment for _, adjustment in CREDIT_SCORE_ADJUSTMENTS] + [LOW_CREDIT_SCORE_ADJUSTMENT]
+    employment = [adjustment for _, adjustment in EMPLOYMENT_ADJUSTMENTS] + [SHORT_EMPLOYMENT_ADJUSTMENT]
+    return tuple(sorted({
+        clamp_rate(float(base_rate) + credit_adjustment + employment_adjustment)
+        for credit_adjustment in credit
+        for employment_adjustment in employment
+    }))
+
+def annuity_factors(annual_rates, terms):
+    """Present value of paying 1 a month, (1 - (1 + r)^-n) / r, for arrays of rates and terms.
+    
+    Rates are annual percentages; a 0% rate gives n. The arrays broadcast
+    against each other.
+    """
+    rates = np.asarray(annual_rates, dtype=float) / 1200
+    terms = np.asarray(terms, dtype=float)
+    
+    # (1 + r)^-n computed as exp(-n * log1p(r)) stays accurate for tiny rates
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = -np.expm1(-terms * np.log1p(rates)) / rates
+    return np.where(rates == 0, terms, factors)
+
+class FactorTable:
+    """Annuity and payment factors for every (rate step, term) of a loan type.
+    
+    ``annuity[i, j]`` is the annuity factor of ``rates[i]`` over
+    ``terms[j]`` months, and ``payment`` its inverse: the monthly payment
+    per unit borrowed.
+    """
+    
+    def __init__(self, rates, min_term, max_term):
+        self.rates = np.array(rates, dtype=float)
+        self.terms = np.arange(max(min_term, 1), max(max_term, min_term, 1) + 1)
+        self.annuity = annuity_factors(self.rates[:, None], self.terms[None, :])
+        self.payment = 1 / self.annuity
+    
+    def factors(self, annual_rates, terms):
+        """Annuity factors for arrays of rates and terms, read from the table where they are on the grid."""
+        rates, terms = np.broadcast_arrays(np.asarray(annual_rates, dtype=float), np.asarray(terms))
+        rate_index = np.searchsorted(self.rates, rates).clip(0, len(self.rates) - 1)
+        term_index = (terms - self.terms[0]).astype(int).clip(0, len(self.terms) - 1)
+        on_grid = np.isclose(self.rates[rate_index], rates) & (self.terms[term_index] == terms)
+        
+        factors = self.annuity[rate_index, term_index]
+        if on_grid.all():
+            return factors
+        return np.where(on_grid, factors, annuity_factors(rates, terms))
+
+@lru_cache(maxsize=FACTOR_TABLE_CACHE_SIZE)
+def factor_table(rates, min_term, max_term):
+    """Build (once) the factor table of a rate grid and term range."""
+    return FactorTable(rates, min_term, max_term)
+
+def loan_type_factors(loan_type):
+    """Get the cached factor table for a loan type's rate steps and term range.
+    
+    Tables are keyed by those values, so editing a loan type simply
+    selects a different table.
+    """
+    return factor_table(rate_steps(loan_type.base_interest_rate), loan_type.min_term_months, loan_type.max_term_months)
+
+def price_loans(amounts, annual_rates, terms, table=None):
+    """Price many (amount, rate, term) combinations in one vectorized call.
+    
+    The arguments broadcast against each other, e.g. one amount against a
+    column of rates and a row of terms. Factors come from ``table`` when
+    given. Returns arrays of monthly_payment, total_cost and total_interest.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    terms = np.asarray(terms)
+    factors = table.factors(annual_rates, terms) if table is not None else annuity_factors(annual_rates, terms)
+    
+    monthly_payment = amounts / factors
+    total_cost = monthly_payment * terms
+    
+    return {
+        'monthly_payment': monthly_payment,
+        'total_cost': total_cost,
+        'total_interest': total_cost - amounts,
+    }
+
+def max_amounts(monthly_payments, annual_rates, terms, table=None):
+    """Largest amounts the given monthly payments repay, PV = P * annuity factor (0 when P <= 0)."""
+    payments = np.asarray(monthly_payments, dtype=float)
+    factors = table.factors(annual_rates, terms) if table is not None else annuity_factors(annual_rates, terms)
+    return np.where(payments > 0, payments * factors, 0.0)
+
+def meets_credit_rules(credit_score, employment_years):
+    """Check the applicant rules that do not depend on the loan itself."""
+    return credit_score >= MIN_CREDIT_SCORE and employment_years >= MIN_EMPLOYMENT_YEARS
+
+def max_monthly_payment(monthly_income, existing_debt):
+    """Highest payment a new loan may add before the debt-to-income ratio exceeds MAX_DTI_RATIO."""
+    return float(monthly_income) * MAX_DTI_RATIO / 100 - float(existing_debt)
+
+def term_steps(loan_type):
+    """The loan type's terms in TERM_STEP_MONTHS steps, e.g. 12, 24, ... 360 months."""
+    first_term = max(TERM_STEP_MONTHS, math.ceil(loan_type.min_term_months / TERM_STEP_MONTHS) * TERM_STEP_MONTHS)
+    return np.arange(first_term, loan_type.max_term_months + 1, TERM_STEP_MONTHS)
+
+def affordability_matrix(loan_types, monthly_income, existing_debt, credit_score, employment_years, amount=None):
+    """Eligibility and the largest loan for every loan type and term step, without saving anything.
+    
+    Each loan type gets the rate calculate_interest_rate would offer and,
+    for every term, the largest amount (within the type's limits) whose
+    payment keeps the debt-to-income ratio within MAX_DTI_RATIO. With an
+    ``amount``, each term also gets its payment and debt-to-income ratio,
+    and eligibility is for that amount.
+    
+    Returns one dict of term-aligned lists per loan type.
+    """
+    payment_limit = max_monthly_payment(monthly_income, existing_debt)
+    qualifies = meets_credit_rules(credit_score, employment_years)
+    matrix = []
+    
+    for loan_type in loan_types:
+        rate = calculate_interest_rate(loan_type, credit_score, employment_years)
+        terms = term_steps(loan_type)
+        min_amount = float(loan_type.min_amount)
+        max_amount = float(loan_type.max_amount)
+        factors = loan_type_factors(loan_type).factors(rate, terms)
+        
+        # Rounded down to cents so the payment never goes over the limit
+        affordable = np.minimum(np.floor(max(payment_limit, 0) * factors * 100) / 100, max_amount)
+        row = {
+            'loan_type_id': loan_type.pk,
+            'name': loan_type.name,
+            'interest_rate': rate,
+            'terms': terms.tolist(),
+            'max_amount': affordable.tolist(),
+        }
+        
+        if amount is None:
+            eligible = qualifies & (affordable >= max(min_amount, 0.01))
+        else:
+            payments = float(amount) / factors
+            dti_ratios = (payments + float(existing_debt)) / float(monthly_income) * 100
+            eligible = qualifies & (dti_ratios <= MAX_DTI_RATIO) & (min_amount <= float(amount) <= max_amount)
+            row['monthly_payment'] = np.round(payments, 2).tolist()
+            row['dti_ratio'] = np.round(dti_ratios, 1).tolist()
+        
+        row['eligible'] = eligible.tolist()
+        matrix.append(row)
+    
+    return matrix
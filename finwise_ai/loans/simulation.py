@@ -0,0 +1,108 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from .models import Loan, LoanType, LoanEligibility
+
+# Fields of a simulation kept as strings in the token (Decimals are not JSON)
+DECIMAL_FIELDS = ['amount', 'interest_rate', 'monthly_payment', 'max_eligible_amount']
+
+def simulation_salt(user):
+    """Tie tokens to one user, so a token cannot be replayed from another account."""
+    return f'loans.simulation:{user.pk}'
+
+def dump_simulation(user, simulation):
+    """Sign and compress a simulation (a dict of inputs and results) into a URL-safe token."""
+    payload = {key: str(value) if key in DECIMAL_FIELDS else value for key, value in simulation.items()}
+    return signing.dumps(payload, salt=simulation_salt(user), compress=True)
+
+def load_simulation(user, token):
+    """Read back a simulation token; raises signing.BadSignature when forged, expired or not the user's."""
+    payload = signing.loads(token, salt=simulation_salt(user), max_age=settings.LOAN_SIMULATION_MAX_AGE)
+    return {key: Decimal(value) if key in DECIMAL_FIELDS else value for key, value in payload.items()}
+
+def simulation_from_records(loan, eligibility):
+    """The simulation a saved simulated loan and its eligibility record were made from."""
+    return {
+        'loan_type': loan.loan_type.name,
+        'amount': loan.amount,
+        'interest_rate': loan.interest_rate,
+        'term_months': loan.term_months,
+        'monthly_payment': loan.monthly_payment,
+        'is_eligible': eligibility.is_eligible,
+        'max_eligible_amount': eligibility.max_eligible_amount,
+        'reason': eligibility.reason,
+    }
+
+def build_simulation(user, simulation):
+    """Unsaved Loan and LoanEligibility instances for a simulation, to render without writing anything."""
+    loan_type = LoanType.objects.filter(name=simulation['loan_type']).first() or LoanType(name=simulation['loan_type'])
+    
+    loan = Loan(
+        user=user,
+        loan_type=loan_type,
+        amount=simulation['amount'],
+        interest_rate=simulation['interest_rate'],
+        term_months=simulation['term_months'],
+        monthly_payment=simulation['monthly_payment'],
+        status='simulated',
+        is_simulation=True
+    )
+    eligibility = LoanEligibility(
+        user=user,
+        loan_type=loan_type,
+        requested_amount=simulation['amount'],
+        requested_term_months=simulation['term_months'],
+        is_eligible=simulation['is_eligible'],
+        max_eligible_amount=simulation['max_eligible_amount'],
+        offered_interest_rate=simulation['interest_rate'],
+        reason=simulation['reason'],
+        is_simulation=True
+    )
+    
+    return loan, eligibility
+
+def save_simulation(user, simulation):
+    """Write a simulation the user chose to keep as a simulated loan and its eligibility record."""
+    loan, eligibility = build_simulation(user, simulation)
+    
+    with transaction.atomic():
+        if loan.loan_type.pk is None:
+            loan.loan_type = LoanType.objects.get_or_create(name=simulation['loan_type'])[0]
+        eligibility.loan_type = loan.loan_type
+        loan.save()
+        eligibility.save()
+    
+    return loan, eligibility
+
+def purge_simulations(older_than=None, batch_size=1000):
+    """Delete saved simulations (loans and their eligibility records) older than LOAN_SIMULATION_RETENTION_DAYS.
+    
+    Rows are deleted a batch of ids at a time, each batch in its own short
+    transaction, so a large backlog never holds long locks. Eligibility
+    checks the user ran are left alone. Returns the number of (loans,
+    eligibility records) deleted.
+    """
+    if older_than is None:
+        older_than = timedelta(days=settings.LOAN_SIMULATION_RETENTION_DAYS)
+    cutoff = timezone.now() - older_than
+    querysets = [
+        Loan.objects.filter(status='simulated', is_simulation=True, created_at__lt=cutoff),
+        LoanEligibility.objects.filter(is_simulation=True, created_at__lt=cutoff),
+    ]
+    counts = []
+    
+    for queryset in querysets:
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                queryset.model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+        counts.append(deleted)
+    
+    return tuple(counts)
@@ -0,0 +1,13 @@
+from jobs.queue import task
+from .models import Loan
+
+@task
+def update_payment_schedule(loan_id):
+    """Create or bring up to date the payment schedule of an active loan."""
+    from .views import sync_payment_schedule
+    
+    loan = Loan.objects.filter(pk=loan_id).first()
+    
+    # The loan may have been deleted, closed or turned into a simulation since
+    if loan is not None and loan.status == 'active' and not loan.is_simulation:
+        sync_payment_schedule(loan)
@@ -0,0 +1,229 @@
+from decimal import Decimal
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from .models import Loan, LoanEligibility, LoanPayment, LoanType
+from .pricing import factor_table, rate_steps, price_loans, max_amounts, affordability_matrix, calculate_interest_rate, max_monthly_payment, MAX_DTI_RATIO
+from .utils import amortization_schedule, calculate_monthly_payment
+from .views import sync_payment_schedule
+
+class AmortizationScheduleTests(SimpleTestCase):
+    """The schedule must repay exactly the principal, over the full term unless extra principal ends it."""
+    
+    def assertRepaysPrincipal(self, schedule, principal):
+        self.assertEqual(int(schedule['principal'].sum()), round(principal * 100))
+        self.assertEqual(int(schedule['balance'][-1]), 0)
+    
+    def test_principal_sums_to_amount_over_full_term(self):
+        # Rounding the payment up used to end these schedules early (at months 337 and 357)
+        for principal, rate, term in [(100, 18, 360), (1029, 17.52, 360), (250000, 6.5, 360), (1000, 0, 3), (5000, 12, 1)]:
+            with self.subTest(principal=principal, rate=rate, term=term):
+                schedule = amortization_schedule(principal, rate, term)
+                level = round(calculate_monthly_payment(principal, rate, term) * 100)
+                
+                self.assertEqual(len(schedule['month']), term)
+                self.assertRepaysPrincipal(schedule, principal)
+                self.assertLessEqual(abs(schedule['payment'] - level).max(), 1)
+    
+    def test_balloon_is_paid_with_the_last_payment(self):
+        schedule = amortization_schedule(50000, 7, 60, balloon=20000)
+        level = round(calculate_monthly_payment(50000, 7, 60, balloon=20000) * 100)
+        
+        self.assertEqual(len(schedule['month']), 60)
+        self.assertRepaysPrincipal(schedule, 50000)
+        self.assertLessEqual(abs(int(schedule['payment'][-1]) - (level + 2000000)), 1)
+    
+    def test_extra_principal_ends_schedule_early(self):
+        schedule = amortization_schedule(50000, 7, 60, extra_principal=300)
+        
+        self.assertEqual(len(schedule['month']), 45)
+        self.assertRepaysPrincipal(schedule, 50000)
+        self.assertLess(int(schedule['payment'][-1]), int(schedule['payment'][0]))
+
+
+class LoanSimulationFlowTests(TestCase):
+    """A simulation is previewed from a signed token and only written when the user saves it."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='simulator@example.com', password='password')
+        self.client.force_login(self.user)
+    
+    def test_preview_then_save(self):
+        response = self.client.post(reverse('loans:loan_simulator'), {
+            'loan_type': 'personal',
+            'amount': '20000',
+            'interest_rate': '9.5',
+            'term_years': '3',
+            'monthly_income': '5000',
+        })
+        preview_url = response['Location']
+        self.assertFalse(Loan.objects.filter(user=self.user).exists())
+        
+        response = self.client.get(preview_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('loans:loan_simulation_save'))
+        self.assertEqual(len(response.context['amortization_schedule']), 36)
+        
+        response = self.client.post(reverse('loans:loan_simulation_save'), {'token': response.context['simulation_token']}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, reverse('loans:loan_simulation_save'))
+        
+        loan = Loan.objects.get(user=self.user)
+        self.assertTrue(loan.is_simulation)
+        self.assertTrue(LoanEligibility.objects.get(user=self.user).is_simulation)
+
+
+class PaymentScheduleSyncTests(TestCase):
+    """Editing a loan must only rewrite the open payments whose amounts changed."""
+    
+    FIELDS = ('payment_date', 'amount', 'principal_amount', 'interest_amount', 'remaining_balance', 'is_paid')
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='schedule@example.com', password='password')
+        
+        # Six payments are in the past, the other eighteen are still to come
+        today = timezone.now().date()
+        self.loan = Loan.objects.create(
+            user=self.user, amount=Decimal('12000.00'), interest_rate=Decimal('9.00'), term_months=24,
+            start_date=today - relativedelta(months=6) + relativedelta(days=10), monthly_payment=Decimal('0'),
+            status='active', is_simulation=False
+        )
+        sync_payment_schedule(self.loan)
+        
+        # One future payment has already been made early
+        self.prepaid = self.loan.payments.filter(is_paid=False).order_by('payment_date')[1]
+        self.prepaid.is_paid = True
+        self.prepaid.save()
+    
+    def payment_rows(self, **filters):
+        return {payment['pk']: payment for payment in self.loan.payments.filter(**filters).values('pk', *self.FIELDS)}
+    
+    def written_payment_sql(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT INTO "loans_loanpayment"', 'UPDATE "loans_loanpayment"', 'DELETE FROM "loans_loanpayment"'))
+        ]
+    
+    def test_edit_keeps_paid_payments(self):
+        paid = self.payment_rows(is_paid=True)
+        open_payments = self.payment_rows(is_paid=False)
+        self.assertEqual(len(paid), 7)
+        self.assertEqual(len(open_payments), 17)
+        
+        self.loan.amount = Decimal('15000.00')
+        self.loan.save()
+        sync_payment_schedule(self.loan)
+        
+        self.assertEqual(self.payment_rows(is_paid=True), paid)
+        
+        # Open payments are updated in place with the new amounts
+        updated = self.payment_rows(is_paid=False)
+        self.assertEqual(updated.keys(), open_payments.keys())
+        for pk, payment in updated.items():
+            self.assertEqual(payment['payment_date'], open_payments[pk]['payment_date'])
+            self.assertGreater(payment['amount'], open_payments[pk]['amount'])
+    
+    def test_only_changed_payments_are_written(self):
+        stale = self.loan.payments.filter(is_paid=False).order_by('payment_date').last()
+        LoanPayment.objects.filter(pk=stale.pk).update(amount=Decimal('1.00'))
+        
+        with CaptureQueriesContext(connection) as queries:
+            sync_payment_schedule(self.loan)
+        
+        writes = self.written_payment_sql(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE'))
+        self.assertIn(f'IN ({stale.pk})', writes[0])
+        self.assertEqual(LoanPayment.objects.get(pk=stale.pk).amount, stale.amount)
+        
+        with CaptureQueriesContext(connection) as queries:
+            sync_payment_schedule(self.loan)
+        self.assertEqual(self.written_payment_sql(queries), [])
+    
+    def test_shorter_term_deletes_only_open_payments(self):
+        paid = self.payment_rows(is_paid=True)
+        
+        self.loan.term_months = 12
+        self.loan.save()
+        sync_payment_schedule(self.loan)
+        
+        self.assertEqual(self.payment_rows(is_paid=True), paid)
+        self.assertEqual(self.loan.payments.count(), 12)
+        self.assertEqual(self.loan.payments.latest('payment_date').payment_date, self.loan.start_date + relativedelta(months=11))
+
+
+class FactorTableTests(SimpleTestCase):
+    """Prices read from the factor tables must match calculate_monthly_payment."""
+    
+    def setUp(self):
+        self.table = factor_table(rate_steps(8.5), 12, 360)
+    
+    def test_prices_match_monthly_payment(self):
+        # On the grid, off the rate steps, past the term range and at 0%
+        cells = [(25000, 8.5, 60), (250000, 7.0, 360), (1000, 18.0, 12), (12000, 7.3, 48), (50000, 8.5, 400), (3000, 0, 24)]
+        
+        for amount, rate, term in cells:
+            with self.subTest(amount=amount, rate=rate, term=term):
+                expected = calculate_monthly_payment(amount, rate, term)
+                priced = price_loans(amount, rate, term, self.table)
+                
+                self.assertAlmostEqual(float(priced['monthly_payment']), expected, places=6)
+                self.assertAlmostEqual(float(priced['total_interest']), expected * term - amount, places=4)
+                self.assertAlmostEqual(float(max_amounts(expected, rate, term, self.table)), amount, places=4)
+    
+    def test_batched_prices_match_monthly_payment(self):
+        rates = np.array(self.table.rates[:3])[:, None]
+        terms = np.array([12, 120, 360])[None, :]
+        payments = price_loans(10000, rates, terms, self.table)['monthly_payment']
+        
+        for i, rate in enumerate(rates[:, 0]):
+            for j, term in enumerate(terms[0]):
+                self.assertAlmostEqual(payments[i, j], calculate_monthly_payment(10000, rate, term), places=6)
+
+
+class AffordabilityMatrixTests(SimpleTestCase):
+    """Matrix cells must agree with pricing each loan on its own."""
+    
+    def setUp(self):
+        self.loan_types = [
+            LoanType(name='Personal', min_amount=Decimal('1000'), max_amount=Decimal('50000'), min_term_months=6, max_term_months=60, base_interest_rate=Decimal('11.50')),
+            LoanType(name='Mortgage', min_amount=Decimal('50000'), max_amount=Decimal('2000000'), min_term_months=60, max_term_months=360, base_interest_rate=Decimal('6.25')),
+        ]
+        self.limit = max_monthly_payment(6000, 500)
+    
+    def test_max_amounts_match_monthly_payment(self):
+        for row, loan_type in zip(affordability_matrix(self.loan_types, 6000, 500, 720, 3), self.loan_types):
+            self.assertEqual(row['interest_rate'], calculate_interest_rate(loan_type, 720, 3))
+            
+            for term, max_amount in zip(row['terms'], row['max_amount']):
+                with self.subTest(loan_type=loan_type.name, term=term):
+                    self.assertLessEqual(calculate_monthly_payment(max_amount, row['interest_rate'], term), self.limit + 1e-9)
+                    
+                    # One more cent would go over the limit unless the type's maximum was reached
+                    if max_amount < float(loan_type.max_amount):
+                        self.assertGreater(calculate_monthly_payment(max_amount + 0.01, row['interest_rate'], term), self.limit)
+    
+    def test_payments_match_monthly_payment(self):
+        matrix = affordability_matrix(self.loan_types, 6000, 500, 720, 3, amount=40000)
+        
+        for row in matrix:
+            for term, payment, dti_ratio in zip(row['terms'], row['monthly_payment'], row['dti_ratio']):
+                with self.subTest(loan_type=row['name'], term=term):
+                    expected = calculate_monthly_payment(40000, row['interest_rate'], term)
+                    self.assertEqual(payment, round(expected, 2))
+                    self.assertEqual(dti_ratio, round((expected + 500) / 6000 * 100, 1))
+        
+        # The mortgage minimum is above the amount asked for
+        self.assertFalse(any(matrix[1]['eligible']))
+        personal = matrix[0]
+        self.assertEqual(personal['eligible'], [
+            (calculate_monthly_payment(40000, personal['interest_rate'], term) + 500) / 6000 * 100 <= MAX_DTI_RATIO
+            for term in personal['terms']
+        ])
+        self.assertIn(True, personal['eligible'])
+        self.assertIn(False, personal['eligible'])
@@ -13,6 +13,8 @@ urlpatterns = [
     
     # Loan simulator
     path('simulator/', views.loan_simulator, name='loan_simulator'),
+    path('simulation/preview/<str:token>/', views.loan_simulation_preview, name='loan_simulation_preview'),
+    path('simulation/save/', views.loan_simulation_save, name='loan_simulation_save'),
     path('simulation/<int:loan_id>/eligibility/<int:eligibility_id>/', views.loan_simulation_result, name='loan_simulation_result'),
     
     # Payments
@@ -21,4 +23,5 @@ urlpatterns = [
     # Eligibility
     path('eligibility-check/', views.loan_eligibility_check, name='loan_eligibility_check'),
     path('eligibility/<int:pk>/', views.loan_eligibility_result, name='loan_eligibility_result'),
+    path('api/affordability/', views.loan_affordability_api, name='loan_affordability_api'),
 ] 
\ No newline at end of file
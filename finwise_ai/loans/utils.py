@@ -0,0 +1,107 @@
+import numpy as np
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+def calculate_monthly_payment(principal, annual_rate, term_months, balloon=0):
+    """Calculate the level monthly payment of a loan, optionally leaving a balloon.
+    
+    Uses P = r * (PV - B * (1 + r)^-n) / (1 - (1 + r)^-n), which reduces to
+    the usual annuity formula when there is no balloon.
+    """
+    principal = float(principal)
+    balloon = float(balloon)
+    rate = float(annual_rate) / 100 / 12
+    
+    if term_months <= 0:
+        return principal - balloon
+    if rate == 0:
+        return (principal - balloon) / term_months
+    
+    discount = (1 + rate) ** -term_months
+    return rate * (principal - balloon * discount) / (1 - discount)
+
+def amortization_schedule(principal, annual_rate, term_months, extra_principal=0, balloon=0):
+    """Compute a full amortization schedule with closed-form, vectorized formulas.
+    
+    The balance after k payments of A (plus extra principal E) is
+    PV * (1 + r)^k - (A + E) * ((1 + r)^k - 1) / r, evaluated for every month
+    at once with the exact (unrounded) payment and rounded to cents.
+    Principal is the drop in the rounded balance and interest the month's
+    interest on it, so the principal column always adds up to the amount
+    borrowed and a payment differs from the level one by a cent at most;
+    the payment of month ``term_months`` settles what is left (and the
+    balloon, if any). Only extra principal can end the schedule early, at
+    the month it pays the loan off.
+    
+    Amounts are returned as integer cents in numpy arrays:
+    month, payment, principal, interest and balance.
+    """
+    if term_months < 1:
+        raise ValueError("A loan needs at least one payment")
+    
+    rate = float(annual_rate) / 100 / 12
+    principal_cents = int(round(float(principal) * 100))
+    extra_cents = int(round(float(extra_principal) * 100))
+    payment_cents = calculate_monthly_payment(principal, annual_rate, term_months, balloon) * 100 + extra_cents
+    
+    # Balance after each month
+    months = np.arange(term_months + 1)
+    if rate == 0:
+        balances = principal_cents - payment_cents * months.astype(float)
+    else:
+        growth = (1 + rate) ** months
+        balances = principal_cents * growth - payment_cents * (growth - 1) / rate
+    balances = np.round(balances).astype(np.int64)
+    
+    # Extra principal may pay the loan off before its term
+    last_month = term_months
+    if extra_cents:
+        cleared = np.nonzero(balances[1:] <= 0)[0]
+        if len(cleared):
+            last_month = cleared[0] + 1
+    balances = balances[:last_month + 1]
+    balances[-1] = 0
+    
+    principal_paid = balances[:-1] - balances[1:]
+    interest_paid = np.round(balances[:-1] * rate).astype(np.int64)
+    payments = principal_paid + interest_paid
+    
+    return {
+        'month': months[1:last_month + 1],
+        'payment': payments,
+        'principal': principal_paid,
+        'interest': interest_paid,
+        'balance': balances[1:],
+    }
+
+def to_money(cents):
+    """Convert integer cents to a Decimal amount."""
+    return Decimal(int(cents)) * CENT
+
+def schedule_rows(schedule):
+    """Turn an amortization schedule into the row dicts used by the templates."""
+    return [{
+        'month': int(month),
+        'payment': to_money(payment),
+        'principal': to_money(principal),
+        'interest': to_money(interest),
+        'balance': to_money(balance),
+    } for month, payment, principal, interest, balance in zip(
+        schedule['month'],
+        schedule['payment'],
+        schedule['principal'],
+        schedule['interest'],
+        schedule['balance']
+    )]
+
+def schedule_totals(schedule):
+    """Get the total interest, principal and cost of a schedule."""
+    total_interest = to_money(schedule['interest'].sum())
+    total_principal = to_money(schedule['principal'].sum())
+    
+    return {
+        'total_interest': total_interest,
+        'total_principal': total_principal,
+        'total_cost': total_interest + total_principal,
+    }
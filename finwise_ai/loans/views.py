@@ -2,12 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.db import transaction
+from django.core import signing
 from django.db.models import Sum, Count, Avg
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from dateutil.relativedelta import relativedelta
 from .models import Loan, LoanType, LoanPayment, LoanEligibility
-from .forms import LoanForm, LoanTypeForm, LoanSimulatorForm, LoanEligibilityForm
+from .forms import LoanForm, LoanTypeForm, LoanSimulatorForm, LoanEligibilityForm, AffordabilityForm
+from .utils import calculate_monthly_payment, amortization_schedule, schedule_rows, schedule_totals, to_money
+from .simulation import dump_simulation, load_simulation, build_simulation, save_simulation
+from .pricing import MAX_DTI_RATIO, MIN_CREDIT_SCORE, MIN_EMPLOYMENT_YEARS, calculate_interest_rate, loan_type_factors, price_loans, max_amounts, max_monthly_payment, meets_credit_rules, affordability_matrix
+from .tasks import update_payment_schedule
+from jobs.queue import enqueue
 import json
 import numpy as np
 
@@ -18,7 +27,7 @@ def loan_home(request):
     active_loans = Loan.objects.filter(
         user=request.user,
         status='active'
-    ).order_by('end_date')
+    ).select_related('loan_type').order_by('end_date')
     
     # Get user's simulated loans
     simulated_loans = Loan.objects.filter(
@@ -76,8 +85,12 @@ def loan_detail(request, pk):
     # Get loan payments
     payments = LoanPayment.objects.filter(loan=loan).order_by('payment_date')
     
+    # Optional what-if parameters for the theoretical schedule
+    extra_principal = parse_amount_param(request.GET.get('extra_principal'))
+    balloon = parse_amount_param(request.GET.get('balloon'))
+    
     # Calculate amortization schedule
-    amortization_schedule = []
+    amortization_schedule_rows = []
     
     if not loan.is_simulation and loan.status == 'active':
         # Calculate remaining payments
@@ -90,41 +103,28 @@ def loan_detail(request, pk):
         total_principal = sum(payment.principal_amount for payment in remaining_payments)
     else:
         # For simulations, calculate theoretical amortization schedule
-        principal = loan.amount
-        rate = loan.interest_rate / 100 / 12  # Monthly interest rate
-        term = loan.term_months
-        
-        # Calculate monthly payment using the formula: P = (r * PV) / (1 - (1 + r)^-n)
-        monthly_payment = (rate * principal) / (1 - (1 + rate) ** -term)
-        
-        # Generate amortization schedule
-        balance = principal
-        total_interest = 0
-        
-        for month in range(1, term + 1):
-            interest_payment = balance * rate
-            principal_payment = monthly_payment - interest_payment
-            balance -= principal_payment
-            
-            amortization_schedule.append({
-                'month': month,
-                'payment': monthly_payment,
-                'principal': principal_payment,
-                'interest': interest_payment,
-                'balance': max(0, balance)
-            })
-            
-            total_interest += interest_payment
+        schedule = amortization_schedule(
+            loan.amount,
+            loan.interest_rate,
+            loan.term_months,
+            extra_principal=extra_principal,
+            balloon=balloon
+        )
+        amortization_schedule_rows = schedule_rows(schedule)
+        totals = schedule_totals(schedule)
         
-        total_principal = principal
+        total_interest = totals['total_interest']
+        total_principal = totals['total_principal']
     
     context = {
         'loan': loan,
         'payments': payments,
-        'amortization_schedule': amortization_schedule,
+        'amortization_schedule': amortization_schedule_rows,
         'total_interest': total_interest,
         'total_principal': total_principal,
         'total_cost': total_interest + total_principal,
+        'extra_principal': extra_principal,
+        'balloon': balloon,
     }
     
     return render(request, 'loans/loan_detail.html', context)
@@ -146,11 +146,12 @@ def loan_create(request):
             if loan.status == 'active':
                 loan.remaining_balance = loan.amount
             
-            loan.save()
-            
-            # Generate payment schedule for active loans
-            if loan.status == 'active' and not loan.is_simulation:
-                generate_payment_schedule(loan)
+            with transaction.atomic():
+                loan.save()
+                
+                # Generate payment schedule for active loans in the background
+                if loan.status == 'active' and not loan.is_simulation:
+                    enqueue(update_payment_schedule, {'loan_id': loan.pk})
             
             messages.success(request, 'Loan created successfully!')
             return redirect('loans:loan_detail', pk=loan.pk)
@@ -173,19 +174,12 @@ def loan_edit(request, pk):
     if request.method == 'POST':
         form = LoanForm(request.POST, instance=loan, user=request.user)
         if form.is_valid():
-            loan = form.save()
-            
-            # Recalculate payment schedule if needed
-            if loan.status == 'active' and not loan.is_simulation:
-                # Delete future unpaid payments
-                LoanPayment.objects.filter(
-                    loan=loan,
-                    payment_date__gt=timezone.now().date(),
-                    is_paid=False
-                ).delete()
+            with transaction.atomic():
+                loan = form.save()
                 
-                # Regenerate payment schedule
-                generate_payment_schedule(loan)
+                # Recalculate future unpaid payments in the background if needed
+                if loan.status == 'active' and not loan.is_simulation:
+                    enqueue(update_payment_schedule, {'loan_id': loan.pk})
             
             messages.success(request, 'Loan updated successfully!')
             return redirect('loans:loan_detail', pk=loan.pk)
@@ -234,45 +228,32 @@ def loan_simulator(request):
             monthly_income = form.cleaned_data['monthly_income']
             existing_debt = form.cleaned_data.get('existing_debt') or 0
             
-            # Calculate monthly payment
+            # Calculate monthly payment (a user-chosen rate is rarely on a factor table's grid)
             term_months = term_years * 12
-            monthly_rate = interest_rate / 100 / 12
-            monthly_payment = (monthly_rate * amount) / (1 - (1 + monthly_rate) ** -term_months)
+            monthly_payment = to_money(round(float(price_loans(amount, interest_rate, term_months)['monthly_payment']) * 100))
             
             # Calculate debt-to-income ratio
             dti_ratio = ((monthly_payment + existing_debt) / monthly_income) * 100
             
             # Determine eligibility
-            is_eligible = dti_ratio <= 43  # Standard DTI threshold
+            is_eligible = dti_ratio <= MAX_DTI_RATIO  # Standard DTI threshold
             
-            # Create a simulated loan
-            loan = Loan.objects.create(
-                user=request.user,
-                loan_type=LoanType.objects.get_or_create(name=loan_type.capitalize())[0],
-                amount=amount,
-                interest_rate=interest_rate,
-                term_months=term_months,
-                monthly_payment=monthly_payment,
-                status='simulated',
-                is_simulation=True
-            )
-            
-            # Create eligibility record
-            eligibility = LoanEligibility.objects.create(
-                user=request.user,
-                loan_type=loan.loan_type,
-                requested_amount=amount,
-                requested_term_months=term_months,
-                is_eligible=is_eligible,
-                max_eligible_amount=amount if is_eligible else calculate_max_eligible_amount(monthly_income, existing_debt, interest_rate, term_months),
-                offered_interest_rate=interest_rate,
-                reason="Debt-to-income ratio is {:.1f}%. {}".format(
+            # Keep the results in a signed token; nothing is saved unless the user asks
+            token = dump_simulation(request.user, {
+                'loan_type': loan_type.capitalize(),
+                'amount': amount,
+                'interest_rate': interest_rate,
+                'term_months': term_months,
+                'monthly_payment': monthly_payment,
+                'is_eligible': is_eligible,
+                'max_eligible_amount': amount if is_eligible else calculate_max_eligible_amount(monthly_income, existing_debt, interest_rate, term_months),
+                'reason': "Debt-to-income ratio is {:.1f}%. {}".format(
                     dti_ratio,
-                    "This is within acceptable limits." if is_eligible else "This exceeds our maximum threshold of 43%."
-                )
-            )
+                    "This is within acceptable limits." if is_eligible else f"This exceeds our maximum threshold of {MAX_DTI_RATIO}%."
+                ),
+            })
             
-            return redirect('loans:loan_simulation_result', loan_id=loan.pk, eligibility_id=eligibility.pk)
+            return redirect('loans:loan_simulation_preview', token=token)
     else:
         form = LoanSimulatorForm()
     
@@ -282,48 +263,41 @@ def loan_simulator(request):
     
     return render(request, 'loans/loan_simulator.html', context)
 
+@login_required
+def loan_simulation_preview(request, token):
+    """View for displaying loan simulation results that have not been saved."""
+    try:
+        simulation = load_simulation(request.user, token)
+    except signing.BadSignature:
+        messages.error(request, 'This simulation has expired. Please run it again.')
+        return redirect('loans:loan_simulator')
+    
+    loan, eligibility = build_simulation(request.user, simulation)
+    return render_simulation(request, loan, eligibility, simulation_token=token)
+
+@login_required
+def loan_simulation_save(request):
+    """View for saving previewed simulation results."""
+    if request.method != 'POST':
+        return redirect('loans:loan_simulator')
+    
+    try:
+        simulation = load_simulation(request.user, request.POST.get('token', ''))
+    except signing.BadSignature:
+        messages.error(request, 'This simulation has expired. Please run it again.')
+        return redirect('loans:loan_simulator')
+    
+    loan, eligibility = save_simulation(request.user, simulation)
+    messages.success(request, 'Loan simulation saved.')
+    return redirect('loans:loan_simulation_result', loan_id=loan.pk, eligibility_id=eligibility.pk)
+
 @login_required
 def loan_simulation_result(request, loan_id, eligibility_id):
-    """View for displaying loan simulation results."""
+    """View for displaying saved loan simulation results."""
     loan = get_object_or_404(Loan, pk=loan_id, user=request.user, is_simulation=True)
     eligibility = get_object_or_404(LoanEligibility, pk=eligibility_id, user=request.user)
     
-    # Calculate amortization schedule
-    principal = loan.amount
-    rate = loan.interest_rate / 100 / 12  # Monthly interest rate
-    term = loan.term_months
-    monthly_payment = loan.monthly_payment
-    
-    # Generate amortization schedule
-    amortization_schedule = []
-    balance = principal
-    total_interest = 0
-    
-    for month in range(1, term + 1):
-        interest_payment = balance * rate
-        principal_payment = monthly_payment - interest_payment
-        balance -= principal_payment
-        
-        amortization_schedule.append({
-            'month': month,
-            'payment': monthly_payment,
-            'principal': principal_payment,
-            'interest': interest_payment,
-            'balance': max(0, balance)
-        })
-        
-        total_interest += interest_payment
-    
-    context = {
-        'loan': loan,
-        'eligibility': eligibility,
-        'amortization_schedule': amortization_schedule,
-        'total_interest': total_interest,
-        'total_cost': total_interest + principal,
-        'monthly_payment': monthly_payment,
-    }
-    
-    return render(request, 'loans/loan_simulation_result.html', context)
+    return render_simulation(request, loan, eligibility)
 
 @login_required
 def loan_payment_mark_paid(request, pk):
@@ -373,23 +347,22 @@ def loan_eligibility_check(request):
             # Calculate interest rate based on credit score
             interest_rate = calculate_interest_rate(loan_type, credit_score, employment_years)
             
-            # Calculate monthly payment
-            monthly_rate = interest_rate / 100 / 12
-            monthly_payment = (monthly_rate * requested_amount) / (1 - (1 + monthly_rate) ** -requested_term_months)
+            # Calculate monthly payment from the loan type's precomputed factors
+            table = loan_type_factors(loan_type)
+            monthly_payment = float(price_loans(requested_amount, interest_rate, requested_term_months, table)['monthly_payment'])
             
             # Calculate debt-to-income ratio
-            dti_ratio = ((monthly_payment + existing_monthly_debt) / monthly_income) * 100
+            dti_ratio = ((monthly_payment + float(existing_monthly_debt)) / float(monthly_income)) * 100
             
             # Determine eligibility
             is_eligible = (
-                dti_ratio <= 43 and  # Standard DTI threshold
-                credit_score >= 620 and  # Minimum credit score
-                employment_years >= 1  # Minimum employment history
+                dti_ratio <= MAX_DTI_RATIO and  # Standard DTI threshold
+                meets_credit_rules(credit_score, employment_years)  # Minimum credit score and employment history
             )
             
             # Calculate maximum eligible amount
             max_eligible_amount = calculate_max_eligible_amount(
-                monthly_income, existing_monthly_debt, interest_rate, requested_term_months
+                monthly_income, existing_monthly_debt, interest_rate, requested_term_months, table
             ) if not is_eligible else requested_amount
             
             # Create eligibility record
@@ -404,7 +377,7 @@ def loan_eligibility_check(request):
                 reason=generate_eligibility_reason(is_eligible, dti_ratio, credit_score, employment_years)
             )
             
-            return redirect('loan_eligibility_result', pk=eligibility.pk)
+            return redirect('loans:loan_eligibility_result', pk=eligibility.pk)
     else:
         form = LoanEligibilityForm()
     
@@ -414,6 +387,35 @@ def loan_eligibility_check(request):
     
     return render(request, 'loans/loan_eligibility_check.html', context)
 
+@login_required
+def loan_affordability_api(request):
+    """API endpoint returning eligibility and maximum amounts for every loan type and term.
+    
+    Nothing is saved: picking an offer posts it to the eligibility check.
+    """
+    form = AffordabilityForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    
+    data = form.cleaned_data
+    existing_debt = data.get('existing_monthly_debt') or 0
+    
+    # Every loan type and term in one vectorized pass
+    matrix = affordability_matrix(
+        LoanType.objects.order_by('name'),
+        data['monthly_income'],
+        existing_debt,
+        data['credit_score'],
+        data['employment_years'],
+        data.get('amount')
+    )
+    
+    return JsonResponse({
+        'max_monthly_payment': round(max(max_monthly_payment(data['monthly_income'], existing_debt), 0), 2),
+        'loan_types': matrix,
+        'select_url': reverse('loans:loan_eligibility_check'),
+    })
+
 @login_required
 def loan_eligibility_result(request, pk):
     """View for displaying loan eligibility results."""
@@ -422,8 +424,13 @@ def loan_eligibility_result(request, pk):
     # If eligible, calculate monthly payment
     monthly_payment = None
     if eligibility.is_eligible:
-        monthly_rate = eligibility.offered_interest_rate / 100 / 12
-        monthly_payment = (monthly_rate * eligibility.requested_amount) / (1 - (1 + monthly_rate) ** -eligibility.requested_term_months)
+        table = loan_type_factors(eligibility.loan_type) if eligibility.loan_type else None
+        monthly_payment = to_money(round(float(price_loans(
+            eligibility.requested_amount,
+            eligibility.offered_interest_rate,
+            eligibility.requested_term_months,
+            table
+        )['monthly_payment']) * 100))
     
     context = {
         'eligibility': eligibility,
@@ -434,105 +441,152 @@ def loan_eligibility_result(request, pk):
 
 # Helper functions
 
-def generate_payment_schedule(loan):
-    """Generate payment schedule for a loan."""
-    principal = loan.amount
-    rate = loan.interest_rate / 100 / 12  # Monthly interest rate
-    term = loan.term_months
-    
-    # Calculate monthly payment using the formula: P = (r * PV) / (1 - (1 + r)^-n)
-    monthly_payment = (rate * principal) / (1 - (1 + rate) ** -term)
-    
-    # Update loan's monthly payment
-    loan.monthly_payment = monthly_payment
-    loan.save()
-    
-    # Generate payment schedule
-    balance = principal
-    payment_date = loan.start_date
-    
-    for month in range(1, term + 1):
-        interest_payment = balance * rate
-        principal_payment = monthly_payment - interest_payment
-        balance -= principal_payment
-        
-        # Create payment record
-        LoanPayment.objects.create(
+def build_payment_rows(loan, schedule, today):
+    """Build unsaved payment records for every row of an amortization schedule."""
+    payments = []
+    
+    for row in schedule_rows(schedule):
+        payment_date = loan.start_date + relativedelta(months=row['month'] - 1)
+        payments.append(LoanPayment(
             loan=loan,
             payment_date=payment_date,
-            amount=monthly_payment,
-            principal_amount=principal_payment,
-            interest_amount=interest_payment,
-            remaining_balance=max(0, balance),
-            is_paid=payment_date < timezone.now().date()  # Mark past payments as paid
-        )
+            amount=row['payment'],
+            principal_amount=row['principal'],
+            interest_amount=row['interest'],
+            remaining_balance=row['balance'],
+            is_paid=payment_date < today  # Mark past payments as paid
+        ))
+    
+    return payments
+
+def update_monthly_payment(loan, schedule):
+    """Store the schedule's regular payment on the loan without a full save."""
+    monthly_payment = to_money(schedule['payment'][0])
+    
+    if loan.monthly_payment != monthly_payment:
+        Loan.objects.filter(pk=loan.pk).update(monthly_payment=monthly_payment)
+        loan.monthly_payment = monthly_payment
+
+def sync_payment_schedule(loan):
+    """Bring an edited loan's payment schedule up to date.
+    
+    Paid and past payments are kept as they are. Future unpaid payments
+    are compared with the recalculated schedule: only rows whose amounts
+    changed are updated, missing rows are created and rows that no longer
+    belong to the schedule are deleted.
+    
+    The loan row is locked first, so two jobs for the same loan run one
+    after the other (locking the payments alone locks nothing while a new
+    loan has none) and the later one works from the loan as last saved.
+    """
+    today = timezone.now().date()
+    fields = ['amount', 'principal_amount', 'interest_amount', 'remaining_balance']
+    
+    with transaction.atomic():
+        loan = Loan.objects.select_for_update().filter(pk=loan.pk).first()
+        if loan is None or not loan.start_date:
+            return
+        
+        schedule = amortization_schedule(loan.amount, loan.interest_rate, loan.term_months)
+        update_monthly_payment(loan, schedule)
         
-        # Move to next month
-        payment_date = payment_date + relativedelta(months=1)
+        existing = list(LoanPayment.objects.select_for_update().filter(loan=loan))
+        existing_dates = {payment.payment_date for payment in existing}
+        open_payments = {
+            payment.payment_date: payment
+            for payment in existing
+            if payment.payment_date > today and not payment.is_paid
+        }
+        
+        to_create = []
+        to_update = []
+        scheduled_dates = set()
+        
+        for payment in build_payment_rows(loan, schedule, today):
+            scheduled_dates.add(payment.payment_date)
+            current = open_payments.get(payment.payment_date)
+            
+            if current is not None:
+                if any(getattr(current, field) != getattr(payment, field) for field in fields):
+                    for field in fields:
+                        setattr(current, field, getattr(payment, field))
+                    to_update.append(current)
+            elif payment.payment_date not in existing_dates:
+                to_create.append(payment)
+        
+        stale = [payment.pk for date, payment in open_payments.items() if date not in scheduled_dates]
+        
+        if stale:
+            LoanPayment.objects.filter(pk__in=stale).delete()
+        if to_update:
+            LoanPayment.objects.bulk_update(to_update, fields, batch_size=500)
+        if to_create:
+            LoanPayment.objects.bulk_create(to_create, batch_size=500)
 
-def calculate_interest_rate(loan_type, credit_score, employment_years):
-    """Calculate interest rate based on loan type, credit score, and employment history."""
-    # Base rate from loan type
-    base_rate = loan_type.base_interest_rate
-    
-    # Adjust for credit score
-    if credit_score >= 800:
-        credit_adjustment = -1.0
-    elif credit_score >= 750:
-        credit_adjustment = -0.5
-    elif credit_score >= 700:
-        credit_adjustment = 0
-    elif credit_score >= 650:
-        credit_adjustment = 0.5
-    elif credit_score >= 600:
-        credit_adjustment = 1.5
-    else:
-        credit_adjustment = 3.0
+def render_simulation(request, loan, eligibility, simulation_token=None):
+    """Render a simulation's results and amortization schedule, saved or not."""
+    # Optional what-if parameters
+    extra_principal = parse_amount_param(request.GET.get('extra_principal'))
+    balloon = parse_amount_param(request.GET.get('balloon'))
     
-    # Adjust for employment history
-    if employment_years >= 5:
-        employment_adjustment = -0.25
-    elif employment_years >= 2:
-        employment_adjustment = 0
-    else:
-        employment_adjustment = 0.25
+    # Calculate amortization schedule (a balloon lowers the regular payment)
+    monthly_payment = loan.monthly_payment
+    if balloon:
+        monthly_payment = to_money(round(calculate_monthly_payment(loan.amount, loan.interest_rate, loan.term_months, balloon) * 100))
+    
+    schedule = amortization_schedule(
+        loan.amount,
+        loan.interest_rate,
+        loan.term_months,
+        extra_principal=extra_principal,
+        balloon=balloon
+    )
+    totals = schedule_totals(schedule)
     
-    # Calculate final rate
-    final_rate = base_rate + credit_adjustment + employment_adjustment
+    context = {
+        'loan': loan,
+        'eligibility': eligibility,
+        'amortization_schedule': schedule_rows(schedule),
+        'total_interest': totals['total_interest'],
+        'total_cost': totals['total_cost'],
+        'monthly_payment': monthly_payment,
+        'extra_principal': extra_principal,
+        'balloon': balloon,
+        'simulation_token': simulation_token,
+    }
     
-    # Ensure rate is within reasonable bounds
-    return max(2.0, min(final_rate, 18.0))
+    return render(request, 'loans/loan_simulation_result.html', context)
+
+def parse_amount_param(value):
+    """Parse an optional non-negative amount from a query parameter."""
+    try:
+        amount = Decimal(value) if value else Decimal('0')
+    except InvalidOperation:
+        return Decimal('0')
+    return amount if amount.is_finite() and amount > 0 else Decimal('0')
 
-def calculate_max_eligible_amount(monthly_income, existing_debt, interest_rate, term_months):
+def calculate_max_eligible_amount(monthly_income, existing_debt, interest_rate, term_months, table=None):
     """Calculate maximum eligible loan amount based on income and existing debt."""
-    # Maximum DTI ratio (43%)
-    max_dti = 0.43
-    
-    # Maximum monthly payment available
-    max_payment = (monthly_income * max_dti) - existing_debt
-    
-    # If max payment is negative or zero, return 0
-    if max_payment <= 0:
-        return 0
+    # Maximum monthly payment within the DTI limit (nothing can be borrowed if it is not positive)
+    max_payment = max_monthly_payment(monthly_income, existing_debt)
     
-    # Calculate maximum loan amount using the formula: PV = P * ((1 - (1 + r)^-n) / r)
-    monthly_rate = interest_rate / 100 / 12
-    max_amount = max_payment * ((1 - (1 + monthly_rate) ** -term_months) / monthly_rate)
+    # Maximum loan amount: PV = P * ((1 - (1 + r)^-n) / r), with the factor from the loan type's table
+    max_amount = max_amounts(max_payment, interest_rate, term_months, table)
     
-    return max_amount
+    return to_money(round(float(max_amount) * 100))
 
 def generate_eligibility_reason(is_eligible, dti_ratio, credit_score, employment_years):
     """Generate a reason for loan eligibility decision."""
     reasons = []
     
-    if dti_ratio > 43:
-        reasons.append(f"Your debt-to-income ratio ({dti_ratio:.1f}%) exceeds our maximum threshold of 43%.")
+    if dti_ratio > MAX_DTI_RATIO:
+        reasons.append(f"Your debt-to-income ratio ({dti_ratio:.1f}%) exceeds our maximum threshold of {MAX_DTI_RATIO}%.")
     
-    if credit_score < 620:
-        reasons.append(f"Your credit score ({credit_score}) is below our minimum requirement of 620.")
+    if credit_score < MIN_CREDIT_SCORE:
+        reasons.append(f"Your credit score ({credit_score}) is below our minimum requirement of {MIN_CREDIT_SCORE}.")
     
-    if employment_years < 1:
-        reasons.append(f"Your employment history ({employment_years:.1f} years) is below our minimum requirement of 1 year.")
+    if employment_years < MIN_EMPLOYMENT_YEARS:
+        reasons.append(f"Your employment history ({employment_years:.1f} years) is below our minimum requirement of {MIN_EMPLOYMENT_YEARS} year.")
     
     if is_eligible:
         return "Congratulations! You are eligible for this loan."
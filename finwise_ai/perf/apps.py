@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PerfConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'perf'
+
+    def ready(self):
+        # Register the database connection self-checks
+        from . import checks  # noqa: F401
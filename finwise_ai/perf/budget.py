@@ -0,0 +1,220 @@
+import json
+import time
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse, URLPattern, URLResolver
+
+# URLs that change the session or send mail on GET
+SKIPPED_URLS = {'accounts:logout', 'accounts:resend_verification', 'admin:logout'}
+
+# Views that do not answer a plain GET with a 2xx or 3xx, and the status they
+# are known to return; any other view that errors fails the budget suite
+EXPECTED_STATUSES = {
+    # Requests the view rejects by design
+    'admin:autocomplete': 403,  # Needs app_label, model_name and field_name
+    'loans:loan_affordability_api': 400,  # Needs the loan parameters
+    'agent_interface:process_prompt': 405,  # POST only
+    
+    # Templates that do not exist yet
+    'dashboard:expense_trends': 500,
+    'dashboard:income_vs_expenses': 500,
+    'dashboard:net_worth_tracker': 500,
+    'goals:goal_delete': 500,
+    'goals:contribution_delete': 500,
+    'goals:milestone_add': 500,
+    'goals:milestone_edit': 500,
+    'goals:milestone_delete': 500,
+    'goals:savings_plan': 500,
+    'loans:loan_delete': 500,
+    'loans:loan_payment_mark_paid': 500,
+    'loans:loan_eligibility_result': 500,
+    'investments:investment_delete': 500,
+    'investments:transaction_add': 500,
+    'investments:transaction_delete': 500,
+    'investments:investment_type_list': 500,
+    'investments:investment_type_create': 500,
+    'investments:investment_simulation_result': 500,
+    'credit:credit_history_delete': 500,
+    'credit:quick_credit_estimator': 500,
+    
+    # Templates that link to URLs or use filters that do not exist
+    'goals:goal_list': 500,  # goals:contribution_create
+    'loans:loan_eligibility_check': 500,  # loans:loan_list
+    'investments:investments_home': 500,  # investments:transaction_create
+    'investments:portfolio_analysis': 500,  # The mul and div filters
+    
+    # Views that read fields the models do not have or mix Decimals and floats
+    'dashboard:financial_goals_progress': 500,  # SavingsGoal.is_completed
+    'dashboard:budget_performance': 500,  # Decimal * float
+    'investments:investment_detail': 500,  # Decimal ** float
+    'credit:credit_estimation_result': 500,  # CreditFactor.estimation
+    'credit:mark_suggestion_implemented': 500,  # ImprovementSuggestion.user
+    'credit:credit_score_comparison': 500,  # UserProfile.birth_date
+}
+
+# How to fill in the arguments of each URL from the seeded objects
+URL_ARGUMENTS = {
+    'expenses:expense_edit': lambda objects: {'pk': objects['expense'].pk},
+    'expenses:expense_delete': lambda objects: {'pk': objects['expense'].pk},
+    'expenses:category_edit': lambda objects: {'pk': objects['category'].pk},
+    'expenses:category_delete': lambda objects: {'pk': objects['category'].pk},
+    'expenses:recurring_expense_edit': lambda objects: recurring_arguments(objects['recurring_expense']),
+    'expenses:recurring_expense_mark_paid': lambda objects: recurring_arguments(objects['recurring_expense']),
+    'expenses:mark_anomaly_reviewed': lambda objects: {'pk': objects['anomaly'].pk},
+    'goals:goal_detail': lambda objects: {'pk': objects['goal'].pk},
+    'goals:goal_edit': lambda objects: {'pk': objects['goal'].pk},
+    'goals:goal_delete': lambda objects: {'pk': objects['goal'].pk},
+    'goals:goal_progress_chart': lambda objects: {'pk': objects['goal'].pk},
+    'goals:contribution_add': lambda objects: {'goal_id': objects['goal'].pk},
+    'goals:contribution_delete': lambda objects: {'pk': objects['contribution'].pk},
+    'goals:milestone_add': lambda objects: {'goal_id': objects['goal'].pk},
+    'goals:milestone_edit': lambda objects: {'pk': objects['milestone'].pk},
+    'goals:milestone_delete': lambda objects: {'pk': objects['milestone'].pk},
+    'loans:loan_detail': lambda objects: {'pk': objects['loan'].pk},
+    'loans:loan_edit': lambda objects: {'pk': objects['loan'].pk},
+    'loans:loan_delete': lambda objects: {'pk': objects['loan'].pk},
+    'loans:loan_simulation_result': lambda objects: {'loan_id': objects['simulated_loan'].pk, 'eligibility_id': objects['eligibility'].pk},
+    'loans:loan_simulation_preview': lambda objects: {'token': simulation_token(objects['simulated_loan'], objects['eligibility'])},
+    'loans:loan_payment_mark_paid': lambda objects: {'pk': objects['loan_payment'].pk},
+    'loans:loan_eligibility_result': lambda objects: {'pk': objects['eligibility'].pk},
+    'investments:investment_detail': lambda objects: {'pk': objects['investment'].pk},
+    'investments:investment_edit': lambda objects: {'pk': objects['investment'].pk},
+    'investments:investment_delete': lambda objects: {'pk': objects['investment'].pk},
+    'investments:transaction_add': lambda objects: {'investment_id': objects['investment'].pk},
+    'investments:transaction_delete': lambda objects: {'pk': objects['investment_transaction'].pk},
+    'investments:investment_simulation_result': lambda objects: {'pk': objects['simulation'].pk},
+    'credit:credit_history_edit': lambda objects: {'pk': objects['credit_history'].pk},
+    'credit:credit_history_delete': lambda objects: {'pk': objects['credit_history'].pk},
+    'credit:credit_estimation_result': lambda objects: {'pk': objects['estimation'].pk},
+    'credit:mark_suggestion_implemented': lambda objects: {'pk': objects['suggestion'].pk},
+    'accounts:verify_email': lambda objects: {'token': 'invalid-token'},
+    'accounts:password_reset_confirm': lambda objects: {'token': 'invalid-token'},
+}
+
+def recurring_arguments(expense):
+    """URL arguments for the first generated occurrence of a recurring expense."""
+    from expenses.utils import occurrence_dates
+    
+    occurrence_date = next(occurrence_dates(expense.date, expense.recurrence, expense.recurrence_end_date))
+    return {'expense_id': expense.pk, 'occurrence_date': occurrence_date.isoformat()}
+
+def simulation_token(loan, eligibility):
+    """A fresh token for the unsaved preview of a seeded simulation."""
+    from loans.simulation import dump_simulation, simulation_from_records
+    
+    return dump_simulation(loan.user, simulation_from_records(loan, eligibility))
+
+def iter_url_patterns(patterns=None, prefix='', namespace=None):
+    """Yield (name, route, pattern) for every named URL of the project."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_url_patterns(
+                pattern.url_patterns,
+                prefix + str(pattern.pattern),
+                pattern.namespace or namespace
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, prefix + str(pattern.pattern), pattern
+
+def get_view_urls(objects):
+    """Build a {url name: path} dict of every view to measure for one seeded user.
+    
+    Admin pages that need an object id are left out; the admin change lists
+    and add forms are measured like any other view.
+    """
+    urls = {}
+    for name, route, pattern in iter_url_patterns():
+        if name in SKIPPED_URLS:
+            continue
+        
+        arguments = URL_ARGUMENTS.get(name)
+        if arguments is None and pattern.pattern.regex.groups:
+            if name.startswith('admin:'):
+                continue
+            raise KeyError(f'No URL arguments defined for {name} ({route})')
+        
+        urls[name] = reverse(name, kwargs=arguments(objects) if arguments else None)
+    
+    return urls
+
+def measure_view(client, url):
+    """Request a URL once and record its status, query count, SQL time and wall time."""
+    cache.clear()
+    
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        try:
+            response = client.get(url)
+            status = response.status_code
+            error = None
+        except Exception as exc:
+            # Missing templates and broken views still tell us how many queries ran
+            status = 500
+            error = f'{type(exc).__name__}: {exc}'
+        wall_time = time.perf_counter() - started
+    
+    return {
+        'url': url,
+        'status': status,
+        'error': error,
+        'queries': len(queries),
+        'sql_time': round(sum(float(query['time']) for query in queries.captured_queries), 6),
+        'wall_time': round(wall_time, 6),
+    }
+
+def find_query_growth(report, tolerance=0):
+    """Find views whose query count grows with the data size.
+    
+    ``report`` maps data sizes to {url name: measurement}. Returns
+    {url name: {size: query count}} for every view that needed more than
+    ``tolerance`` extra queries at a larger size.
+    """
+    sizes = sorted(report, key=int)
+    growth = {}
+    
+    for name in report[sizes[0]]:
+        counts = {size: report[size][name]['queries'] for size in sizes if name in report[size]}
+        if max(counts.values()) - counts[sizes[0]] > tolerance:
+            growth[name] = counts
+    
+    return growth
+
+def find_unexpected_statuses(report):
+    """Find views that answered with a status they are not expected to.
+    
+    A view must return a 2xx or 3xx unless it is listed in EXPECTED_STATUSES,
+    in which case it must return that status, so a listed view that gets
+    fixed is noticed too. Returns {url name: {size: (status, error)}}.
+    """
+    unexpected = {}
+    
+    for size, views in report.items():
+        for name, measurement in views.items():
+            status = measurement['status']
+            expected = EXPECTED_STATUSES.get(name)
+            if (expected is None and status >= 400) or (expected is not None and status != expected):
+                unexpected.setdefault(name, {})[size] = (status, measurement['error'])
+    
+    return unexpected
+
+def compare_reports(previous, current, tolerance=0):
+    """Find views that run more queries than in a previous report, size by size."""
+    regressions = {}
+    
+    for size, views in current['sizes'].items():
+        for name, measurement in views.items():
+            before = previous['sizes'].get(size, {}).get(name)
+            if before and measurement['queries'] - before['queries'] > tolerance:
+                regressions.setdefault(name, {})[size] = (before['queries'], measurement['queries'])
+    
+    return regressions
+
+def write_report(path, sizes, metadata=None):
+    """Write the measurements as JSON so runs on different commits can be compared."""
+    with open(path, 'w') as report_file:
+        json.dump({'metadata': metadata or {}, 'sizes': sizes}, report_file, indent=2, sort_keys=True)
@@ -0,0 +1,129 @@
+import os
+import time
+from django.conf import settings
+from django.core.checks import Error, Info, Warning, Tags, register
+from django.db import connections
+
+@register()
+def check_connection_settings(app_configs, **kwargs):
+    """Check that the connection persistence and pooling settings can work."""
+    messages = []
+    is_asgi = getattr(settings, 'SERVER_INTERFACE', 'wsgi') == 'asgi'
+    
+    if is_asgi:
+        try:
+            import uvicorn_worker  # noqa: F401
+        except ImportError:
+            messages.append(Error(
+                'SERVER_INTERFACE=asgi runs gunicorn with uvicorn workers, but uvicorn-worker is not installed.',
+                hint="pip install uvicorn-worker, or set SERVER_INTERFACE=wsgi.",
+                id='perf.E003'
+            ))
+    
+    for alias, database in settings.DATABASES.items():
+        is_postgresql = database['ENGINE'] == 'django.db.backends.postgresql'
+        pool = database.get('OPTIONS', {}).get('pool')
+        
+        if alias == 'default' and getattr(settings, 'DB_POOL', False) and not is_postgresql:
+            messages.append(Warning(
+                'DB_POOL is ignored: connection pooling needs PostgreSQL.',
+                id='perf.W001'
+            ))
+        
+        if pool:
+            try:
+                import psycopg  # noqa: F401
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                messages.append(Error(
+                    f'Database "{alias}" asks for a connection pool but psycopg 3 or psycopg_pool is not installed.',
+                    hint="pip install 'psycopg[binary,pool]', or set DB_POOL=False.",
+                    id='perf.E001'
+                ))
+        elif is_asgi and database.get('CONN_MAX_AGE', 0) != 0:
+            messages.append(Warning(
+                f'Database "{alias}" keeps connections open under ASGI, where each request '
+                f'queries from a thread of its own, so they pile up instead of being reused.',
+                hint='Set DB_CONN_MAX_AGE=0, and DB_POOL=True on PostgreSQL to reuse connections.',
+                id='perf.W003'
+            ))
+        elif is_postgresql and not database.get('CONN_MAX_AGE'):
+            messages.append(Warning(
+                f'Database "{alias}" opens a new PostgreSQL connection for every request.',
+                hint='Set DB_POOL=True to pool them.' if is_asgi else 'Set DB_CONN_MAX_AGE to keep connections open, or DB_POOL=True to pool them.',
+                id='perf.W002'
+            ))
+    
+    return messages
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Check that every process that writes data sees the same cache.
+    
+    Dashboard responses are invalidated by bumping a version in the cache,
+    so a per-process cache only invalidates the process that handled the
+    write.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    web_workers = int(os.getenv('WEB_CONCURRENCY', 1))
+    processes = []
+    
+    if web_workers > 1:
+        processes.append(f'{web_workers} web workers')
+    if not getattr(settings, 'JOBS_EAGER', False):
+        processes.append('the job worker')
+    
+    if backend == 'django.core.cache.backends.locmem.LocMemCache' and processes:
+        return [Warning(
+            f"The default cache is local memory, which is not shared with {' or '.join(processes)}, "
+            f"so dashboard responses go stale after writes made in another process.",
+            hint='Set CACHE_BACKEND to a shared backend, e.g. django.core.cache.backends.db.DatabaseCache.',
+            id='perf.W004'
+        )]
+    
+    return []
+
+@register(Tags.database, deploy=True)
+def check_database_connections(app_configs, databases=None, **kwargs):
+    """Connect to each database and report how its connections are managed.
+    
+    Only runs with ``manage.py check --deploy --database <alias>``, e.g. as a
+    release step, so a wrong URL or pool setting fails the deploy rather
+    than the first requests.
+    """
+    messages = []
+    
+    for alias in databases or []:
+        connection = connections[alias]
+        
+        try:
+            started = time.perf_counter()
+            connection.ensure_connection()
+            connected = time.perf_counter() - started
+            
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            round_trip = time.perf_counter() - started
+        except Exception as error:
+            messages.append(Error(f'Cannot use database "{alias}": {error}', id='perf.E002'))
+            continue
+        
+        pool = connection.settings_dict.get('OPTIONS', {}).get('pool')
+        if pool:
+            managed = f"pool of {pool.get('min_size', 4)}-{pool.get('max_size', 'unlimited')} connections"
+        elif connection.settings_dict['CONN_MAX_AGE'] is None:
+            managed = 'persistent connections'
+        elif connection.settings_dict['CONN_MAX_AGE']:
+            managed = f"connections reused for {connection.settings_dict['CONN_MAX_AGE']}s"
+        else:
+            managed = 'a new connection per request'
+        
+        messages.append(Info(
+            f'Database "{alias}" ({connection.vendor}): {managed}, '
+            f'connected in {connected * 1000:.1f} ms, SELECT 1 in {round_trip * 1000:.2f} ms.',
+            id='perf.I001'
+        ))
+    
+    return messages
@@ -0,0 +1,273 @@
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from django.conf import settings
+
+# Weighted request mix: name -> method, path, payload kind (sent as JSON if 'json') and relative weight
+DEFAULT_MIX = {
+    'dashboard_home': {'method': 'GET', 'path': '/', 'weight': 40},
+    'expense_list': {'method': 'GET', 'path': '/expenses/list/', 'weight': 25},
+    'loan_simulator': {'method': 'POST', 'path': '/loans/simulator/', 'payload': 'loan_simulation', 'weight': 10},
+    'investment_simulator': {'method': 'POST', 'path': '/investments/simulator/', 'payload': 'investment_simulation', 'weight': 10},
+    'process_prompt': {'method': 'POST', 'path': '/agent/process-prompt/', 'payload': 'prompt', 'json': True, 'weight': 15},
+}
+
+# Lightweight JSON endpoints that pages poll, served by async views under ASGI (see benchmark_servers)
+POLLING_MIX = {
+    'expense_breakdown': {'method': 'GET', 'path': '/api/expense-breakdown/', 'weight': 30},
+    'weekly_spending': {'method': 'GET', 'path': '/api/weekly-spending/', 'weight': 30},
+    'credit_score_chart': {'method': 'GET', 'path': '/credit/score-chart/', 'weight': 20},
+    'process_prompt': {**DEFAULT_MIX['process_prompt'], 'weight': 20},
+}
+
+PROMPTS = [
+    'show my expense summary',
+    'how is my loan debt looking',
+    'what is my savings goal progress',
+    'how is my investment portfolio doing',
+    'give me a dashboard overview',
+]
+
+def build_mix(weights=None, base=DEFAULT_MIX):
+    """Copy a mix, with weights overridden by a string like 'dashboard_home=50,expense_list=50'.
+    
+    A weight of 0 drops an endpoint. Raises ValueError for unknown endpoint names.
+    """
+    mix = {name: dict(endpoint) for name, endpoint in base.items()}
+    if not weights:
+        return mix
+    
+    for item in weights.split(','):
+        name, _, weight = item.partition('=')
+        if name not in mix:
+            raise ValueError(f"Unknown endpoint {name}; choose from {', '.join(mix)}")
+        mix[name]['weight'] = float(weight)
+    
+    return {name: endpoint for name, endpoint in mix.items() if endpoint['weight'] > 0}
+
+def build_payload(kind, rng, context):
+    """Form (or JSON) data for a POST endpoint, varied a little per request."""
+    if kind == 'loan_simulation':
+        return {
+            'loan_type': rng.choice(['personal', 'auto', 'mortgage', 'student']),
+            'amount': rng.randint(5, 500) * 1000,
+            'interest_rate': rng.choice([8.5, 12.5, 18.0, 24.0]),
+            'term_years': rng.choice([1, 3, 5, 10]),
+            'monthly_income': rng.randint(15, 90) * 1000,
+            'existing_debt': rng.randint(0, 10) * 500,
+        }
+    if kind == 'investment_simulation':
+        return {
+            'investment_type': context['investment_type_id'],
+            'name': 'Load test simulation',
+            'strategy': rng.choice(['lump_sum', 'dca']),
+            'initial_amount': rng.randint(1, 100) * 1000,
+            'periodic_amount': rng.randint(0, 20) * 100,
+            'period_months': 1,
+            'duration_years': rng.choice([5, 10, 20]),
+            'expected_return': 8,
+            'volatility': 15,
+            'inflation_rate': 2,
+        }
+    if kind == 'prompt':
+        return {'prompt': rng.choice(PROMPTS)}
+    return None
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects instead of following them, so each request is timed on its own."""
+    
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class LoadTestClient:
+    """A logged-in session against the server under test."""
+    
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+    
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ''
+    
+    def request(self, method, path, data=None, json_body=False):
+        """Send one request; returns (status, seconds). Network errors give status 0."""
+        url = self.base_url + path
+        headers = {'Referer': url, 'X-CSRFToken': self.csrf_token()}
+        body = None
+        
+        if data is not None:
+            if json_body:
+                body = json.dumps(data).encode()
+                headers['Content-Type'] = 'application/json'
+            else:
+                body = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': self.csrf_token()}).encode()
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        
+        started = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(url, body, headers, method=method), timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            status = error.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        
+        return status, time.perf_counter() - started
+    
+    def login(self, email, password):
+        """Log in through the real login form; returns True on success."""
+        self.request('GET', '/accounts/login/')
+        status, _ = self.request('POST', '/accounts/login/', {'username': email, 'password': password})
+        return status == 302
+
+def login_clients(base_url, emails, password, threads=8):
+    """Log users in ahead of one or more test runs, a few at a time.
+    
+    Returns (clients by email, failed_logins).
+    """
+    def login(email):
+        client = LoadTestClient(base_url)
+        return email, client, client.login(email, password)
+    
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(login, emails))
+    
+    clients = {email: client for email, client, logged_in in results if logged_in}
+    return clients, [email for email, _, logged_in in results if not logged_in]
+
+def run_load_test(base_url, emails, password, duration, mix, context, think_time=0, seed=0, clients=None):
+    """Replay the weighted mix with one thread per user for ``duration`` seconds.
+    
+    Users log in first unless ``clients`` (from login_clients) has them
+    already. Returns (samples, elapsed, failed_logins), where samples is a
+    list of (endpoint name, status, seconds) tuples.
+    """
+    names = list(mix)
+    weights = [mix[name]['weight'] for name in names]
+    samples = []
+    failed_logins = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(len(emails) + 1)
+    
+    def virtual_user(email):
+        rng = random.Random(f'{seed}:{email}')
+        if clients and email in clients:
+            client, logged_in = clients[email], True
+        else:
+            client = LoadTestClient(base_url)
+            logged_in = client.login(email, password)
+        start_barrier.wait()
+        
+        if not logged_in:
+            with lock:
+                failed_logins.append(email)
+            return
+        
+        own_samples = []
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            endpoint = mix[name]
+            payload = build_payload(endpoint.get('payload'), rng, context)
+            status, seconds = client.request(endpoint['method'], endpoint['path'], payload, json_body=endpoint.get('json', False))
+            own_samples.append((name, status, seconds))
+            if think_time:
+                time.sleep(rng.uniform(0, 2 * think_time))
+        
+        with lock:
+            samples.extend(own_samples)
+    
+    threads = [threading.Thread(target=virtual_user, args=(email,), daemon=True) for email in emails]
+    deadline = float('inf')
+    for thread in threads:
+        thread.start()
+    
+    # Logins are not measured: the clock starts once every user is in
+    start_barrier.wait()
+    started = time.perf_counter()
+    deadline = started + duration
+    for thread in threads:
+        thread.join()
+    
+    return samples, time.perf_counter() - started, failed_logins
+
+def summarize(samples, elapsed):
+    """Throughput, error count and latency percentiles per endpoint, plus a total row."""
+    by_name = {}
+    for name, status, seconds in samples:
+        by_name.setdefault(name, []).append((status, seconds))
+    by_name['total'] = [(status, seconds) for _, status, seconds in samples]
+    
+    summary = {}
+    for name, rows in by_name.items():
+        if not rows:
+            continue
+        latencies = np.array([seconds for _, seconds in rows]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for status, _ in rows if not 200 <= status < 400),
+            'throughput': round(len(rows) / elapsed, 2),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(latencies.max()), 2),
+        }
+    
+    return summary
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(kind, port, workers=2, threads=1, env=None):
+    """Start a local runserver, gunicorn (WSGI) or gunicorn with uvicorn workers (ASGI); returns the process.
+    
+    ``env`` adds environment variables (e.g. database settings) for the server only.
+    """
+    if kind == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'finwise.wsgi:application', '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers), '--threads', str(threads)
+        ]
+    elif kind == 'uvicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'finwise.asgi:application', '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers), '--worker-class', 'uvicorn_worker.UvicornWorker'
+        ]
+        env = {'SERVER_INTERFACE': 'asgi', **(env or {})}
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+    
+    return subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def wait_for_server(base_url, timeout=30):
+    """Poll the login page until the server answers."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        status, _ = LoadTestClient(base_url, timeout=2).request('GET', '/accounts/login/')
+        if status:
+            return True
+        time.sleep(0.2)
+    return False
@@ -0,0 +1,90 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from investments.models import InvestmentType
+from perf.loadtest import build_mix, run_load_test, summarize, free_port, start_server, wait_for_server
+
+# Server environment for each way of managing database connections (see DATABASES in settings)
+CONNECTION_MODES = {
+    'reconnect': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+class Command(BaseCommand):
+    help = 'Compares request latency under gunicorn with new, persistent and pooled PostgreSQL connections'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(CONNECTION_MODES), help=f"Comma-separated modes to run, from {', '.join(CONNECTION_MODES)}")
+        parser.add_argument('--server-workers', type=int, default=2, help='Gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker (the pool is shared by them)')
+        parser.add_argument('--users', type=int, default=16, help='Concurrent virtual users')
+        parser.add_argument('--prefix', default='load', help='Log in as <prefix><number>@example.com (see generate_load_dataset)')
+        parser.add_argument('--start', type=int, default=0, help='Number of the first user to log in as')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to run each mode')
+        parser.add_argument('--endpoints', default='dashboard_home,expense_list', help='Comma-separated load_test endpoints to request, equally often')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Point DATABASE_URL at PostgreSQL to compare how connections are managed')
+        
+        modes = options['modes'].split(',')
+        unknown = [mode for mode in modes if mode not in CONNECTION_MODES]
+        if unknown:
+            raise CommandError(f"Unknown mode {unknown[0]}; choose from {', '.join(CONNECTION_MODES)}")
+        
+        mix = build_mix()
+        endpoints = options['endpoints'].split(',')
+        unknown = [name for name in endpoints if name not in mix]
+        if unknown:
+            raise CommandError(f"Unknown endpoint {unknown[0]}; choose from {', '.join(mix)}")
+        mix = {name: {**mix[name], 'weight': 1} for name in endpoints}
+        
+        emails = [f"{options['prefix']}{number}@example.com" for number in range(options['start'], options['start'] + options['users'])]
+        context = {
+            'investment_type_id': InvestmentType.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        results = {}
+        
+        for mode in modes:
+            port = free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            server = start_server('gunicorn', port, options['server_workers'], options['threads'], env=CONNECTION_MODES[mode])
+            
+            try:
+                if not wait_for_server(base_url):
+                    raise CommandError(f'gunicorn did not start for mode {mode}')
+                
+                self.stdout.write(f"Running {mode} for {options['duration']}s with {options['users']} users")
+                samples, elapsed, failed_logins = run_load_test(
+                    base_url, emails, options['password'], options['duration'], mix, context, seed=options['seed']
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            
+            if failed_logins:
+                raise CommandError(f'{len(failed_logins)} users could not log in, e.g. {failed_logins[0]}')
+            if not samples:
+                raise CommandError(f'No requests were made in mode {mode}')
+            
+            results[mode] = summarize(samples, elapsed)
+        
+        self.print_results(results)
+        
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({'options': {key: options[key] for key in ['server_workers', 'threads', 'users', 'duration', 'endpoints']}, 'results': results}, output_file, indent=2)
+    
+    def print_results(self, results):
+        header = f"{'mode':<12}{'endpoint':<18}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        
+        for mode, summary in results.items():
+            for name, row in summary.items():
+                line = f"{mode:<12}{name:<18}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+                self.stdout.write(self.style.WARNING(line) if row['errors'] else line)
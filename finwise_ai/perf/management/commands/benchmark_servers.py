@@ -0,0 +1,115 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from investments.models import InvestmentType
+from perf.loadtest import DEFAULT_MIX, POLLING_MIX, login_clients, run_load_test, summarize, free_port, start_server, wait_for_server
+
+# Local server started for each deployment mode (see finwise/gunicorn.conf.py)
+INTERFACES = {
+    'wsgi': 'gunicorn',
+    'asgi': 'uvicorn',
+}
+
+class Command(BaseCommand):
+    help = 'Compares how many concurrent pollers gunicorn serves with sync (WSGI) and uvicorn (ASGI) workers'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--interfaces', default=','.join(INTERFACES), help=f"Comma-separated deployment modes to run, from {', '.join(INTERFACES)}")
+        parser.add_argument('--server-workers', type=int, default=2, help='Gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per sync (WSGI) worker')
+        parser.add_argument('--concurrency', default='8,32,128', help='Comma-separated numbers of concurrent virtual users to try')
+        parser.add_argument('--max-p95', type=float, default=1000, help='p95 latency (ms) a concurrency level must stay under to count as served')
+        parser.add_argument('--prefix', default='load', help='Log in as <prefix><number>@example.com (see generate_load_dataset)')
+        parser.add_argument('--start', type=int, default=0, help='Number of the first user to log in as')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds to run each concurrency level')
+        parser.add_argument('--think-time', type=float, default=0, help='Average pause between the polls of one user, in seconds')
+        parser.add_argument('--endpoints', default=','.join(POLLING_MIX), help='Comma-separated load_test endpoints to request, equally often')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+    
+    def handle(self, *args, **options):
+        interfaces = options['interfaces'].split(',')
+        unknown = [interface for interface in interfaces if interface not in INTERFACES]
+        if unknown:
+            raise CommandError(f"Unknown interface {unknown[0]}; choose from {', '.join(INTERFACES)}")
+        
+        try:
+            levels = sorted(int(level) for level in options['concurrency'].split(','))
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated numbers of users')
+        
+        endpoints = {**DEFAULT_MIX, **POLLING_MIX}
+        names = options['endpoints'].split(',')
+        unknown = [name for name in names if name not in endpoints]
+        if unknown:
+            raise CommandError(f"Unknown endpoint {unknown[0]}; choose from {', '.join(endpoints)}")
+        mix = {name: {**endpoints[name], 'weight': 1} for name in names}
+        
+        emails = [f"{options['prefix']}{number}@example.com" for number in range(options['start'], options['start'] + levels[-1])]
+        context = {
+            'investment_type_id': InvestmentType.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        results = {}
+        
+        for interface in interfaces:
+            results[interface] = {}
+            port = free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            server = start_server(INTERFACES[interface], port, options['server_workers'], options['threads'])
+            
+            try:
+                if not wait_for_server(base_url):
+                    raise CommandError(f'{INTERFACES[interface]} did not start for {interface}')
+                
+                # Log everyone in up front: password hashing would swamp the busiest levels
+                clients, failed_logins = login_clients(base_url, emails, options['password'])
+                if failed_logins:
+                    raise CommandError(f'{len(failed_logins)} users could not log in, e.g. {failed_logins[0]}')
+                
+                for users in levels:
+                    self.stdout.write(f"Running {interface} for {options['duration']}s with {users} users")
+                    samples, elapsed, _ = run_load_test(
+                        base_url, emails[:users], options['password'], options['duration'], mix, context,
+                        think_time=options['think_time'], seed=options['seed'], clients=clients
+                    )
+                    
+                    if not samples:
+                        raise CommandError(f'No requests were made by {users} users on {interface}')
+                    
+                    results[interface][users] = summarize(samples, elapsed)['total']
+            finally:
+                server.terminate()
+                server.wait()
+        
+        self.print_results(results, options['max_p95'])
+        
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({
+                    'options': {key: options[key] for key in ['server_workers', 'threads', 'duration', 'think_time', 'endpoints', 'max_p95']},
+                    'results': results,
+                    'limits': {interface: self.concurrency_limit(rows, options['max_p95']) for interface, rows in results.items()},
+                }, output_file, indent=2)
+    
+    def concurrency_limit(self, rows, max_p95):
+        """The most users served without errors and under the p95 target, trying levels in order."""
+        limit = 0
+        for users, row in rows.items():
+            if row['errors'] or row['p95_ms'] > max_p95:
+                break
+            limit = users
+        return limit
+    
+    def print_results(self, results, max_p95):
+        header = f"{'interface':<11}{'users':>7}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        
+        for interface, rows in results.items():
+            for users, row in rows.items():
+                line = f"{interface:<11}{users:>7}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+                self.stdout.write(self.style.WARNING(line) if row['errors'] or row['p95_ms'] > max_p95 else line)
+        
+        self.stdout.write('')
+        for interface, rows in results.items():
+            self.stdout.write(f'{interface}: up to {self.concurrency_limit(rows, max_p95)} concurrent users with p95 under {max_p95:.0f} ms and no errors')
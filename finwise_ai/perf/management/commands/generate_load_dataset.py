@@ -0,0 +1,78 @@
+import multiprocessing
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from accounts.models import User
+from expenses.models import ExpenseMonthlyRollup, ExpenseCategoryStats
+from perf.seed import SEED_ORDER, get_reference_data
+from perf.workers import init_worker, generate_batch
+
+class Command(BaseCommand):
+    help = 'Generates many users with realistic financial histories for load testing'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users to generate')
+        parser.add_argument('--expenses', type=int, default=500, help='Expenses per user (loans, goals, investments... scale with it)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed always produces the same data')
+        parser.add_argument('--prefix', default='load', help='Emails are <prefix><number>@example.com')
+        parser.add_argument('--start', type=int, default=0, help='Number of the first user, to add users to an existing dataset')
+        parser.add_argument('--users-per-batch', type=int, default=50, help='Users written per transaction')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT statement')
+        parser.add_argument('--workers', type=int, default=1, help='Processes writing batches of users in parallel (PostgreSQL only)')
+    
+    def handle(self, *args, **options):
+        first, last = options['start'], options['start'] + options['users']
+        emails = [self.email(options['prefix'], number) for number in range(first, last)]
+        
+        if any(User.objects.filter(email__in=emails[start:start + 1000]).exists() for start in range(0, len(emails), 1000)):
+            raise CommandError(f"Users {emails[0]} to {emails[-1]} already exist; use another --prefix or --start")
+        
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer, generating with one process'))
+            workers = 1
+        
+        # Shared categories and types are created once, before any worker starts
+        get_reference_data()
+        rows_before = count_rows()
+        
+        batches = [
+            emails[start:start + options['users_per_batch']]
+            for start in range(0, len(emails), options['users_per_batch'])
+        ]
+        job_options = {
+            'expenses': options['expenses'],
+            'seed': options['seed'],
+            'batch_size': options['batch_size'],
+        }
+        started = time.perf_counter()
+        done = 0
+        
+        if workers > 1:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with multiprocessing.Pool(workers, initializer=init_worker, initargs=(job_options,)) as pool:
+                for count in pool.imap_unordered(generate_batch, batches):
+                    done += count
+                    self.report(done, len(emails), started)
+        else:
+            init_worker(job_options)
+            for batch in batches:
+                done += generate_batch(batch)
+                self.report(done, len(emails), started)
+        
+        rows = count_rows() - rows_before
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {done} users and {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)'
+        ))
+    
+    def email(self, prefix, number):
+        return f'{prefix}{number}@example.com'
+    
+    def report(self, done, total, started):
+        self.stdout.write(f'{done}/{total} users ({time.perf_counter() - started:.1f}s)')
+
+def count_rows():
+    """Total number of rows in every table the generator writes to."""
+    return sum(model.objects.count() for model in [User, *SEED_ORDER, ExpenseMonthlyRollup, ExpenseCategoryStats])
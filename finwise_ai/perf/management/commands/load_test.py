@@ -0,0 +1,77 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from investments.models import InvestmentType
+from perf.loadtest import build_mix, run_load_test, summarize, free_port, start_server, wait_for_server
+
+class Command(BaseCommand):
+    help = 'Replays a weighted mix of real requests as many logged-in users and reports latency percentiles'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Server to test, e.g. http://127.0.0.1:8000 (default: start one locally)')
+        parser.add_argument('--server', choices=['runserver', 'gunicorn', 'uvicorn'], default='runserver', help='Local server to start when no --url is given (uvicorn: gunicorn with ASGI workers)')
+        parser.add_argument('--server-workers', type=int, default=2, help='Gunicorn worker processes')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+        parser.add_argument('--prefix', default='load', help='Log in as <prefix><number>@example.com (see generate_load_dataset)')
+        parser.add_argument('--start', type=int, default=0, help='Number of the first user to log in as')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run after every user has logged in')
+        parser.add_argument('--think-time', type=float, default=0, help='Average pause between requests of one user, in seconds')
+        parser.add_argument('--weights', help='Override the mix, e.g. dashboard_home=50,expense_list=50 (0 drops an endpoint)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the summary as JSON to this file')
+    
+    def handle(self, *args, **options):
+        mix = self.get_mix(options['weights'])
+        emails = [f"{options['prefix']}{number}@example.com" for number in range(options['start'], options['start'] + options['users'])]
+        context = {
+            'investment_type_id': InvestmentType.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        
+        server = None
+        base_url = options['url']
+        if not base_url:
+            port = free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            server = start_server(options['server'], port, options['server_workers'])
+            self.stdout.write(f"Started {options['server']} on {base_url}")
+        
+        try:
+            if not wait_for_server(base_url):
+                raise CommandError(f'No response from {base_url}')
+            
+            self.stdout.write(f"Running {options['users']} users for {options['duration']}s against {base_url}")
+            samples, elapsed, failed_logins = run_load_test(
+                base_url, emails, options['password'], options['duration'], mix, context,
+                think_time=options['think_time'], seed=options['seed']
+            )
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+        
+        if failed_logins:
+            self.stdout.write(self.style.WARNING(f'{len(failed_logins)} users could not log in, e.g. {failed_logins[0]}'))
+        if not samples:
+            raise CommandError('No requests were made')
+        
+        summary = summarize(samples, elapsed)
+        self.print_summary(summary)
+        
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({'options': {key: options[key] for key in ['url', 'server', 'users', 'duration', 'think_time', 'seed']}, 'mix': mix, 'summary': summary}, output_file, indent=2)
+    
+    def get_mix(self, weights):
+        try:
+            return build_mix(weights)
+        except ValueError as error:
+            raise CommandError(error)
+    
+    def print_summary(self, summary):
+        header = f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        
+        for name, row in summary.items():
+            line = f"{name:<22}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+            self.stdout.write(self.style.WARNING(line) if row['errors'] else line)
@@ -0,0 +1,101 @@
+import json
+import logging
+import random
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from .profiling import RequestProfile, current_profile, install_template_timer
+from .sinks import get_sink
+from .stats import perf_stats
+
+logger = logging.getLogger('perf')
+
+class PerfMiddleware:
+    """Record wall time, SQL and template timings for every request.
+    
+    Each request produces one JSON log line on the ``perf`` logger and feeds
+    the in-process statistics served at /_perf/. With PERF_SAMPLE_RATE and
+    PERF_SINK set, a share of the requests is also written to a local CSV or
+    SQLite file. Disabled (and removed from the chain) unless PERF_ENABLED.
+    Works in sync and async mode, so it never forces a thread on async views.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.PERF_ENABLED:
+            raise MiddlewareNotUsed
+        
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+        self.sink = get_sink(settings.PERF_SINK) if self.sample_rate else None
+        perf_stats.window = settings.PERF_WINDOW
+        install_template_timer()
+        
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        profile = RequestProfile(settings.PERF_SLOW_QUERY_COUNT)
+        token = current_profile.set(profile)
+        
+        try:
+            with ExitStack() as stack:
+                self.profile_queries(stack, profile)
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        
+        profile.finish()
+        self.record(request, response, profile)
+        return response
+    
+    async def __acall__(self, request):
+        profile = RequestProfile(settings.PERF_SLOW_QUERY_COUNT)
+        token = current_profile.set(profile)
+        stack = ExitStack()
+        
+        # Connections belong to a thread, and the async ORM runs the queries
+        # of a request in its own sync thread, so the timers go there too
+        try:
+            await sync_to_async(self.profile_queries)(stack, profile)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            current_profile.reset(token)
+        
+        profile.finish()
+        self.record(request, response, profile)
+        return response
+    
+    def profile_queries(self, stack, profile):
+        """Time every query the request runs, on each database, until the stack closes."""
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+    
+    def record(self, request, response, profile):
+        match = request.resolver_match
+        record = {
+            'timestamp': timezone.now().isoformat(),
+            'view': match.view_name if match else 'unresolved',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **profile.as_dict(),
+        }
+        
+        logger.info(json.dumps(record))
+        perf_stats.add(record)
+        
+        if self.sink and random.random() < self.sample_rate:
+            try:
+                self.sink.write(record)
+            except Exception:
+                logger.exception('Could not write request sample to %s', settings.PERF_SINK)
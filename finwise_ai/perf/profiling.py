@@ -0,0 +1,74 @@
+import time
+from contextvars import ContextVar
+from django.template.backends.django import Template
+
+# Profile of the request being handled in the current thread or task
+current_profile = ContextVar('perf_current_profile', default=None)
+
+class RequestProfile:
+    """Timings collected while one request is handled."""
+    
+    def __init__(self, slow_query_count=5):
+        self.started = time.perf_counter()
+        self.wall_time = None
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.slow_query_count = slow_query_count
+        self.slow_queries = []
+    
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: time every query run during the request."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += duration
+            self.record_slow_query(sql, duration)
+    
+    def record_slow_query(self, sql, duration):
+        """Keep only the slowest statements, slowest first."""
+        if len(self.slow_queries) < self.slow_query_count or duration > self.slow_queries[-1][1]:
+            self.slow_queries.append((sql, duration))
+            self.slow_queries.sort(key=lambda query: query[1], reverse=True)
+            del self.slow_queries[self.slow_query_count:]
+    
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+    
+    def as_dict(self):
+        return {
+            'wall_time_ms': round(self.wall_time * 1000, 3),
+            'query_count': self.query_count,
+            'db_time_ms': round(self.db_time * 1000, 3),
+            'template_time_ms': round(self.template_time * 1000, 3),
+            'slow_queries': [
+                {'sql': sql, 'time_ms': round(duration * 1000, 3)}
+                for sql, duration in self.slow_queries
+            ],
+        }
+
+_original_render = Template.render
+
+def _timed_render(self, context=None, request=None):
+    """Template.render that adds its duration to the current request profile."""
+    profile = current_profile.get()
+    if profile is None:
+        return _original_render(self, context, request)
+    
+    # Templates rendered from inside another one are already being timed
+    profile.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        profile.template_depth -= 1
+        if profile.template_depth == 0:
+            profile.template_time += time.perf_counter() - started
+
+def install_template_timer():
+    """Time Django template rendering for profiled requests (idempotent)."""
+    Template.render = _timed_render
@@ -0,0 +1,332 @@
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User, UserProfile
+from credit.models import CreditHistory, CreditEstimation, ImprovementSuggestion
+from dashboard.models import Notification
+from expenses.models import Expense, ExpenseCategory, AnomalyDetection
+from expenses.utils import rebuild_rollups
+from expenses.anomalies import rebuild_stats
+from goals.models import SavingsGoal, GoalContribution, GoalMilestone
+from investments.models import InvestmentType, Investment, InvestmentTransaction, InvestmentSimulation
+from loans.models import LoanType, Loan, LoanPayment, LoanEligibility
+from loans.utils import amortization_schedule, calculate_monthly_payment
+from loans.views import build_payment_rows
+
+# Category names with the range of a typical single expense in each
+CATEGORY_AMOUNTS = {
+    'Groceries': (5, 400),
+    'Rent': (3000, 12000),
+    'Transport': (5, 300),
+    'Utilities': (100, 1500),
+    'Dining': (20, 800),
+    'Health': (50, 3000),
+    'Entertainment': (20, 1000),
+    'Shopping': (20, 5000),
+}
+
+CATEGORY_NAMES = list(CATEGORY_AMOUNTS)
+
+# How often each category shows up among day-to-day expenses (rent is recurring)
+CATEGORY_WEIGHTS = [30, 0, 20, 5, 20, 5, 10, 10]
+
+def cents(rng, low, high):
+    """Draw a random amount between two whole numbers, rounded to cents."""
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+def related_count(expense_count):
+    """Number of loans, goals, investments... seeded next to a number of expenses.
+    
+    It grows with the square root of the expense count so that per-row
+    (N+1) queries show up as soon as the data size changes.
+    """
+    return max(2, int(math.sqrt(expense_count)) // 3)
+
+def get_reference_data():
+    """Create (once) the shared categories and loan and investment types."""
+    categories = [
+        ExpenseCategory.objects.get_or_create(name=name, defaults={'is_default': True})[0]
+        for name in CATEGORY_NAMES
+    ]
+    loan_type = LoanType.objects.get_or_create(name='Personal Loan', defaults={'base_interest_rate': Decimal('12.50')})[0]
+    investment_types = [
+        InvestmentType.objects.get_or_create(name=name, defaults={'category': category, 'risk_level': risk, 'avg_annual_return': Decimal(annual_return), 'volatility': Decimal(volatility)})[0]
+        for name, category, risk, annual_return, volatility in [
+            ('Index Fund', 'stocks', 3, '8.00', '15.00'),
+            ('Government Bonds', 'bonds', 1, '4.00', '5.00'),
+            ('Bitcoin', 'crypto', 5, '20.00', '60.00'),
+        ]
+    ]
+    
+    return {
+        'categories': categories,
+        'loan_type': loan_type,
+        'investment_types': investment_types,
+    }
+
+def seed_user(email, expense_count, seed=0, batch_size=1000, reference=None):
+    """Create a user with a realistic spread of data around a number of expenses.
+    
+    Returns a dict with the user and one instance of each seeded model, to
+    build URLs from.
+    """
+    user = seed_users([email], expense_count, seed, batch_size, reference)[0]
+    loan = user.loans.filter(is_simulation=False).order_by('pk').first()
+    goal = user.savings_goals.order_by('pk').first()
+    investment = user.investments.order_by('pk').first()
+    
+    return {
+        'user': user,
+        'expense': user.expenses.filter(recurrence='none').order_by('pk').first(),
+        'recurring_expense': user.expenses.exclude(recurrence='none').first(),
+        'category': ExpenseCategory.objects.get(name=CATEGORY_NAMES[0]),
+        'anomaly': user.anomalies.first(),
+        'loan': loan,
+        'loan_payment': loan.payments.first(),
+        'simulated_loan': user.loans.filter(is_simulation=True).first(),
+        'eligibility': user.loan_eligibilities.first(),
+        'goal': goal,
+        'contribution': goal.contributions.first(),
+        'milestone': goal.milestones.first(),
+        'investment': investment,
+        'investment_transaction': investment.transactions.first(),
+        'simulation': user.investment_simulations.first(),
+        'credit_history': user.credit_histories.first(),
+        'estimation': user.credit_estimations.first(),
+        'suggestion': ImprovementSuggestion.objects.filter(credit_estimation__user=user).first(),
+    }
+
+def seed_users(emails, expense_count, seed=0, batch_size=1000, reference=None, password='password'):
+    """Create users with expense, loan, goal, investment and credit histories.
+    
+    Every model is written with bulk_create for the whole group of users and
+    the expense rollups and category statistics are rebuilt afterwards, so
+    millions of rows take minutes. Each user's data only depends on the seed
+    and their email, so the same dataset comes out however the users are
+    split into groups or processes.
+    
+    Returns the created users.
+    """
+    reference = reference or get_reference_data()
+    today = timezone.now().date()
+    related = related_count(expense_count)
+    
+    # Hashing is deliberately slow, so every generated user shares one hash
+    password_hash = make_password(password)
+    
+    users = [User(email=email, password=password_hash, email_verified=True) for email in emails]
+    rows = {model: [] for model in SEED_ORDER}
+    
+    for user in users:
+        add_user_rows(rows, user, random.Random(f'{seed}:{user.email}'), expense_count, related, reference, today)
+    
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        
+        # Parents are written first, so every child row can pick up their ids
+        for model in SEED_ORDER:
+            if model is LoanPayment:
+                rows[model] = [
+                    payment
+                    for loan in rows[Loan] if not loan.is_simulation
+                    for payment in build_payment_rows(loan, amortization_schedule(loan.amount, loan.interest_rate, loan.term_months), today)
+                ]
+            model.objects.bulk_create(rows[model], batch_size=batch_size)
+    
+    user_ids = [user.pk for user in users]
+    rebuild_rollups(user_ids, batch_size=batch_size)
+    rebuild_stats(user_ids, batch_size=batch_size)
+    
+    return users
+
+def add_user_rows(rows, user, rng, expense_count, related, reference, today):
+    """Add one user's unsaved rows, per model, to ``rows``."""
+    categories = reference['categories']
+    income = cents(rng, 20000, 80000)
+    
+    rows[UserProfile].append(UserProfile(
+        user=user,
+        monthly_income=income,
+        risk_profile=rng.choice(['conservative', 'moderate', 'aggressive'])
+    ))
+    
+    # Day-to-day expenses over the last two years, a few of them flagged
+    expenses = [
+        Expense(
+            user=user,
+            category=category,
+            amount=cents(rng, *CATEGORY_AMOUNTS[category.name]),
+            description=f'{category.name} {index}',
+            date=today - timedelta(days=rng.randint(0, 730)),
+            is_flagged=rng.random() < 0.01
+        )
+        for index, category in enumerate(rng.choices(categories, weights=CATEGORY_WEIGHTS, k=expense_count))
+    ]
+    
+    # Monthly rent, expanded into occurrences when read
+    rows[Expense].append(Expense(
+        user=user,
+        category=categories[CATEGORY_NAMES.index('Rent')],
+        amount=cents(rng, *CATEGORY_AMOUNTS['Rent']),
+        description='Rent',
+        date=today - timedelta(days=365),
+        recurrence='monthly',
+        recurrence_end_date=today + timedelta(days=365)
+    ))
+    rows[Expense].extend(expenses)
+    
+    rows[AnomalyDetection].extend(
+        AnomalyDetection(
+            user=user,
+            expense=expense,
+            anomaly_type='spike',
+            confidence_score=rng.random(),
+            description='Unusually large expense'
+        )
+        for expense in rng.sample(expenses, min(related, len(expenses)))
+    )
+    
+    # Active loans (their payment schedules are built once they have ids), plus one simulation
+    for index in range(related):
+        amount = cents(rng, 5000, 200000)
+        interest_rate = Decimal(rng.randint(500, 3000)) / 100
+        term_months = rng.choice([12, 24, 36, 60])
+        rows[Loan].append(Loan(
+            user=user,
+            loan_type=reference['loan_type'],
+            amount=amount,
+            interest_rate=interest_rate,
+            term_months=term_months,
+            start_date=today - timedelta(days=rng.randint(0, 365)),
+            monthly_payment=Decimal(str(round(calculate_monthly_payment(amount, interest_rate, term_months), 2))),
+            remaining_balance=amount,
+            status='active',
+            is_simulation=False
+        ))
+    
+    rows[Loan].append(Loan(
+        user=user,
+        loan_type=reference['loan_type'],
+        amount=Decimal('50000.00'),
+        interest_rate=Decimal('12.50'),
+        term_months=36,
+        monthly_payment=Decimal('1672.68'),
+        status='simulated',
+        is_simulation=True
+    ))
+    rows[LoanEligibility].append(LoanEligibility(
+        user=user,
+        loan_type=reference['loan_type'],
+        requested_amount=Decimal('50000.00'),
+        requested_term_months=36,
+        is_eligible=True,
+        max_eligible_amount=income * 4,
+        offered_interest_rate=Decimal('12.50')
+    ))
+    
+    # Savings goals with monthly contributions and milestones
+    for index in range(related):
+        target = cents(rng, 10000, 100000)
+        goal = SavingsGoal(
+            user=user,
+            name=f'Goal {index}',
+            target_amount=target,
+            start_date=today - timedelta(days=365),
+            target_date=today + timedelta(days=rng.randint(90, 1000))
+        )
+        contributions = [
+            GoalContribution(goal=goal, amount=cents(rng, 100, 2000), date=today - timedelta(days=30 * month))
+            for month in range(12)
+        ]
+        goal.current_amount = sum(contribution.amount for contribution in contributions)
+        rows[SavingsGoal].append(goal)
+        rows[GoalContribution].extend(contributions)
+        rows[GoalMilestone].extend(
+            GoalMilestone(goal=goal, name=f'{share}%', target_amount=target * share / 100)
+            for share in (25, 50, 75)
+        )
+    
+    # Investments with their buy transactions, plus one saved simulation
+    for index in range(related):
+        purchase_price = cents(rng, 10, 500)
+        investment = Investment(
+            user=user,
+            investment_type=rng.choice(reference['investment_types']),
+            name=f'Holding {index}',
+            purchase_date=today - timedelta(days=rng.randint(150, 1000)),
+            purchase_price=purchase_price,
+            quantity=Decimal(rng.randint(1, 500)),
+            current_price=purchase_price * Decimal(rng.randint(70, 160)) / 100
+        )
+        rows[Investment].append(investment)
+        rows[InvestmentTransaction].extend(
+            InvestmentTransaction(
+                investment=investment,
+                transaction_type='buy',
+                date=investment.purchase_date + timedelta(days=30 * month),
+                price=purchase_price,
+                quantity=Decimal(rng.randint(1, 20))
+            )
+            for month in range(5)
+        )
+    
+    rows[InvestmentSimulation].append(InvestmentSimulation(
+        user=user,
+        investment_type=reference['investment_types'][0],
+        name='Retirement plan',
+        strategy='dca',
+        initial_amount=Decimal('10000.00'),
+        periodic_amount=Decimal('1000.00'),
+        duration_years=10,
+        expected_return=Decimal('8.00'),
+        volatility=Decimal('15.00')
+    ))
+    
+    # Monthly credit scores drifting from a starting score, an estimation and notifications
+    score = rng.randint(550, 800)
+    for month in range(max(12, related)):
+        rows[CreditHistory].append(CreditHistory(user=user, date=today - timedelta(days=30 * month), score=score))
+        score = min(850, max(300, score + rng.randint(-15, 15)))
+    
+    estimation = CreditEstimation(user=user, estimated_score=score, confidence_level=80)
+    rows[CreditEstimation].append(estimation)
+    rows[ImprovementSuggestion].extend(
+        ImprovementSuggestion(
+            credit_estimation=estimation,
+            title=f'Suggestion {index}',
+            description='Pay down revolving balances',
+            impact='medium',
+            potential_points_gain=rng.randint(5, 40),
+            timeframe_months=rng.randint(1, 12)
+        )
+        for index in range(3)
+    )
+    
+    rows[Notification].extend(
+        Notification(user=user, title=f'Notice {index}', message='Something happened', is_read=index % 3 != 0)
+        for index in range(related * 2)
+    )
+
+# Models in the order they are written: parents before their children
+SEED_ORDER = [
+    UserProfile,
+    Expense,
+    AnomalyDetection,
+    Loan,
+    LoanPayment,
+    LoanEligibility,
+    SavingsGoal,
+    GoalContribution,
+    GoalMilestone,
+    Investment,
+    InvestmentTransaction,
+    InvestmentSimulation,
+    CreditHistory,
+    CreditEstimation,
+    ImprovementSuggestion,
+    Notification,
+]
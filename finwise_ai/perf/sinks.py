@@ -0,0 +1,63 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+# Columns written for every sampled request
+SINK_FIELDS = ['timestamp', 'view', 'method', 'path', 'status', 'wall_time_ms', 'query_count', 'db_time_ms', 'template_time_ms', 'slow_queries']
+
+class CsvSink:
+    """Append sampled requests to a CSV file."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+    
+    def write(self, record):
+        row = dict(record, slow_queries=json.dumps(record['slow_queries']))
+        with self.lock:
+            is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as sink_file:
+                writer = csv.DictWriter(sink_file, fieldnames=SINK_FIELDS, extrasaction='ignore')
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(row)
+
+class SqliteSink:
+    """Append sampled requests to a standalone SQLite file.
+    
+    The file is separate from the application database so sampling never
+    adds queries to (or locks) the requests being measured.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        with self.connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS perf_request ('
+                'timestamp TEXT, view TEXT, method TEXT, path TEXT, status INTEGER, '
+                'wall_time_ms REAL, query_count INTEGER, db_time_ms REAL, '
+                'template_time_ms REAL, slow_queries TEXT)'
+            )
+    
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+    
+    def write(self, record):
+        row = dict(record, slow_queries=json.dumps(record['slow_queries']))
+        with self.lock, self.connect() as db:
+            db.execute(
+                f'INSERT INTO perf_request ({", ".join(SINK_FIELDS)}) '
+                f'VALUES ({", ".join("?" * len(SINK_FIELDS))})',
+                [row.get(field) for field in SINK_FIELDS]
+            )
+
+def get_sink(path):
+    """Pick the sink from the file extension: .csv, anything else is SQLite."""
+    if not path:
+        return None
+    if str(path).endswith('.csv'):
+        return CsvSink(path)
+    return SqliteSink(path)
@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+import numpy as np
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open-ended
+HISTOGRAM_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+class ViewStats:
+    """Rolling latency, query and template statistics for one view."""
+    
+    def __init__(self, window):
+        self.count = 0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.wall_times = deque(maxlen=window)
+        self.query_counts = deque(maxlen=window)
+        self.db_times = deque(maxlen=window)
+        self.template_times = deque(maxlen=window)
+        self.slowest_queries = []
+    
+    def add(self, record):
+        self.count += 1
+        self.buckets[bucket_index(record['wall_time_ms'])] += 1
+        self.wall_times.append(record['wall_time_ms'])
+        self.query_counts.append(record['query_count'])
+        self.db_times.append(record['db_time_ms'])
+        self.template_times.append(record['template_time_ms'])
+        
+        # The slowest statements ever seen for this view, worst first
+        self.slowest_queries = sorted(
+            self.slowest_queries + record['slow_queries'],
+            key=lambda query: query['time_ms'],
+            reverse=True
+        )[:5]
+    
+    def summary(self):
+        wall_times = np.array(self.wall_times)
+        p50, p95, p99 = np.percentile(wall_times, [50, 95, 99])
+        
+        return {
+            'count': self.count,
+            'window': len(wall_times),
+            'wall_time_ms': {
+                'mean': round(float(wall_times.mean()), 3),
+                'p50': round(float(p50), 3),
+                'p95': round(float(p95), 3),
+                'p99': round(float(p99), 3),
+                'max': round(float(wall_times.max()), 3),
+            },
+            'mean_query_count': round(float(np.mean(self.query_counts)), 2),
+            'mean_db_time_ms': round(float(np.mean(self.db_times)), 3),
+            'mean_template_time_ms': round(float(np.mean(self.template_times)), 3),
+            'histogram': dict(zip(bucket_labels(), self.buckets)),
+            'slowest_queries': self.slowest_queries,
+        }
+
+class PerfStats:
+    """Thread-safe in-process store of per-view statistics.
+    
+    Each process (e.g. each gunicorn worker) keeps its own figures; only the
+    last ``window`` requests of every view feed the percentiles.
+    """
+    
+    def __init__(self, window=1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.views = {}
+    
+    def add(self, record):
+        with self.lock:
+            stats = self.views.get(record['view'])
+            if stats is None:
+                stats = self.views[record['view']] = ViewStats(self.window)
+            stats.add(record)
+    
+    def summary(self):
+        with self.lock:
+            return {view: stats.summary() for view, stats in sorted(self.views.items())}
+    
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+def bucket_index(wall_time_ms):
+    for index, bound in enumerate(HISTOGRAM_BUCKETS):
+        if wall_time_ms <= bound:
+            return index
+    return len(HISTOGRAM_BUCKETS)
+
+def bucket_labels():
+    return [f'<={bound}ms' for bound in HISTOGRAM_BUCKETS] + [f'>{HISTOGRAM_BUCKETS[-1]}ms']
+
+# Statistics of the current process
+perf_stats = PerfStats()
@@ -0,0 +1,152 @@
+from datetime import date
+from decimal import Decimal
+from django.db.models import Sum
+from django.test import TestCase
+from accounts.models import User
+from expenses.models import Expense, ExpenseCategory, ExpenseMonthlyRollup, ExpenseCategoryStats
+from expenses.utils import rebuild_rollups, get_expense_analytics, get_recurring_occurrences
+from expenses.anomalies import rebuild_stats
+from dashboard.utils import get_expense_summary, get_expense_breakdown
+
+def rollup_rows(user):
+    """The user's rollups as comparable tuples."""
+    return sorted(ExpenseMonthlyRollup.objects.filter(user=user).values_list(
+        'category_id', 'year', 'month', 'total_amount', 'expense_count', 'min_amount', 'max_amount'
+    ), key=str)
+
+def stats_rows(user):
+    """The user's category statistics as {category id: (count, mean, M2)}, rounded for float noise."""
+    return {
+        category_id: (count, round(mean, 6), round(m2, 6))
+        for category_id, count, mean, m2 in ExpenseCategoryStats.objects.filter(user=user).values_list('category_id', 'count', 'mean', 'm2')
+    }
+
+class CategoryDeleteTests(TestCase):
+    """Deleting a category must leave the incrementally maintained data as a rebuild would."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='rollups@example.com', password='password')
+        self.category = ExpenseCategory.objects.create(name='Groceries')
+        
+        Expense.objects.create(user=self.user, category=self.category, amount=Decimal('20.00'), description='Market', date=date(2025, 3, 5))
+        Expense.objects.create(user=self.user, category=None, amount=Decimal('10.00'), description='Cash', date=date(2025, 3, 9))
+        Expense.objects.create(
+            user=self.user, category=self.category, amount=Decimal('5.00'), description='Delivery',
+            date=date(2025, 1, 15), recurrence='monthly', recurrence_end_date=date(2025, 4, 15)
+        )
+    
+    def assertMatchesRebuild(self):
+        incremental = rollup_rows(self.user)
+        rebuild_rollups([self.user.pk])
+        self.assertEqual(incremental, rollup_rows(self.user))
+    
+    def assertStatsMatchRebuild(self):
+        incremental = stats_rows(self.user)
+        rebuild_stats([self.user.pk])
+        self.assertEqual(incremental, stats_rows(self.user))
+    
+    def test_rollups_are_merged_into_uncategorized(self):
+        self.category.delete()
+        
+        self.assertFalse(ExpenseMonthlyRollup.objects.filter(user=self.user, year=2025, month=3).exclude(category=None).exists())
+        self.assertEqual(ExpenseMonthlyRollup.objects.filter(user=self.user, year=2025, month=3).count(), 1)
+        self.assertMatchesRebuild()
+    
+    def test_later_writes_count_once(self):
+        self.category.delete()
+        
+        Expense.objects.create(user=self.user, category=None, amount=Decimal('7.00'), description='Taxi', date=date(2025, 3, 20))
+        Expense.objects.get(description='Cash').delete()
+        self.assertMatchesRebuild()
+    
+    def test_stats_are_merged_into_uncategorized(self):
+        self.category.delete()
+        
+        self.assertEqual(list(ExpenseCategoryStats.objects.filter(user=self.user).values_list('category_id', flat=True)), [None])
+        self.assertStatsMatchRebuild()
+        
+        Expense.objects.create(user=self.user, category=None, amount=Decimal('40.00'), description='Repair', date=date(2025, 3, 21))
+        self.assertStatsMatchRebuild()
+
+
+class DashboardRecurringTests(TestCase):
+    """The dashboard totals must count recurring occurrences like the rollups do."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='dashboard@example.com', password='password')
+        self.category = ExpenseCategory.objects.create(name='Rent')
+        
+        Expense.objects.create(user=self.user, category=None, amount=Decimal('10.00'), description='Cash', date=date(2025, 3, 9))
+        Expense.objects.create(
+            user=self.user, category=self.category, amount=Decimal('500.00'), description='Flat',
+            date=date(2025, 1, 1), recurrence='weekly', recurrence_end_date=date(2025, 6, 1)
+        )
+    
+    def rollup_total(self, year, month):
+        return ExpenseMonthlyRollup.objects.filter(user=self.user, year=year, month=month).aggregate(total=Sum('total_amount'))['total']
+    
+    def test_month_and_week_totals(self):
+        summary = get_expense_summary(self.user, date(2025, 3, 31))
+        
+        self.assertEqual(summary['current_month_total'], self.rollup_total(2025, 3))
+        self.assertEqual(summary['last_month_total'], self.rollup_total(2025, 2))
+        self.assertEqual([week['amount'] for week in summary['weekly_spending']], [Decimal('510.00'), Decimal('500.00'), Decimal('500.00'), Decimal('500.00')])
+    
+    def test_breakdown(self):
+        breakdown = get_expense_breakdown(self.user, date(2025, 3, 1), date(2025, 3, 31))
+        
+        self.assertEqual([(row['category'], row['amount']) for row in breakdown], [('Rent', Decimal('2000.00'))])
+
+
+class ExpenseAnalyticsTests(TestCase):
+    """The analytics read from the rollups must match a scan of the expenses and occurrences."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='analytics@example.com', password='password')
+        self.category = ExpenseCategory.objects.create(name='Groceries')
+        
+        Expense.objects.create(user=self.user, category=self.category, amount=Decimal('20.00'), description='Market', date=date(2025, 1, 10))
+        Expense.objects.create(user=self.user, category=None, amount=Decimal('30.00'), description='Cash', date=date(2025, 2, 3))
+        Expense.objects.create(user=self.user, category=self.category, amount=Decimal('15.00'), description='Bakery', date=date(2025, 2, 20))
+        Expense.objects.create(
+            user=self.user, category=self.category, amount=Decimal('5.00'), description='Delivery',
+            date=date(2025, 1, 15), recurrence='weekly', recurrence_end_date=date(2025, 4, 15)
+        )
+    
+    def scan(self, since, until):
+        """Monthly, category and grand totals from every expense and occurrence in the window."""
+        items = [(expense.date, expense.category, expense.amount) for expense in Expense.objects.filter(user=self.user)]
+        items += [
+            (occurrence.date, occurrence.parent_expense.category, occurrence.amount)
+            for occurrence in get_recurring_occurrences([self.user.pk], since, until)
+        ]
+        items = [item for item in items if (not since or item[0] >= since) and (not until or item[0] <= until)]
+        
+        monthly, categories = {}, {}
+        for item_date, category, amount in items:
+            month = item_date.strftime('%b %Y')
+            name = category.name if category else 'Uncategorized'
+            monthly[month] = monthly.get(month, 0) + amount
+            categories[name] = categories.get(name, 0) + amount
+        
+        return monthly, categories, sum(amount for _, _, amount in items), len(items)
+    
+    def test_windows_match_a_scan(self):
+        windows = [
+            (None, None),
+            (date(2025, 1, 1), date(2025, 3, 31)),
+            (date(2025, 1, 20), date(2025, 3, 10)),
+            (date(2025, 2, 5), date(2025, 2, 25)),
+            (date(2025, 2, 1), None),
+        ]
+        
+        for since, until in windows:
+            with self.subTest(since=since, until=until):
+                monthly, categories, total, count = self.scan(since, until)
+                analytics = get_expense_analytics(self.user, since=since, until=until)
+                
+                self.assertEqual({row['date']: row['amount'] for row in analytics['monthly_trend']}, {month: float(amount) for month, amount in monthly.items()})
+                self.assertEqual({row['category__name']: row['amount'] for row in analytics['category_breakdown']}, {name: float(amount) for name, amount in categories.items()})
+                self.assertEqual(sum(row['amount'] for row in analytics['day_of_week']), float(total))
+                self.assertEqual(analytics['total_expenses'], float(total))
+                self.assertEqual(analytics['num_transactions'], count)
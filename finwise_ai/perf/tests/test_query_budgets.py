@@ -0,0 +1,65 @@
+import os
+import subprocess
+from django.conf import settings
+from django.test import TestCase
+from perf.budget import get_view_urls, measure_view, find_query_growth, find_unexpected_statuses, write_report
+from perf.seed import seed_user, get_reference_data
+
+# Expense counts to seed, e.g. PERF_DATA_SIZES=100,10000,100000 for a full run
+DATA_SIZES = [int(size) for size in os.environ.get('PERF_DATA_SIZES', '100,1000').split(',')]
+
+# Where to write the JSON report, e.g. PERF_REPORT=perf-report.json
+REPORT_PATH = os.environ.get('PERF_REPORT')
+
+def current_commit():
+    """Return the commit being measured, if git is available."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class QueryBudgetTests(TestCase):
+    """Run every view against users with more and more data and compare query counts."""
+    
+    maxDiff = None
+    
+    @classmethod
+    def setUpTestData(cls):
+        reference = get_reference_data()
+        cls.seeded = {
+            size: seed_user(f'budget{size}@example.com', size, seed=size, reference=reference)
+            for size in DATA_SIZES
+        }
+    
+    def measure_all_views(self):
+        report = {}
+        
+        for size, objects in self.seeded.items():
+            # Staff access so the admin change lists are measured as well
+            user = objects['user']
+            user.is_staff = user.is_superuser = True
+            user.save(update_fields=['is_staff', 'is_superuser'])
+            self.client.force_login(user)
+            urls = get_view_urls(objects)
+            
+            # Warm-up request so one-off queries (sessions, content types) aren't counted
+            self.client.get(urls['dashboard:dashboard_home'])
+            
+            report[str(size)] = {name: measure_view(self.client, url) for name, url in urls.items()}
+        
+        return report
+    
+    def test_query_counts_do_not_grow_with_data(self):
+        report = self.measure_all_views()
+        
+        if REPORT_PATH:
+            write_report(REPORT_PATH, report, {'commit': current_commit(), 'data_sizes': DATA_SIZES})
+        
+        # A view that crashes runs few queries, so it must not pass for a fast one
+        self.assertEqual(find_unexpected_statuses(report), {}, 'Views answered with an unexpected status (see perf.budget.EXPECTED_STATUSES)')
+        
+        growth = find_query_growth(report)
+        self.assertEqual(growth, {}, 'Query counts grow with the data size (N+1 queries)')
@@ -0,0 +1,114 @@
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from accounts.models import User
+from credit.models import CreditHistory
+from dashboard.models import Notification
+from expenses.models import Expense, ExpenseCategory
+from goals.models import SavingsGoal, GoalContribution
+from investments.models import Investment, InvestmentTransaction
+from loans.models import Loan, LoanPayment
+
+def explain(queryset):
+    """Return the query plan of a queryset as text."""
+    if connection.vendor == 'postgresql':
+        # On a small test database the planner prefers sequential scans even
+        # when a usable index exists, so only allow them as a last resort
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+def sequential_scans(plan, table):
+    """Find full scans of a table in a PostgreSQL or SQLite query plan."""
+    patterns = [
+        rf'Seq Scan on "?{table}"?',
+        rf'\bSCAN "?{table}"?(?! USING)(?=\s|$)',
+    ]
+    return [match.group(0) for pattern in patterns for match in re.finditer(pattern, plan)]
+
+class QueryPlanTests(TestCase):
+    """Check that the hot per-user date-range queries are served by an index."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        today = date(2025, 6, 30)
+        cls.today = today
+        category = ExpenseCategory.objects.create(name='Groceries')
+        
+        for index in range(3):
+            user = User.objects.create_user(email=f'plan{index}@example.com', password='password')
+            Expense.objects.bulk_create([
+                Expense(user=user, category=category, amount=Decimal(10 + day), description='Expense', date=today - timedelta(days=day), is_flagged=day % 17 == 0)
+                for day in range(200)
+            ])
+            CreditHistory.objects.bulk_create([
+                CreditHistory(user=user, score=600 + month, date=today - timedelta(days=30 * month))
+                for month in range(24)
+            ])
+            Notification.objects.bulk_create([
+                Notification(user=user, title='Notice', message='Message', is_read=number % 3 != 0)
+                for number in range(50)
+            ])
+            
+            loan = Loan.objects.create(user=user, amount=Decimal('10000'), interest_rate=Decimal('10'), term_months=24, monthly_payment=Decimal('461.45'), start_date=today, status='active', is_simulation=False)
+            LoanPayment.objects.bulk_create([
+                LoanPayment(loan=loan, payment_date=today + timedelta(days=30 * month), amount=Decimal('460'), principal_amount=Decimal('400'), interest_amount=Decimal('60'), remaining_balance=Decimal('9000'), is_paid=month < 6)
+                for month in range(24)
+            ])
+            
+            goal = SavingsGoal.objects.create(user=user, name='Goal', target_amount=Decimal('100000'), start_date=today - timedelta(days=365), target_date=today + timedelta(days=365))
+            GoalContribution.objects.bulk_create([
+                GoalContribution(goal=goal, amount=Decimal('100'), date=today - timedelta(days=7 * week))
+                for week in range(52)
+            ])
+            
+            investment = Investment.objects.create(user=user, name='Fund', purchase_price=Decimal('10'), quantity=Decimal('100'), purchase_date=today - timedelta(days=365))
+            InvestmentTransaction.objects.bulk_create([
+                InvestmentTransaction(investment=investment, transaction_type='buy', quantity=Decimal('1'), price=Decimal('10'), date=today - timedelta(days=7 * week))
+                for week in range(52)
+            ])
+        
+        cls.user = user
+        cls.loan = loan
+        cls.goal = goal
+        cls.investment = investment
+    
+    def hot_queries(self):
+        """The queries behind the dashboard, list and detail views."""
+        month_start = self.today.replace(day=1)
+        year_ago = self.today - timedelta(days=365)
+        
+        return {
+            'expenses in a date range': Expense.objects.filter(user=self.user, date__gte=month_start, date__lte=self.today),
+            'flagged expenses': Expense.objects.filter(user=self.user, is_flagged=True),
+            'expense list page': self.expense_list_page(),
+            'upcoming unpaid loan payments': LoanPayment.objects.filter(loan=self.loan, payment_date__gte=self.today, is_paid=False),
+            'loan payments in a date range': LoanPayment.objects.filter(loan=self.loan, payment_date__lte=self.today),
+            'active loans': Loan.objects.filter(user=self.user, status='active'),
+            'credit history': CreditHistory.objects.filter(user=self.user, date__gte=year_ago),
+            'goal contributions': GoalContribution.objects.filter(goal=self.goal, date__gte=year_ago),
+            'investment transactions': InvestmentTransaction.objects.filter(investment=self.investment, date__gte=year_ago),
+            'active investments': Investment.objects.filter(user=self.user, status='active', is_simulation=False),
+            'unread notifications': Notification.objects.filter(user=self.user, is_read=False),
+            'read notifications': Notification.objects.filter(user=self.user, is_read=True).order_by('-created_at'),
+        }
+    
+    def expense_list_page(self):
+        """The keyset query behind one page of the expense list."""
+        cursor_date = self.today - timedelta(days=100)
+        return Expense.objects.filter(user=self.user).filter(
+            Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=10 ** 9)
+        ).order_by('-date', '-id')[:51]
+    
+    def test_hot_queries_use_an_index(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                plan = explain(queryset)
+                self.assertEqual(sequential_scans(plan, queryset.model._meta.db_table), [], plan)
+    
+    def test_expense_list_page_is_read_in_index_order(self):
+        plan = explain(self.expense_list_page())
+        self.assertNotRegex(plan, r'TEMP B-TREE FOR ORDER BY|\bSort\b', plan)
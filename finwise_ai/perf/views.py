@@ -0,0 +1,16 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from .stats import perf_stats
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def perf_summary(request):
+    """Per-view latency histogram and timings of this process; POST resets them."""
+    if request.method == 'POST':
+        perf_stats.reset()
+    
+    return JsonResponse({
+        'window': perf_stats.window,
+        'views': perf_stats.summary(),
+    })
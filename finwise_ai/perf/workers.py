@@ -0,0 +1,27 @@
+"""Worker-process entry points for generate_load_dataset.
+
+The command closes its database connections and then forks a Pool, so
+every worker starts with Django already set up and opens its own
+connection on its first query.
+"""
+
+from perf.seed import get_reference_data, seed_users
+
+# Options and reference data of the current worker process
+worker_options = {}
+
+def init_worker(options):
+    """Load the reference data a worker (or the command itself, without workers) seeds users with."""
+    worker_options.update(options)
+    worker_options['reference'] = get_reference_data()
+
+def generate_batch(emails):
+    """Generate one batch of users in the current process; returns the user count."""
+    users = seed_users(
+        emails,
+        worker_options['expenses'],
+        seed=worker_options['seed'],
+        batch_size=worker_options['batch_size'],
+        reference=worker_options['reference']
+    )
+    return len(users)